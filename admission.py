@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Webhook Admission Control
+Per-source token buckets and a bounded count of requests in progress, checked
+on the raw request before its body is parsed, so a misbehaving strategy or a
+replay storm is shed with 429/503 + Retry-After instead of slowing real fills
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# Actions that open, change or close a position; anything else (alerts, text
+# messages, Telegram updates) is informational and shed first
+CRITICAL_ACTIONS = ('OPEN', 'CLOSE', 'ADD', 'REDUCE', 'BUY', 'SELL', 'TP', 'SL')
+
+_CRITICAL = frozenset(action.encode() for action in CRITICAL_ACTIONS)
+
+# "action": "open" under any of the normalizer's action aliases (strategy.order.action
+# is a nested "action" key), and text events that start with the action
+JSON_ACTION_RE = re.compile(rb'"(?:action|type|order_action)"\s*:\s*"\s*([a-z]+)', re.IGNORECASE)
+TEXT_ACTION_RE = re.compile(rb'^\s*(' + b'|'.join(_CRITICAL) + rb')\s', re.IGNORECASE | re.MULTILINE)
+
+
+def classify(body):
+    """(critical, events) for a raw request body without parsing it: whether any
+    event carries an order action, and an estimate of how many events it holds"""
+    actions = JSON_ACTION_RE.findall(body)
+    text_actions = TEXT_ACTION_RE.findall(body) if not actions else []
+    critical = bool(text_actions) or any(action.upper() in _CRITICAL for action in actions)
+    return critical, max(1, len(actions) + len(text_actions))
+
+
+class RateLimiter:
+    """Two token buckets per source, one per priority: `rate` tokens per second
+    holding at most `burst` for informational requests, and a separate, larger
+    `critical_rate`/`critical_burst` for order actions.
+
+    A request costs one token per event. Order actions get their own bucket so
+    a liquidation cascade (a burst of fills) is not shed behind alerts, but a
+    source replaying fills without end is still throttled. They also drain the
+    informational bucket, so a source busy with fills has its alerts shed
+    first. Buckets of the least recently seen sources are dropped beyond
+    `max_sources`. A rate of 0 disables that bucket.
+    """
+
+    def __init__(self, rate, burst, critical_rate, critical_burst, max_sources=10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.critical_rate = critical_rate
+        self.critical_burst = max(1.0, critical_burst)
+        self.max_sources = max_sources
+        self._buckets = OrderedDict()   # source -> [info tokens, critical tokens, monotonic time of last update]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _bucket(self, source, now):
+        bucket = self._buckets.get(source)
+        if bucket is None:
+            bucket = self._buckets[source] = [self.burst, self.critical_burst, now]
+            if len(self._buckets) > self.max_sources:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(source)
+            elapsed = now - bucket[2]
+            bucket[0] = min(self.burst, bucket[0] + elapsed * self.rate)
+            bucket[1] = min(self.critical_burst, bucket[1] + elapsed * self.critical_rate)
+            bucket[2] = now
+        return bucket
+
+    def acquire(self, source, cost=1, critical=False):
+        """Take `cost` tokens; returns 0 if admitted, else seconds until they would be there"""
+        if not (self.rate or self.critical_rate):
+            return 0
+        rate, burst, tier = (self.critical_rate, self.critical_burst, 1) if critical else (self.rate, self.burst, 0)
+        with self._lock:
+            bucket = self._bucket(source, time.monotonic())
+            if rate:
+                # A batch larger than the bucket is admitted once the bucket is full
+                missing = min(cost, burst) - bucket[tier]
+                if missing > 0:
+                    return missing / rate
+                bucket[tier] -= min(cost, burst)
+            if critical:
+                bucket[0] = max(0.0, bucket[0] - cost)
+        return 0
+
+
+class AdmissionQueue:
+    """Bounded number of requests being processed at once.
+
+    Informational requests are admitted while fewer than `capacity` minus the
+    `reserve` share are in progress and are shed at once otherwise; critical
+    requests may use the whole capacity and wait up to `wait` seconds for a
+    slot. A capacity of 0 disables the bound.
+    """
+
+    def __init__(self, capacity, reserve=0.25, wait=0.5):
+        self.capacity = capacity
+        self.info_capacity = max(1, capacity - int(capacity * reserve))
+        self.wait = wait
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def enter(self, critical):
+        """Claim a slot; False if the request should be shed"""
+        if not self.capacity:
+            return True
+        limit = self.capacity if critical else self.info_capacity
+        with self._cond:
+            if critical and self.in_flight >= limit:
+                self._cond.wait_for(lambda: self.in_flight < limit, timeout=self.wait)
+            if self.in_flight >= limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        if not self.capacity:
+            return
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
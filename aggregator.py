@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Incremental Trade Aggregator
+Running positions, average entry, realized PnL and hourly/daily rollups, updated per event
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from trade_store import to_number
+
+logger = logging.getLogger(__name__)
+
+LONG_SIDES = ('LONG', 'BUY')
+SHORT_SIDES = ('SHORT', 'SELL')
+
+
+def empty_rollup():
+    return {
+        'events': 0,
+        'opens': 0,
+        'closes': 0,
+        'wins': 0,
+        'losses': 0,
+        'realized_pnl': 0.0,
+        'symbols': {}
+    }
+
+
+def merge_rollup(total, rollup):
+    """Add `rollup` into `total` in place"""
+    for key in ('events', 'opens', 'closes', 'wins', 'losses', 'realized_pnl'):
+        total[key] += rollup[key]
+    for symbol, pnl in rollup['symbols'].items():
+        total['symbols'][symbol] = total['symbols'].get(symbol, 0.0) + pnl
+    return total
+
+
+def position_side(side):
+    side = (side or '').upper()
+    if side in LONG_SIDES:
+        return 'LONG'
+    if side in SHORT_SIDES:
+        return 'SHORT'
+    return None
+
+
+class TradeAggregator:
+    """Keeps derived trading state up to date as events are ingested.
+
+    State is a pure function of the trade store rows applied in id order, so it
+    is persisted as a snapshot tagged with the last applied row id and restored
+    by loading the snapshot and replaying only newer rows. The snapshot also
+    carries the store generation: once reindex.py replaces rows, the state is
+    rebuilt from the store rather than caught up, both on load and in the live
+    listener, and a stale state is never saved over the snapshot.
+
+    Rollups are kept per hour, so a time-window query sums at most a few hundred
+    buckets and is accurate to the hour; per-day rollups are merged from them.
+    """
+
+    def __init__(self, snapshot_file=None, snapshot_interval=30):
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+        self._store = None
+        self._reset()
+
+    def _reset(self):
+        self.last_id = 0
+        self.generation = 0
+        self.positions = {}     # "SYMBOL SIDE" -> {symbol, side, quantity, avg_entry, opened_at}
+        self.hours = {}         # "YYYY-MM-DDTHH" -> rollup
+
+    def load(self, store):
+        """Restore from the snapshot, then replay store rows newer than it"""
+        self._store = store
+        with self._lock:
+            if self.snapshot_file and self.snapshot_file.exists():
+                try:
+                    with open(self.snapshot_file) as f:
+                        state = json.load(f)
+                    self.last_id = state['last_id']
+                    self.generation = state.get('generation', 0)
+                    self.positions = state['positions']
+                    self.hours = state['hours']
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Ignoring unreadable aggregate snapshot: {e}")
+                    self._reset()
+            replayed = self._catch_up(store)
+
+        if replayed:
+            logger.info(f"Replayed {replayed} trade events into aggregates")
+            self.save_snapshot()
+        return replayed
+
+    def _catch_up(self, store):
+        """Replay store rows newer than the state, from scratch if the store
+        generation changed; the caller holds the lock"""
+        generation = store.generation()
+        if generation != self.generation or self.last_id > store.last_id():
+            # Rows were replaced or the store was rebuilt; ids no longer match the state
+            logger.info("Trade store changed under the aggregates, rebuilding")
+            self._reset()
+            self.generation = generation
+
+        replayed = 0
+        while True:
+            rows = store.after(self.last_id)
+            if not rows:
+                break
+            for row in rows:
+                self._apply(row)
+            replayed += len(rows)
+        return replayed
+
+    def apply_many(self, events):
+        """Journal listener: apply a durable batch of events"""
+        with self._lock:
+            if self._store is not None and self._store.generation() != self.generation:
+                # reindex.py replaced rows: rebuild from the store, which already holds this batch
+                self._catch_up(self._store)
+            else:
+                for event in events:
+                    self._apply(event)
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.save_snapshot()
+
+    def _apply(self, event):
+        if event.get('id'):
+            if event['id'] <= self.last_id:
+                return
+            self.last_id = event['id']
+
+        bucket = self.hours.setdefault(event['timestamp'][:10] + 'T' + event['timestamp'][11:13], empty_rollup())
+        bucket['events'] += 1
+
+        action = (event.get('action') or '').upper()
+        symbol = event.get('symbol')
+        if not symbol or action not in ('OPEN', 'CLOSE'):
+            return
+
+        side = position_side(event.get('side'))
+        price = to_number(event.get('price'))
+        quantity = to_number(event.get('quantity'))
+
+        if action == 'OPEN':
+            bucket['opens'] += 1
+            if side is None or not quantity:
+                return
+            key = f"{symbol} {side}"
+            position = self.positions.get(key)
+            if position is None:
+                self.positions[key] = {
+                    'symbol': symbol,
+                    'side': side,
+                    'quantity': quantity,
+                    'avg_entry': price,
+                    'opened_at': event['timestamp']
+                }
+            else:
+                total = position['quantity'] + quantity
+                if price is not None and position['avg_entry'] is not None:
+                    position['avg_entry'] = (position['avg_entry'] * position['quantity'] + price * quantity) / total
+                position['quantity'] = total
+            return
+
+        bucket['closes'] += 1
+        key = self._find_position(symbol, side)
+        position = self.positions.get(key) if key else None
+
+        pnl = to_number(event.get('pnl'))
+        if position is not None:
+            closed = min(quantity, position['quantity']) if quantity else position['quantity']
+            if pnl is None and price is not None and position['avg_entry'] is not None:
+                direction = 1 if position['side'] == 'LONG' else -1
+                pnl = (price - position['avg_entry']) * closed * direction
+            position['quantity'] -= closed
+            if position['quantity'] <= 1e-12:
+                del self.positions[key]
+
+        if pnl is not None:
+            bucket['realized_pnl'] += pnl
+            bucket['symbols'][symbol] = bucket['symbols'].get(symbol, 0.0) + pnl
+            if pnl > 0:
+                bucket['wins'] += 1
+            elif pnl < 0:
+                bucket['losses'] += 1
+
+    def _find_position(self, symbol, side):
+        if side:
+            key = f"{symbol} {side}"
+            return key if key in self.positions else None
+        # CLOSE without a side: only unambiguous if one side is open
+        keys = [key for key, p in self.positions.items() if p['symbol'] == symbol]
+        return keys[0] if len(keys) == 1 else None
+
+    def save_snapshot(self):
+        """Persist the current state atomically"""
+        if not self.snapshot_file:
+            return
+        with self._lock:
+            if self._store is not None and self._store.generation() != self.generation:
+                # Rows were replaced since the state was built; leave the snapshot to the next load
+                return
+            state = json.dumps({
+                'last_id': self.last_id,
+                'generation': self.generation,
+                'positions': self.positions,
+                'hours': self.hours,
+                'updated_at': datetime.now().isoformat()
+            })
+        self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(state)
+        os.replace(tmp, self.snapshot_file)
+        self._last_snapshot = time.monotonic()
+
+    def open_positions(self):
+        with self._lock:
+            return [dict(p) for _, p in sorted(self.positions.items())]
+
+    def rollup_since(self, since):
+        """Aggregate every hourly bucket from the one containing `since` to now"""
+        start = since.strftime('%Y-%m-%dT%H')
+        total = empty_rollup()
+        with self._lock:
+            for hour, rollup in self.hours.items():
+                if hour >= start:
+                    merge_rollup(total, rollup)
+        return total
+
+    def daily(self, since=None):
+        """Per-day rollups merged from the hourly buckets, oldest first"""
+        start = since.strftime('%Y-%m-%dT%H') if since else ''
+        days = {}
+        with self._lock:
+            for hour, rollup in self.hours.items():
+                if hour >= start:
+                    merge_rollup(days.setdefault(hour[:10], empty_rollup()), rollup)
+        return dict(sorted(days.items()))
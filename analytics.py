@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Trade Performance Analytics
+Column arrays (NumPy) of every fill in the trade store, with vectorized equity
+curve, drawdown, win/loss, holding time, per-symbol/per-hour and fee/leverage reports
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Raw fill columns, then the ones derived by fifo_match
+COLUMNS = ('ts', 'action', 'side', 'symbol', 'price', 'quantity', 'pnl', 'fee', 'leverage',
+           'hour', 'notional', 'realized', 'hold', 'lot_end', 'matched')
+
+EQUITY_POINTS = 50
+
+
+def empty_columns():
+    columns = {name: np.empty(0) for name in COLUMNS}
+    columns.update(ts=np.empty(0, np.int64), action=np.empty(0, np.int8),
+                   side=np.empty(0, np.int8), symbol=np.empty(0, np.int32), hour=np.empty(0, np.int8))
+    return columns
+
+
+def position_quantities(columns):
+    """(position key, opened quantity, closed quantity) per row.
+
+    A position is a symbol and side; fills without a side, price or quantity
+    cannot be matched and count as zero quantity.
+    """
+    side = columns['side'].astype(np.int64)
+    key = columns['symbol'].astype(np.int64) * 3 + side + 1
+    quantity = columns['quantity']
+    matchable = np.isfinite(columns['price']) & np.isfinite(quantity) & (quantity > 0) & (side != 0)
+    opened = np.where(matchable & (columns['action'] == 1), quantity, 0.0)
+    closed = np.where(matchable & (columns['action'] == -1), quantity, 0.0)
+    return key, opened, closed
+
+
+def grouped_cummax(key, values):
+    """Running maximum of `values` restarting at each run of equal `key` (sorted).
+    Values are replaced by their ranks so group and value share one exact int64"""
+    n = len(values)
+    order = np.argsort(values, kind='stable')
+    rank = np.empty(n, np.int64)
+    rank[order] = np.arange(n)
+    combined = np.maximum.accumulate(key * n + rank)
+    return values[order[combined - key * n]]
+
+
+def fifo_match(columns, opened_before=None, closed_before=None):
+    """Realized PnL and holding time of every close, matched FIFO against earlier
+    opens of the same position, plus each row's position-cumulative opened
+    quantity (`lot_end`) and the quantity of each close that found an open lot
+    (`matched`).
+
+    Rows are grouped by position and laid out on one axis of cumulative opened
+    quantity. A close covering [a, b) of its position's closed quantity
+    consumed the opens over the same interval, so its cost basis and mean entry
+    time are differences of the running integrals of open price and open time,
+    evaluated with searchsorted. Closed quantity beyond what was open at the
+    time matches nothing and is not carried over to later opens. PnL reported
+    by the sender wins; the FIFO value fills in closes that did not report one.
+
+    For an incremental catch-up `columns` holds only the still-open lots and the
+    new fills; opened_before/closed_before give, per row, how much its position
+    had opened before the first of those rows and closed (matched) before them.
+    """
+    n = len(columns['ts'])
+    realized = np.where(columns['action'] == -1, columns['pnl'], np.nan)
+    hold = np.full(n, np.nan)
+    lot_end = np.zeros(n)
+    matched_qty = np.zeros(n)
+    if not n:
+        return realized, hold, lot_end, matched_qty
+
+    key, open_qty, close_qty = position_quantities(columns)
+    order = np.argsort(key, kind='stable')          # rows are already in time order
+    key, open_qty, close_qty = key[order], open_qty[order], close_qty[order]
+    side = columns['side'][order].astype(np.float64)
+    price = columns['price'][order]
+    ts = (columns['ts'][order] - columns['ts'].min()).astype(np.float64)
+
+    open_price = np.where(open_qty > 0, price, 0.0)
+    opened = np.cumsum(open_qty)
+    open_cost = np.cumsum(open_qty * open_price)
+    open_time = np.cumsum(open_qty * ts)
+    opened0 = np.concatenate(([0.0], opened))
+    closed0 = np.concatenate(([0.0], np.cumsum(close_qty)))
+
+    start = np.searchsorted(key, key, side='left')
+    opened_offset = np.zeros(n) if opened_before is None else opened_before[order]
+    closed_offset = np.zeros(n) if closed_before is None else closed_before[order]
+    # Position coordinates: opened strictly before the row, closed before/through it
+    available = opened_offset + opened0[:n] - opened0[start]
+    closed = closed_offset + closed0[:n] - closed0[start]
+    # Unmatched closed quantity so far: the running excess of closes over opens
+    excess = np.where(close_qty > 0, np.maximum(closed + close_qty - available, 0.0), 0.0)
+    if excess.any():
+        excess = grouped_cummax(key, excess)
+        closed = closed - np.where(np.arange(n) > start, excess[np.arange(n) - 1], 0.0)
+    shift = opened0[start] - opened_offset
+    lo = shift + np.minimum(closed, available)
+    hi = shift + np.minimum(closed + close_qty, available)
+    matched = hi - lo
+
+    def integral(cumulative, value, x):
+        # Integral of `value` over opened quantity [0, x): the first open reaching x is partly used
+        i = np.minimum(np.searchsorted(opened, x, side='left'), n - 1)
+        return cumulative[i] - (opened[i] - x) * value[i]
+
+    ok = matched > 1e-12
+    cost = integral(open_cost, open_price, hi) - integral(open_cost, open_price, lo)
+    entered = integral(open_time, ts, hi) - integral(open_time, ts, lo)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fifo_pnl = np.where(ok, side * (matched * price - cost), np.nan)
+        fifo_hold = np.where(ok, ts - entered / matched, np.nan)
+
+    fill = np.isnan(realized[order])
+    realized[order[fill]] = fifo_pnl[fill]
+    hold[order] = fifo_hold
+    lot_end[order] = available + open_qty
+    matched_qty[order] = matched
+    return realized, hold, lot_end, matched_qty
+
+
+class TradeAnalytics:
+    """Column arrays of all fills, kept in time order and refreshed incrementally.
+
+    Like the aggregator, the arrays are a function of the trade store rows up to
+    `last_id`: they are persisted as an .npz snapshot and caught up by loading
+    only newer rows, or rebuilt when the store generation in the snapshot is
+    out of date. New fills later than everything loaded (the live case) are
+    matched against the still-open lots only; anything else re-runs the match
+    over the whole history. Reports are computed on a slice found by binary
+    search on the timestamp column and cached per (generation, slice), so
+    repeated windows containing the same fills cost nothing until new fills arrive.
+    """
+
+    def __init__(self, cache_file=None, snapshot_interval=300, max_reports=64):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.snapshot_interval = snapshot_interval
+        self.max_reports = max_reports
+        self._lock = threading.Lock()
+        self._reports = OrderedDict()
+        self._loaded_snapshot = False
+        self.generation = 0
+        self._reset()
+
+    def _reset(self):
+        self.last_id = 0
+        self.store_generation = 0
+        self.symbols = []
+        self.columns = empty_columns()
+        self._reports.clear()
+
+    def __len__(self):
+        return len(self.columns['ts'])
+
+    def load(self, store):
+        """Restore the snapshot (once), then append store rows newer than it"""
+        with self._lock:
+            if not self._loaded_snapshot and self.cache_file and self.cache_file.exists():
+                self._load_snapshot()
+            self._loaded_snapshot = True
+            store_generation = store.generation()
+            if store_generation != self.store_generation or self.last_id > store.last_id():
+                # Rows were replaced or the store was rebuilt; ids no longer match the arrays
+                logger.info("Trade store changed under the analytics arrays, rebuilding")
+                self._reset()
+                self.store_generation = store_generation
+                self.generation += 1
+
+            rows = store.fills_after(self.last_id)
+            if rows:
+                self._append(rows)
+
+        if rows and self._snapshot_due():
+            self.save_snapshot()
+        return len(rows)
+
+    def _load_snapshot(self):
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as data:
+                columns = {name: data[name] for name in COLUMNS}
+                self.symbols = data['symbols'].tolist()
+                self.last_id = int(data['last_id'])
+                self.store_generation = int(data['store_generation']) if 'store_generation' in data.files else 0
+            self.columns = columns
+            self.generation += 1
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable analytics snapshot: {e}")
+            self._reset()
+
+    def _append(self, rows):
+        ids, stamps, actions, symbols, sides, prices, quantities, pnls, fees, leverages = zip(*rows)
+
+        codes = {symbol: i for i, symbol in enumerate(self.symbols)}
+        for symbol in set(symbols) - codes.keys():
+            codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+        new = {
+            'ts': np.array(stamps, dtype=np.int64),
+            'action': np.where(np.array(actions, dtype=np.int8) == 1, 1, -1).astype(np.int8),
+            'side': np.array(sides, dtype=np.int8),
+            'symbol': np.array(list(map(codes.__getitem__, symbols)), dtype=np.int32),
+            # NULL becomes NaN
+            'price': np.array(prices, dtype=np.float64), 'quantity': np.array(quantities, dtype=np.float64),
+            'pnl': np.array(pnls, dtype=np.float64), 'fee': np.array(fees, dtype=np.float64),
+            'leverage': np.array(leverages, dtype=np.float64),
+        }
+        # Precomputed once here rather than in every report
+        new['fee'] = np.nan_to_num(new['fee'])
+        new['hour'] = (new['ts'] // 3600 % 24).astype(np.int8)
+        new['notional'] = np.nan_to_num(new['price'] * new['quantity'])
+        old = self.columns
+        if len(old['ts']) and np.all(np.diff(new['ts']) >= 0) and new['ts'][0] >= old['ts'][-1]:
+            new['realized'], new['hold'], new['lot_end'], new['matched'] = self._match_new(old, new)
+            columns = {name: np.concatenate((old[name], new[name])) for name in COLUMNS}
+        else:
+            columns = {name: np.concatenate((old[name], new[name])) for name in new}
+            order = np.argsort(columns['ts'], kind='stable')
+            columns = {name: values[order] for name, values in columns.items()}
+            columns['realized'], columns['hold'], columns['lot_end'], columns['matched'] = fifo_match(columns)
+
+        self.columns = columns
+        self.last_id = int(ids[-1])
+        self.generation += 1
+        self._reports.clear()
+
+    def _match_new(self, old, new):
+        """fifo_match for fills that follow every loaded one: only the opens of
+        their positions that earlier closes have not fully consumed take part"""
+        old_key, old_opened, _ = position_quantities(old)
+        new_key = position_quantities(new)[0]
+        size = max(old_key.max(), new_key.max()) + 1
+        opened = np.bincount(old_key, weights=old_opened, minlength=size)
+        # Only closed quantity that consumed open lots; an unmatched excess does not
+        closed = np.bincount(old_key, weights=old['matched'], minlength=size)
+
+        lots = np.flatnonzero((old_opened > 0) & (old['lot_end'] > closed[old_key]) & np.isin(old_key, new_key))
+        # Per position: quantity opened before its first open lot (all of it when none is left)
+        base = opened.copy()
+        np.minimum.at(base, old_key[lots], old['lot_end'][lots] - old_opened[lots])
+
+        subset = {name: np.concatenate((old[name][lots], new[name])) for name in new}
+        key = np.concatenate((old_key[lots], new_key))
+        return tuple(values[len(lots):] for values in fifo_match(subset, base[key], closed[key]))
+
+    def _snapshot_due(self):
+        if not self.cache_file:
+            return False
+        try:
+            return time.time() - self.cache_file.stat().st_mtime >= self.snapshot_interval
+        except OSError:
+            return True
+
+    def save_snapshot(self):
+        """Persist the columns atomically"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            arrays = dict(self.columns, symbols=np.array(self.symbols, dtype=str), last_id=self.last_id,
+                          store_generation=self.store_generation)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.cache_file)
+
+    def report(self, since=None, until=None):
+        """Report for fills with since <= timestamp < until (datetimes, either open-ended)"""
+        with self._lock:
+            ts = self.columns['ts']
+            lo = np.searchsorted(ts, np.datetime64(since, 's').astype(np.int64)) if since else 0
+            hi = np.searchsorted(ts, np.datetime64(until, 's').astype(np.int64)) if until else len(ts)
+            key = (self.generation, int(lo), int(hi))
+            report = self._reports.get(key)
+            if report is None:
+                start = time.perf_counter()
+                report = self._report(lo, hi)
+                report['compute_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                self._reports[key] = report
+                while len(self._reports) > self.max_reports:
+                    self._reports.popitem(last=False)
+            else:
+                self._reports.move_to_end(key)
+            return report
+
+    def _report(self, lo, hi):
+        c = {name: values[lo:hi] for name, values in self.columns.items()}
+        ts = c['ts']
+        opens = (c['action'] == 1).astype(np.int64)
+        size = len(self.symbols)
+
+        # Equity curve and drawdown over closes with a known PnL, in time order
+        decided = np.isfinite(c['realized'])
+        pnl = c['realized'][decided]
+        pnl_ts = ts[decided]
+        equity = np.cumsum(pnl)
+        peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        drawdown = peak - equity
+        trough = int(np.argmax(drawdown)) if len(drawdown) else 0
+        max_drawdown = float(drawdown[trough]) if len(drawdown) else 0.0
+        peak_at = None
+        if max_drawdown > 0:
+            # The last fill at the peak, or the window start when equity never rose above zero first
+            at_peak = np.flatnonzero(equity[:trough + 1] == peak[trough])
+            peak_at = iso(pnl_ts[at_peak[-1]]) if len(at_peak) else iso(ts[0])
+        points = np.unique(np.linspace(0, len(equity) - 1, min(EQUITY_POINTS, len(equity))).astype(np.int64))
+
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+        avg_win = float(wins.mean()) if len(wins) else None
+        avg_loss = float(losses.mean()) if len(losses) else None
+        hold = c['hold'][np.isfinite(c['hold'])]
+
+        # Per symbol and per hour of day: several counts per bincount over a combined index
+        outcome = np.sign(pnl).astype(np.int64) + 1          # loss, flat, win
+        symbol = c['symbol']
+        symbol_decided = symbol[decided]
+        by_action = np.bincount(symbol * 2 + opens, minlength=2 * size).reshape(size, 2)
+        by_outcome = np.bincount(symbol_decided * 3 + outcome, minlength=3 * size).reshape(size, 3)
+        symbol_pnl = np.bincount(symbol_decided, weights=pnl, minlength=size)
+        symbol_volume = np.bincount(symbol, weights=c['notional'], minlength=size)
+        symbol_fees = np.bincount(symbol, weights=c['fee'], minlength=size)
+        hour = c['hour'].astype(np.int64)
+        hour_decided = hour[decided]
+        hour_action = np.bincount(hour * 2 + opens, minlength=48).reshape(24, 2)
+        hour_outcome = np.bincount(hour_decided * 3 + outcome, minlength=72).reshape(24, 3)
+        hour_pnl = np.bincount(hour_decided, weights=pnl, minlength=24)
+
+        # Leverage of opens that reported one, weighted by notional
+        leveraged = np.flatnonzero(opens & np.isfinite(c['leverage']))
+        leverage = c['leverage'][leveraged]
+        leveraged_notional = c['notional'][leveraged]
+        exposure = float(leveraged_notional @ leverage)
+        open_notional = float(leveraged_notional.sum())
+
+        return {
+            'since': iso(ts[0]) if len(ts) else None,
+            'until': iso(ts[-1]) if len(ts) else None,
+            'fills': int(len(ts)),
+            'opens': int(opens.sum()),
+            'closes': int(len(ts) - opens.sum()),
+            'realized_pnl': float(pnl.sum()),
+            'wins': int(len(wins)),
+            'losses': int(len(losses)),
+            'win_rate': len(wins) / (len(wins) + len(losses)) if len(wins) + len(losses) else None,
+            'avg_win': avg_win,
+            'avg_loss': avg_loss,
+            'win_loss_ratio': avg_win / -avg_loss if avg_win is not None and avg_loss else None,
+            'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else None,
+            'max_drawdown': max_drawdown,
+            'max_drawdown_peak': peak_at,
+            'max_drawdown_trough': iso(pnl_ts[trough]) if max_drawdown > 0 else None,
+            'avg_holding_seconds': float(hold.mean()) if len(hold) else None,
+            'median_holding_seconds': float(np.median(hold)) if len(hold) else None,
+            'volume': float(c['notional'].sum()),
+            'fees': float(c['fee'].sum()),
+            'avg_leverage': exposure / open_notional if open_notional else None,
+            'max_leverage': float(leverage.max()) if len(leverage) else None,
+            'leveraged_exposure': exposure,
+            'equity_curve': [[iso(pnl_ts[i]), float(equity[i])] for i in points],
+            'symbols': sorted((
+                {
+                    'symbol': self.symbols[i],
+                    'fills': int(by_action[i].sum()),
+                    'opens': int(by_action[i, 1]),
+                    'closes': int(by_action[i, 0]),
+                    'realized_pnl': float(symbol_pnl[i]),
+                    'wins': int(by_outcome[i, 2]),
+                    'losses': int(by_outcome[i, 0]),
+                    'volume': float(symbol_volume[i]),
+                    'fees': float(symbol_fees[i]),
+                } for i in np.flatnonzero(by_action.sum(axis=1))
+            ), key=lambda row: row['realized_pnl'], reverse=True),
+            'hours': [
+                {
+                    'hour': int(h),
+                    'fills': int(hour_action[h].sum()),
+                    'closes': int(hour_action[h, 0]),
+                    'realized_pnl': float(hour_pnl[h]),
+                    'wins': int(hour_outcome[h, 2]),
+                    'losses': int(hour_outcome[h, 0]),
+                } for h in np.flatnonzero(hour_action.sum(axis=1))
+            ],
+        }
+
+
+def iso(seconds):
+    return str(np.datetime64(int(seconds), 's'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the performance report for a time window as JSON')
+    parser.add_argument('--db', default=os.environ.get('TRADE_DB') or str(Path(__file__).parent / 'trades.db'))
+    parser.add_argument('--cache', default=str(Path(__file__).parent / '.cache' / 'analytics.npz'))
+    parser.add_argument('--since', type=datetime.fromisoformat, help='ISO date or time (default: all history)')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='ISO date or time, exclusive')
+    args = parser.parse_args()
+
+    from trade_store import TradeStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    analytics = TradeAnalytics(args.cache)
+    analytics.load(TradeStore(args.db))
+    print(json.dumps(analytics.report(args.since, args.until), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Analytics Benchmark
+Fills a scratch trade store with synthetic open/close pairs and times the
+analytics report: cold load from SQLite, snapshot load, full-history and
+windowed reports, a cached repeat and an incremental catch-up
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from analytics import TradeAnalytics
+from trade_store import TradeStore, INSERT_SQL
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT', 'XRP/USDT', 'DOGE/USDT']
+
+
+def fill_rows(count, start, rng):
+    """event_row tuples for count/2 round trips spread over a year; a third report no pnl"""
+    step = 365 * 86400 / (count / 2)
+    rows = []
+    for i in range(count // 2):
+        opened = start + timedelta(seconds=i * step)
+        closed = opened + timedelta(seconds=rng.uniform(60, 6 * 3600))
+        symbol = rng.choice(SYMBOLS)
+        side = rng.choice(['LONG', 'SHORT'])
+        price = rng.uniform(10, 60000)
+        quantity = round(rng.uniform(0.01, 2), 3)
+        exit_price = price * rng.uniform(0.97, 1.03)
+        pnl = (exit_price - price) * quantity * (1 if side == 'LONG' else -1)
+        rows.append((opened.isoformat(), opened.isoformat()[:10], 'OPEN', symbol, side, price, quantity,
+                     f"o{i}", None, None, round(price * quantity * 0.0004, 6), rng.choice([None, 5, 10, 20])))
+        rows.append((closed.isoformat(), closed.isoformat()[:10], 'CLOSE', symbol, side, exit_price, quantity,
+                     f"c{i}", None if i % 3 == 0 else pnl, None, round(exit_price * quantity * 0.0004, 6), None))
+    return rows
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label}: {seconds * 1000:.1f} ms", file=sys.stderr)
+    return {'run': label, 'ms': round(seconds * 1000, 1)}, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fills', type=int, default=3_000_000)
+    parser.add_argument('--new', type=int, default=1000, help='fills appended before the catch-up run')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    start = datetime(2025, 1, 1)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-analytics-') as tmp:
+        store = TradeStore(Path(tmp) / 'trades.db')
+        conn = store._conn()
+        with conn:
+            conn.executemany(INSERT_SQL, fill_rows(args.fills, start, rng))
+        snapshot = Path(tmp) / 'analytics.npz'
+        end = start + timedelta(days=365)
+
+        analytics = TradeAnalytics(snapshot)
+        run, _ = timed('cold load (SQLite -> arrays)', lambda: analytics.load(store))
+        results.append(run)
+        run, report = timed('report: full history', analytics.report)
+        results.append(run)
+        run, _ = timed('report: full history (cached)', analytics.report)
+        results.append(run)
+        run, _ = timed('report: last 7 days', lambda: analytics.report(since=end - timedelta(days=7)))
+        results.append(run)
+
+        warm = TradeAnalytics(snapshot)
+        run, _ = timed('snapshot load', lambda: warm.load(store))
+        results.append(run)
+
+        with conn:
+            # The journal appends live fills in time order
+            conn.executemany(INSERT_SQL, sorted(fill_rows(args.new, end + timedelta(days=1), rng)))
+        run, _ = timed(f'catch-up ({args.new} new fills) + report', lambda: (warm.load(store), warm.report()))
+        results.append(run)
+
+    print(json.dumps({
+        'fills': args.fills,
+        'realized_pnl': round(report['realized_pnl'], 2),
+        'max_drawdown': round(report['max_drawdown'], 2),
+        'results': results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bot Command Latency Benchmark
+Compares cold CLI invocations (fresh interpreter per command) against the warm
+resident daemon, both through the CLI thin client and as a raw socket round trip
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+HANDLER = SCRIPT_DIR / 'command_handler.py'
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(samples[len(samples) // 2], 1),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+    }
+
+
+def time_cli(command, env, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(HANDLER), command], env=env,
+                       capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def time_socket(command, runs):
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import command_handler
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        command_handler.run_via_daemon(command, [])
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('commands', nargs='*', default=['recent', 'status', 'pdf-list'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench-commands-') as tmp:
+        socket_path = Path(tmp) / 'command.sock'
+        env = os.environ.copy()
+        env['COMMAND_SOCKET'] = str(socket_path)
+
+        results = {command: {'cold_cli': time_cli(command, env, args.runs)} for command in args.commands}
+
+        daemon = subprocess.Popen([sys.executable, str(HANDLER), '--serve'], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 30
+            while not socket_path.exists():
+                if time.monotonic() > deadline or daemon.poll() is not None:
+                    raise RuntimeError('command daemon did not start')
+                time.sleep(0.05)
+
+            os.environ['COMMAND_SOCKET'] = str(socket_path)
+            for command in args.commands:
+                results[command]['warm_cli'] = time_cli(command, env, args.runs)
+                results[command]['warm_socket'] = time_socket(command, args.runs)
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Webhook Ingestion Benchmark
+Starts trading-webhook.py against a temporary local git repo (optionally with a
+local bare repo as its "origin") and replays synthetic fill streams, reporting
+req/s, fills/s, p50/p95/p99 ack latency, commits per minute and bytes written
+as JSON. Runs fully offline.
+
+    python3 bench-ingest.py                          # one scenario from the flags
+    python3 bench-ingest.py --batch 100 --signed     # signed NDJSON batches to /batch
+    python3 bench-ingest.py --rate 200 --remote      # paced at 200 req/s, pushing to a bare repo
+    python3 bench-ingest.py --suite -o bench.json    # standard matrix, saved for regression tracking
+    python3 bench-ingest.py --remote --outage 5      # origin unreachable for the first 5s of the run
+    python3 bench-ingest.py --rate 20 --flood 8 --admission   # fills while 8 clients flood alerts
+
+Admission control is disabled unless --admission is given; the rate limits then
+follow RATE_LIMIT_PER_SOURCE and RATE_LIMIT_CRITICAL_PER_SOURCE from the environment.
+
+Compare against another version of the server with --script, e.g.
+    git show <rev>:trading-webhook.py > /tmp/old-webhook.py
+    python3 bench-ingest.py --script /tmp/old-webhook.py
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import shutil
+import socket
+import hashlib
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+BENCH_SECRET = 'bench-secret'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def git(workdir, *args):
+    return subprocess.run(['git', *args], cwd=workdir, capture_output=True, check=True, text=True).stdout
+
+
+def make_repo(workdir, script, remote=False):
+    """Create a throwaway git repo containing the server and its modules"""
+    for module in SCRIPT_DIR.glob('*.py'):
+        shutil.copy(module, workdir)
+    shutil.copy(script, workdir / 'trading-webhook.py')
+    (workdir / 'logs').mkdir()
+    (workdir / 'logs' / '.gitkeep').touch()
+    (workdir / '.gitignore').write_text('*.db\n*.db-*\n.cache/\n__pycache__/\nwebhook.log\n.git_push.lock\n')
+
+    git(workdir, 'init', '-q', '-b', 'main')
+    git(workdir, 'config', 'user.email', 'bench@localhost')
+    git(workdir, 'config', 'user.name', 'bench')
+    git(workdir, 'add', '-A')
+    git(workdir, 'commit', '-q', '-m', 'bench baseline')
+
+    if remote:
+        bare = workdir.parent / 'remote.git'
+        subprocess.run(['git', 'init', '-q', '--bare', '-b', 'main', str(bare)], capture_output=True, check=True)
+        git(workdir, 'remote', 'add', 'origin', str(bare))
+        git(workdir, 'push', '-q', 'origin', 'main')
+
+
+def start_server(workdir, port, extra_env=None):
+    env = os.environ.copy()
+    env.update({
+        'WEBHOOK_PORT': str(port),
+        'LOGS_DIR': str(workdir / 'logs'),
+        'WEBHOOK_SECRET': '',
+        'GITHUB_TOKEN': '',
+    })
+    env.update(extra_env or {})
+    proc = subprocess.Popen(
+        [sys.executable, 'trading-webhook.py'],
+        cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            get_json(port, '/health')
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('server did not start')
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path)
+        return json.loads(conn.getresponse().read() or b'{}')
+    finally:
+        conn.close()
+
+
+def wait_for_sync(port, timeout):
+    """Wait until the sync worker has committed and pushed everything; returns seconds waited"""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            status = get_json(port, '/status')
+            if status.get('pending_entries', 0) == 0 and not status.get('unpushed_commits'):
+                break
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.1)
+    return time.monotonic() - start
+
+
+def fill(n):
+    return {
+        'action': 'open', 'symbol': 'BTC/USDT', 'side': 'long',
+        'price': 50000 + n, 'quantity': 0.1, 'order_id': f'bench-{n}'
+    }
+
+
+def alert(n):
+    return {'action': 'alert', 'symbol': 'BTC/USDT', 'message': f'flood {n}'}
+
+
+def run_flood(port, clients, stop):
+    """Informational alerts from `clients` connections, as fast as possible until `stop`
+    is set; returns the count of responses per status"""
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        n = 0
+        local = {}
+        while not stop.is_set():
+            body = json.dumps(alert(n)).encode()
+            n += 1
+            try:
+                conn.request('POST', '/', body=body, headers={'Content-Type': 'application/json'})
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except Exception:
+                conn.close()
+                status = 'disconnected'
+            local[status] = local.get(status, 0) + 1
+        conn.close()
+        with lock:
+            for status, count in local.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    return threads, statuses
+
+
+def run_load(port, total, concurrency, batch=1, signed=False, rate=None):
+    """Send `total` requests from `concurrency` keep-alive clients; returns latencies in ms.
+
+    With `rate` (requests/sec across all clients) request n is due at start + n/rate
+    and its latency is measured from that due time, so a stalled server shows up as
+    latency instead of silently lowering the offered load.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+    sent_bytes = [0]
+
+    def worker(begin):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        local_bytes = 0
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                break
+            if batch > 1:
+                path = '/batch'
+                body = '\n'.join(json.dumps(fill(n * batch + i)) for i in range(batch)).encode()
+            else:
+                path = '/'
+                body = json.dumps(fill(n)).encode()
+            headers = {'Content-Type': 'application/json'}
+            if signed:
+                headers['X-Webhook-Signature'] = hmac.new(BENCH_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+            start = time.perf_counter()
+            if rate:
+                due = begin + n / rate
+                if due > start:
+                    time.sleep(due - start)
+                start = due
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status != 200:
+                    raise RuntimeError(f'HTTP {resp.status}')
+            except Exception as e:
+                conn.close()
+                with lock:
+                    errors.append(str(e))
+                continue
+            local.append((time.perf_counter() - start) * 1000)
+            local_bytes += len(body)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            sent_bytes[0] += local_bytes
+
+    begin = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(begin,)) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - begin, sent_bytes[0]
+
+
+def take_offline(bare, seconds):
+    """Make the bare origin unreachable for `seconds` by moving it aside"""
+    offline = bare.with_name(bare.name + '.offline')
+    bare.rename(offline)
+    time.sleep(seconds)
+    offline.rename(bare)
+
+
+def logs_size(workdir):
+    return sum(f.stat().st_size for f in (workdir / 'logs').glob('*.log'))
+
+
+def run_scenario(name, script, requests, concurrency, batch=1, signed=False, rate=None,
+                 remote=False, durability='batch', sync_timeout=60, outage=0, flood=0, admission=False):
+    with tempfile.TemporaryDirectory(prefix='bench-ingest-') as tmp:
+        workdir = Path(tmp) / 'repo'
+        workdir.mkdir()
+        make_repo(workdir, script, remote)
+        base_commits = int(git(workdir, 'rev-list', '--count', 'HEAD'))
+
+        port = free_port()
+        env = {'JOURNAL_DURABILITY': durability}
+        if signed:
+            env['WEBHOOK_SECRET'] = BENCH_SECRET
+        if not admission:
+            env.update({'RATE_LIMIT_PER_SOURCE': '0', 'RATE_LIMIT_CRITICAL_PER_SOURCE': '0', 'ADMISSION_MAX_IN_FLIGHT': '0'})
+        if outage:
+            # Retry pushes quickly so the drain measures recovery, not the production backoff
+            env.update({'GIT_RETRY_SECONDS': '0.5', 'GIT_RETRY_MAX_SECONDS': '2'})
+        proc = start_server(workdir, port, env)
+        bare = workdir.parent / 'remote.git'
+        outage_thread = None
+        flood_stop = threading.Event()
+        flood_threads, flood_statuses = [], {}
+        try:
+            if outage:
+                outage_thread = threading.Thread(target=take_offline, args=(bare, outage))
+                outage_thread.start()
+            if flood:
+                flood_threads, flood_statuses = run_flood(port, flood, flood_stop)
+            latencies, errors, elapsed, sent_bytes = run_load(port, requests, concurrency, batch, signed, rate)
+            flood_stop.set()
+            for t in flood_threads:
+                t.join()
+            if outage_thread:
+                outage_thread.join()
+            drain = wait_for_sync(port, sync_timeout)
+            status = get_json(port, '/status')
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+        commits = int(git(workdir, 'rev-list', '--count', 'HEAD')) - base_commits
+        pushed = outbox = None
+        if remote:
+            pushed = int(git(bare, 'rev-list', '--count', 'main')) - base_commits
+            # Commits still missing from origin once it is back and the server has stopped
+            outbox = int(git(workdir, 'rev-list', '--count', 'HEAD', '--not', git(bare, 'rev-parse', 'main').strip()))
+            if outbox:
+                print(f"FAIL {name}: {outbox} commits never reached origin"
+                      f"{f' after the {outage:g}s outage' if outage else ''}", file=sys.stderr)
+        written = logs_size(workdir)
+
+    latencies.sort()
+    fills = len(latencies) * batch
+    return {
+        'scenario': name,
+        'requests': requests,
+        'concurrency': concurrency,
+        'batch': batch,
+        'signed': signed,
+        'target_rate': rate,
+        'remote': remote,
+        'outage_s': outage,
+        'admission': admission,
+        'flood_clients': flood,
+        'flood_responses': {str(status): count for status, count in sorted(flood_statuses.items(), key=str)},
+        'durability': durability,
+        'ok': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'elapsed_s': round(elapsed, 3),
+        'req_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'fills_per_s': round(fills / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'sync_drain_s': round(drain, 3),
+        'commits': commits,
+        'commits_per_min': round(commits / ((elapsed + drain) / 60), 1) if elapsed + drain else 0.0,
+        'pushed_commits': pushed,
+        'unpushed_commits': status.get('unpushed_commits'),
+        'outbox_after_stop': outbox,
+        'bytes_sent': sent_bytes,
+        'bytes_written': written,
+        'bytes_written_per_fill': round(written / fills, 1) if fills else 0.0,
+    }
+
+
+def suite(args):
+    """Standard matrix: single vs batch, unsigned vs signed, plus a paced run"""
+    batch = max(args.batch, 50)
+    batch_requests = max(1, args.requests // batch) * 4
+    return [
+        ('single', dict(requests=args.requests, batch=1, signed=False)),
+        ('single-signed', dict(requests=args.requests, batch=1, signed=True)),
+        (f'batch-{batch}', dict(requests=batch_requests, batch=batch, signed=False)),
+        (f'batch-{batch}-signed', dict(requests=batch_requests, batch=batch, signed=True)),
+        ('single-paced', dict(requests=args.requests, batch=1, signed=False, rate=args.rate or 100)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--script', default=str(SCRIPT_DIR / 'trading-webhook.py'),
+                        help='server script to benchmark (default: current trading-webhook.py)')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch', type=int, default=1, help='fills per request, sent to POST /batch when > 1')
+    parser.add_argument('--signed', action='store_true', help='run with WEBHOOK_SECRET and sign every body')
+    parser.add_argument('--rate', type=float, help='target requests/sec across all clients (default: as fast as possible)')
+    parser.add_argument('--remote', action='store_true', help='push to a local bare repo as origin')
+    parser.add_argument('--outage', type=float, default=0,
+                        help='with --remote: make origin unreachable for this many seconds from the start of the run')
+    parser.add_argument('--flood', type=int, default=0,
+                        help='extra clients flooding informational alerts during the run')
+    parser.add_argument('--admission', action='store_true',
+                        help='run with admission control (RATE_LIMIT_* rate limits, admission queue)')
+    parser.add_argument('--durability', default='batch', choices=('none', 'batch', 'event'))
+    parser.add_argument('--sync-timeout', type=float, default=60, help='seconds to wait for git sync to drain')
+    parser.add_argument('--suite', action='store_true', help='run the standard scenario matrix')
+    parser.add_argument('-o', '--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.suite:
+        scenarios = suite(args)
+    else:
+        name = f"{'batch-' + str(args.batch) if args.batch > 1 else 'single'}{'-signed' if args.signed else ''}"
+        scenarios = [(name, dict(requests=args.requests, batch=args.batch, signed=args.signed, rate=args.rate))]
+
+    results = []
+    for name, options in scenarios:
+        print(f"running {name}...", file=sys.stderr)
+        results.append(run_scenario(
+            name, args.script, concurrency=args.concurrency, remote=args.remote,
+            durability=args.durability, sync_timeout=args.sync_timeout,
+            outage=args.outage if args.remote else 0, flood=args.flood, admission=args.admission, **options
+        ))
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'script': args.script,
+        'revision': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                   capture_output=True, text=True).stdout.strip() or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    return 0 if not any(r['errors'] or r['outbox_after_stop'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+News Index Benchmark
+Generates daily news logs and compares /news-style queries answered by a full
+read of every file against the news index: initial build, reload from the
+journal, an incremental refresh after new lines, and time/keyword queries
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from news_index import NewsIndex, line_time
+
+HEADLINES = [
+    'Bitcoin ETF inflows hit a record as BTCUSDT tests resistance',
+    'Ethereum developers schedule the next upgrade; ETH funding turns positive',
+    'SOL/USDT rallies after network outage report is resolved',
+    'Regulator publishes stablecoin guidance, USDC supply grows',
+    '比特币突破新高，市场情绪转向贪婪',
+    '以太坊质押规模创新高',
+    'Exchange lists new perpetual contracts for DOGE and XRP',
+    'Macro: CPI print lower than expected, risk assets bid',
+]
+
+
+def write_day(path, day, lines, rng):
+    with open(path, 'w') as f:
+        for i in range(lines):
+            ts = day + timedelta(seconds=i * 86400 // lines)
+            f.write(f"[{ts:%Y-%m-%d %H:%M:%S}] {rng.choice(HEADLINES)} #{rng.randint(1, 10 ** 6)}\n")
+
+
+def scan(news_dir, since, keyword=None):
+    """What /news would cost without an index: read every file, filter each line"""
+    matches = []
+    for path in sorted(news_dir.glob('news-*.log')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                ts = line_time(line)
+                if ts is None or ts < since:
+                    continue
+                if keyword and keyword.lower() not in line.lower():
+                    continue
+                matches.append(line.rstrip())
+    return len(matches), matches[-10:]
+
+
+def timed(label, fn, results):
+    start = time.perf_counter()
+    value = fn()
+    ms = (time.perf_counter() - start) * 1000
+    print(f"{label}: {ms:.1f} ms", file=sys.stderr)
+    results.append({'run': label, 'ms': round(ms, 1)})
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--lines', type=int, default=2000, help='news lines per day')
+    parser.add_argument('--new', type=int, default=50, help='lines appended before the incremental refresh')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-news-') as tmp:
+        news_dir = Path(tmp) / 'logs'
+        news_dir.mkdir()
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for n in range(args.days):
+            day = today - timedelta(days=args.days - 1 - n)
+            write_day(news_dir / f"news-{day:%Y-%m-%d}.log", day, args.lines, rng)
+        index_file = Path(tmp) / 'news_index.jsonl'
+        now = datetime.now()
+
+        index = NewsIndex(news_dir, index_file)
+        timed('index build', index.refresh, results)
+        timed('index reload from journal', lambda: NewsIndex(news_dir, index_file), results)
+
+        queries = [('24h', now - timedelta(hours=24), None), ('7d BTC', now - timedelta(days=7), 'BTC'),
+                   ('30d 以太坊', now - timedelta(days=30), '以太坊')]
+        for label, since, keyword in queries:
+            expected = timed(f'scan: {label}', lambda: scan(news_dir, since, keyword), results)
+            keywords = [keyword] if keyword else []
+            total, items = timed(f'index: {label}', lambda: index.search(since, keywords=keywords), results)
+            if total != expected[0] or [text for _, text in items] != expected[1]:
+                print(f"MISMATCH for {label}: {total} vs {expected[0]}", file=sys.stderr)
+
+        with open(news_dir / f"news-{today:%Y-%m-%d}.log", 'a') as f:
+            for i in range(args.new):
+                f.write(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {rng.choice(HEADLINES)} late #{i}\n")
+        timed(f'incremental refresh (+{args.new} lines)', index.refresh, results)
+        timed('refresh with nothing new', index.refresh, results)
+        journal_mb = index_file.stat().st_size / 1e6
+
+    print(json.dumps({
+        'days': args.days,
+        'lines_per_day': args.lines,
+        'journal_mb': round(journal_mb, 1),
+        'results': results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
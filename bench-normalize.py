@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Payload Normalizer Micro-Benchmark
+Times the compiled per-source extractors against the previous nested
+payload.get() chain over a corpus of sample payloads, both for the alias
+lookups alone and for the full normalization (coercion + validation)
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from normalizer import PayloadNormalizer, MalformedEvent, SOURCES, compile_source
+
+
+def legacy_extract(payload):
+    """The extractor the webhook used before normalizer.py, kept for comparison"""
+    side = payload.get('side', payload.get('direction', payload.get('type')))
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'action': str(payload.get('action', payload.get('type', 'UNKNOWN'))).upper(),
+        'symbol': payload.get('symbol', payload.get('pair', payload.get('instrument'))),
+        'side': None if side is None else str(side).upper(),
+        'price': payload.get('price', payload.get('entry_price', payload.get('fill_price'))),
+        'quantity': payload.get('quantity', payload.get('qty', payload.get('size'))),
+        'order_id': payload.get('order_id', payload.get('id', payload.get('trade_id'))),
+        'pnl': payload.get('pnl', payload.get('profit_loss'))
+    }
+
+
+def legacy_lookup(payload):
+    """Just the eager alias chains of legacy_extract"""
+    return (
+        payload.get('action', payload.get('type', 'UNKNOWN')),
+        payload.get('symbol', payload.get('pair', payload.get('instrument'))),
+        payload.get('side', payload.get('direction', payload.get('type'))),
+        payload.get('price', payload.get('entry_price', payload.get('fill_price'))),
+        payload.get('quantity', payload.get('qty', payload.get('size'))),
+        payload.get('order_id', payload.get('id', payload.get('trade_id'))),
+        payload.get('pnl', payload.get('profit_loss'))
+    )
+
+
+def build_corpus(size, seed=7):
+    rng = random.Random(seed)
+    symbols = ['BTCUSDT', 'ETH/USDT', 'SOL-USDT', 'BINANCE:BNBUSDT.P']
+    corpus = []
+    for i in range(size):
+        kind = rng.random()
+        symbol = rng.choice(symbols)
+        price = round(rng.uniform(10, 60000), 2)
+        if kind < 0.5:
+            corpus.append(('default', {
+                'action': rng.choice(['open', 'close']), 'symbol': symbol, 'side': rng.choice(['long', 'short']),
+                'price': price, 'quantity': round(rng.uniform(0.01, 5), 3), 'order_id': f"ord-{i}"
+            }))
+        elif kind < 0.7:
+            corpus.append(('default', {
+                'type': 'CLOSE', 'pair': symbol, 'direction': 'SHORT', 'fill_price': str(price),
+                'size': '1,000', 'trade_id': i, 'profit_loss': '+12.5 USDT'
+            }))
+        elif kind < 0.85:
+            corpus.append(('tradingview', {
+                'ticker': symbol, 'market_position': 'long',
+                'strategy': {'order': {'action': 'buy', 'contracts': '2', 'price': price, 'id': f"tv-{i}"}}
+            }))
+        elif kind < 0.95:
+            corpus.append(('default', {'raw': f"OPEN CROSS {symbol} LONG Entry: {price} qty: 0.1 leverage: 10x"}))
+        else:
+            corpus.append(('default', rng.choice([{}, {'action': 'open', 'price': 'n/a'}, {'action': ['x']}])))
+    return corpus
+
+
+def run(label, fn, corpus, rounds):
+    rejected = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for source, payload in corpus:
+            try:
+                fn(payload, source)
+            except (MalformedEvent, AttributeError, TypeError):
+                rejected += 1
+    elapsed = time.perf_counter() - start
+    events = len(corpus) * rounds
+    return {
+        'extractor': label,
+        'events_per_sec': round(events / elapsed),
+        'us_per_event': round(elapsed / events * 1e6, 2),
+        'rejected': rejected // rounds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--payloads', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--dump-corpus', help='Write the generated corpus as JSON lines and exit')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.payloads)
+    if args.dump_corpus:
+        with open(args.dump_corpus, 'w') as f:
+            for source, payload in corpus:
+                f.write(json.dumps({'source': source, 'payload': payload}) + '\n')
+        return 0
+
+    normalizer = PayloadNormalizer()
+    lookups = {name: compile_source(table, finish=lambda *fields: fields) for name, table in SOURCES.items()}
+    json_corpus = [(source, payload) for source, payload in corpus if 'raw' not in payload]
+    results = [
+        run('legacy lookups', lambda payload, source: legacy_lookup(payload), json_corpus, args.rounds),
+        run('compiled lookups', lambda payload, source: lookups[source](payload), json_corpus, args.rounds),
+        run('legacy extract_event', lambda payload, source: legacy_extract(payload), corpus, args.rounds),
+        run('normalize (coerce + validate)', normalizer.normalize, corpus, args.rounds),
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
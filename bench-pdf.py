@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+PDF Catalog Benchmark
+Fills a scratch reports directory and compares what /pdf-list and /pdf-latest
+cost with a glob, stat and sort of every report against the PDF catalog:
+first scan, reload from its JSON file, and refreshes with and without changes
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from pdf_catalog import PdfCatalog
+
+
+def scan(reports_dir):
+    """What /pdf-list did before the catalog: glob, stat and sort every report"""
+    pdf_files = sorted(reports_dir.glob('*.pdf'), reverse=True)
+    return [(pdf.name, pdf.stat().st_size) for pdf in pdf_files[:10]]
+
+
+def timed(label, fn, results, runs=1):
+    start = time.perf_counter()
+    for _ in range(runs):
+        value = fn()
+    ms = (time.perf_counter() - start) * 1000 / runs
+    print(f"{label}: {ms:.2f} ms", file=sys.stderr)
+    results.append({'run': label, 'ms': round(ms, 2)})
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-pdf-') as tmp:
+        reports_dir = Path(tmp) / 'pdf_reports'
+        reports_dir.mkdir()
+        start = datetime.now() - timedelta(hours=args.reports)
+        for i in range(args.reports):
+            ts = start + timedelta(hours=i)
+            path = reports_dir / f"news_report_{ts:%Y%m%d_%H%M%S}_24h.pdf"
+            path.write_bytes(b'%PDF-1.4\n' + b'0' * 2048)
+            os.utime(path, (ts.timestamp(), ts.timestamp()))
+        index_file = Path(tmp) / 'pdf_catalog.json'
+
+        timed('scan: glob + stat + sort', lambda: scan(reports_dir), results, args.runs)
+        catalog = PdfCatalog(reports_dir, index_file, max_age_days=0, max_total_mb=0)
+        timed('catalog: first scan', lambda: (catalog.refresh(), catalog.save()), results)
+        timed('catalog: reload', lambda: PdfCatalog(reports_dir, index_file), results, args.runs)
+        timed('catalog: refresh (unchanged) + newest 10',
+              lambda: (catalog.refresh(), catalog.newest(10)), results, args.runs)
+
+        ts = datetime.now()
+        (reports_dir / f"news_report_{ts:%Y%m%d_%H%M%S}_1h.pdf").write_bytes(b'%PDF-1.4\n')
+        timed('catalog: refresh (1 new report) + newest 10',
+              lambda: (catalog.refresh(), catalog.newest(10)), results)
+        now = ts.timestamp()
+        timed('catalog: find 24h window', lambda: catalog.find(now - 86400, now), results, args.runs)
+
+    print(json.dumps({'reports': args.reports, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Reindex Benchmark
+Generates a synthetic history of daily logs in the formats found in logs/
+(format_log_entry output with # Raw:, TELEGRAM messages, hand-written lines),
+archives part of it, and times reindex.py: full load, no-op re-run, a touched
+but unchanged day, one changed day and a forced rebuild
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from log_archive import LogArchiver
+from reindex import reindex
+from trade_store import TradeStore
+
+
+def write_day(path, day, entries, rng):
+    lines = []
+    for i in range(entries):
+        ts = day + timedelta(seconds=i * 86400 // entries)
+        symbol = rng.choice(['BTC/USDT', 'ETH/USDT', 'SOL/USDT'])
+        kind = rng.random()
+        if kind < 0.8:
+            payload = {'action': rng.choice(['open', 'close']), 'symbol': symbol, 'side': 'long',
+                       'price': round(rng.uniform(10, 60000), 2), 'quantity': 0.1, 'order_id': f"{day:%Y%m%d}-{i}"}
+            lines.append(f"[{ts.isoformat()}] {payload['action'].upper()} {symbol} LONG @ {payload['price']} "
+                         f"qty: 0.1 order_id: {payload['order_id']}\n# Raw: {json.dumps(payload)}\n\n")
+        elif kind < 0.9:
+            lines.append(f"[{ts.isoformat()}] TELEGRAM CLOSE {symbol} SHORT @ 1850.5 qty: 2 pnl: +12.5\n")
+        else:
+            lines.append(f"[{ts:%Y-%m-%d %H:%M:%S}] OPEN CROSS {symbol.replace('/', '')}  LONG  "
+                         f"Entry: 52340.5  qty: 0.1  leverage: 10x\n")
+    path.write_text(''.join(lines))
+
+
+def timed(label, logs_dir, store, **kwargs):
+    stats = reindex(logs_dir, store, **kwargs)
+    print(f"{label}: {stats}", file=sys.stderr)
+    return dict(stats, run=label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--entries', type=int, default=1000, help='entries per day')
+    parser.add_argument('--archived', type=float, default=0.5, help='fraction of days moved into the archive')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory(prefix='bench-reindex-') as tmp:
+        logs_dir = Path(tmp) / 'logs'
+        logs_dir.mkdir()
+        first = datetime(2025, 1, 1)
+        for n in range(args.days):
+            day = first + timedelta(days=n)
+            write_day(logs_dir / f"{day:%Y-%m-%d}.log", day, args.entries, rng)
+        archive_before = first + timedelta(days=int(args.days * args.archived))
+        start = time.perf_counter()
+        LogArchiver(logs_dir).rotate(today=archive_before)
+        archive_seconds = time.perf_counter() - start
+
+        store = TradeStore(Path(tmp) / 'trades.db')
+        results = [timed('full', logs_dir, store, workers=args.workers)]
+        results.append(timed('no-op', logs_dir, store, workers=args.workers))
+
+        last = logs_dir / f"{first + timedelta(days=args.days - 1):%Y-%m-%d}.log"
+        last.touch()
+        results.append(timed('touched', logs_dir, store, workers=args.workers))
+
+        with open(last, 'a') as f:
+            f.write(f"[{first + timedelta(days=args.days - 1, hours=23):%Y-%m-%dT%H:%M:%S}] CLOSE BTC/USDT LONG @ 1 qty: 1\n")
+        results.append(timed('one-changed', logs_dir, store, workers=args.workers))
+        results.append(timed('force', logs_dir, store, workers=args.workers, force=True))
+
+        rows = store._conn().execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+
+    print(json.dumps({
+        'days': args.days,
+        'entries_per_day': args.entries,
+        'archive_seconds': round(archive_seconds, 3),
+        'rows': rows,
+        'results': results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Telegram Client Benchmark
+Runs a local stand-in for the Bot API (stdlib http.server, keep-alive) and
+sends messages through TelegramClient: throughput and connections opened with
+the pooled session against a new connection per request. --selftest checks
+429 retry_after handling and its cap, that a timed-out send is not resent,
+upload rewinds and connection reuse, and exits
+non-zero on failure
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent))
+from telegram_client import OutboundClient, TelegramClient
+
+TOKEN = '123456:stand-in'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """POST /bot<token>/<method>: answers from the server's script, else ok"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in one write, as from a real front end; otherwise
+    # delayed ACKs stall every kept-alive request by ~40ms
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        method = self.path.rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.calls.append((method, time.monotonic(), len(body)))
+            script = self.server.script.get(method)
+            status, payload, headers, *delay = script.pop(0) if script else (200, {'ok': True, 'result': {}}, {})
+        if delay:
+            time.sleep(delay[0])
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.reset()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self, script=None):
+        """Forget counters; `script` maps a method to responses played before the default ok,
+        as (status, payload, headers[, seconds to wait before answering])"""
+        with self.lock:
+            self.connections = 0
+            self.calls = []
+            self.script = {method: list(responses) for method, responses in (script or {}).items()}
+
+
+def too_many_requests(retry_after, in_body=True):
+    if in_body:
+        return 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': retry_after}}, {}
+    return 429, {'ok': False, 'error_code': 429}, {'Retry-After': str(retry_after)}
+
+
+class FreshConnectionClient(OutboundClient):
+    """What every send cost before the pooled session: a new connection per request"""
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        return requests.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+
+def send_all(server, client, messages, concurrency=4):
+    telegram = TelegramClient(TOKEN, 42, api_url=server.url, client=client,
+                              max_concurrency=concurrency, min_interval=0)
+    server.reset()
+    start = time.perf_counter()
+    futures = [telegram.send_message_async(f"message {i}") for i in range(messages)]
+    ok = sum(future.result()['ok'] for future in futures)
+    elapsed = time.perf_counter() - start
+    telegram.close()
+    return {
+        'messages': messages,
+        'ok': ok,
+        'ms': round(elapsed * 1000, 1),
+        'messages_per_sec': round(messages / elapsed),
+        'connections': server.connections,
+    }
+
+
+def selftest(server):
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}", file=sys.stderr)
+        if not ok:
+            failures.append(name)
+
+    for label, in_body in (('parameters.retry_after', True), ('Retry-After header', False)):
+        server.reset({'sendMessage': [too_many_requests(1, in_body)]})
+        telegram = TelegramClient(TOKEN, 42, api_url=server.url,
+                                  client=OutboundClient(backoff=0.05), min_interval=0)
+        response = telegram.send_message('hello')
+        telegram.close()
+        times = [at for _, at, _ in server.calls]
+        waited = times[1] - times[0] if len(times) == 2 else 0
+        check(f"429 with {label}", response.get('ok') and len(times) == 2 and waited >= 0.95,
+              f"{len(times)} requests, retried after {waited:.2f}s (retry_after 1s, backoff 0.05s)")
+
+    server.reset({'sendMessage': [too_many_requests(300)]})
+    telegram = TelegramClient(TOKEN, 42, api_url=server.url, client=OutboundClient(max_backoff=5), min_interval=0)
+    start = time.monotonic()
+    response = telegram.send_message('hello')
+    telegram.close()
+    check('retry_after beyond max_backoff', response.get('error_code') == 429 and len(server.calls) == 1,
+          f"gave up after {time.monotonic() - start:.2f}s, {len(server.calls)} requests (retry_after 300s)")
+
+    server.reset({'sendMessage': [(200, {'ok': True, 'result': {}}, {}, 1.5)]})
+    telegram = TelegramClient(TOKEN, 42, api_url=server.url,
+                              client=OutboundClient(timeout=(1, 0.5), backoff=0.01), min_interval=0)
+    try:
+        telegram.send_message('hello')
+        timed_out = False
+    except requests.Timeout:
+        timed_out = True
+    telegram.close()
+    time.sleep(1.5)
+    check('timed-out send not resent', timed_out and len(server.calls) == 1,
+          f"{len(server.calls)} requests after a read timeout")
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf') as f:
+        f.write(b'%PDF-1.4\n' + b'x' * 4096)
+        f.flush()
+        server.reset({'sendDocument': [too_many_requests(0)]})
+        telegram = TelegramClient(TOKEN, 42, api_url=server.url, client=OutboundClient(), min_interval=0)
+        response = telegram.send_document(f.name, caption='report')
+        telegram.close()
+        sizes = [size for _, _, size in server.calls]
+        check('upload retried after 429', response.get('ok') and len(sizes) == 2 and sizes[0] == sizes[1],
+              f"request bodies {sizes} bytes")
+
+    result = send_all(server, OutboundClient(pool_size=4), 11)
+    check('connection reuse', result['ok'] == 11 and result['connections'] <= 4,
+          f"{result['connections']} connections for 11 messages, 4 senders")
+
+    server.reset({'sendMessage': [(500, {'ok': False}, {}), (502, {'ok': False}, {})]})
+    telegram = TelegramClient(TOKEN, 42, api_url=server.url, client=OutboundClient(backoff=0.01), min_interval=0)
+    response = telegram.send_message('hello')
+    telegram.close()
+    check('5xx retried', response.get('ok') and len(server.calls) == 3, f"{len(server.calls)} requests")
+
+    print(json.dumps({'selftest': 'failed' if failures else 'passed', 'failures': failures}, indent=2))
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--selftest', action='store_true',
+                        help='check retry-after handling and connection reuse against the stand-in server')
+    args = parser.parse_args()
+
+    server = StandInServer()
+    try:
+        if args.selftest:
+            return selftest(server)
+        results = [
+            dict(client='new connection per request',
+                 **send_all(server, FreshConnectionClient(), args.messages, args.concurrency)),
+            dict(client='pooled session',
+                 **send_all(server, OutboundClient(pool_size=args.concurrency), args.messages, args.concurrency)),
+        ]
+    finally:
+        server.shutdown()
+    print(json.dumps({'concurrency': args.concurrency, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Resident Command Service
+Keeps a warm CommandHandler behind a Unix socket so bot commands skip interpreter
+startup, config parsing and index rebuilding. Start with `command_handler.py --serve`.
+
+Protocol: one JSON line {"command": ..., "args": [...]} per connection,
+answered with {"result": ...} and the connection closed.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import socketserver
+
+from command_handler import CommandHandler
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_BYTES = 65536
+
+
+class CommandRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        start = time.monotonic()
+        command = None
+        try:
+            request = json.loads(self.rfile.readline(MAX_REQUEST_BYTES))
+            command = request['command']
+            result = self.server.dispatch(command, [str(arg) for arg in request.get('args', [])])
+        except Exception as e:
+            logger.error(f"Command {command} failed: {e}", exc_info=True)
+            result = f"❌ 命令执行失败：{e}"
+
+        self.wfile.write(json.dumps({'result': result}, ensure_ascii=False).encode('utf-8'))
+        logger.info(f"/{command} handled in {(time.monotonic() - start) * 1000:.1f} ms")
+
+
+class CommandDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, handler):
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            socket_path.unlink()
+        super().__init__(str(socket_path), CommandRequestHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.handler = handler
+
+    def dispatch(self, command, args):
+        # Commands run concurrently; CommandHandler locks each of its caches only while
+        # it is used, so a slow /pdf upload does not hold up /status or /recent
+        self.handler.refresh_config()
+        return self.handler.handle_command(command, args)
+
+    def refresh_indexes(self):
+        self.handler.refresh_config()
+        self.handler.refresh_news_index()
+        self.handler.refresh_pdf_catalog()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def serve(socket_path):
+    handler = CommandHandler()
+    start = time.monotonic()
+    handler.warm()
+    logger.info(f"Warmed log index and aggregates in {(time.monotonic() - start) * 1000:.0f} ms")
+
+    server = CommandDaemon(socket_path, handler)
+    logger.info(f"Command service listening on {socket_path}")
+
+    def refresh_indexes():
+        # Keep the news index and PDF catalog current at the monitor's scan interval,
+        # so /news only reads what is new and stale reports are evicted
+        while True:
+            time.sleep(max(60, handler.config.get('scan_interval', 3600)))
+            try:
+                server.refresh_indexes()
+            except Exception as e:
+                logger.warning(f"Index refresh failed: {e}")
+
+    threading.Thread(target=refresh_indexes, name='index-refresh', daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+    return 0
@@ -5,13 +5,22 @@ Jimmy's Custom Command Handler
 """
 
 import os
+import re
 import sys
 import json
+import socket
+import threading
 import subprocess
-import requests
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from log_reader import LogReader
+from trade_store import TradeStore
+from aggregator import TradeAggregator
+from news_index import NewsIndex
+from pdf_catalog import PdfCatalog, format_window
+
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
 TRADING_LOGS_DIR = SCRIPT_DIR / "logs"
@@ -19,10 +28,151 @@ NEWS_LOGS_DIR = SCRIPT_DIR.parent / "crypto-news-monitor" / "logs"
 PDF_REPORTS_DIR = SCRIPT_DIR.parent / "crypto-news-monitor" / "pdf_reports"
 WEBHOOK_LOG = SCRIPT_DIR / "webhook.log"
 CONFIG_FILE = SCRIPT_DIR / "command_config.json"
+CACHE_DIR = SCRIPT_DIR / ".cache"
+TRADE_DB = Path(os.environ.get("TRADE_DB") or SCRIPT_DIR / "trades.db")
+WEBHOOK_STATUS_URL = f"http://127.0.0.1:{os.environ.get('WEBHOOK_PORT', 8080)}/status"
+RECENT_MAX_ENTRIES = 20
+NEWS_MAX_ITEMS = 10
+TIME_RANGE_RE = re.compile(r'^\d+[mhd]$')
+
+# Seconds a command waits for its upload on the Telegram send queue before replying;
+# a slower upload (429 backoff, large PDF) finishes in the background
+TELEGRAM_SEND_WAIT = 30
+
+# PDF reports: a /pdf for a window generated this recently is resent, not regenerated;
+# reports /pdf generated are deleted once older than PDF_MAX_AGE_DAYS or beyond
+# PDF_MAX_TOTAL_MB (opt-in: 0 = no limit, the default)
+PDF_REUSE_SECONDS = int(os.environ.get("PDF_REUSE_SECONDS", 900))
+PDF_MAX_AGE_DAYS = int(os.environ.get("PDF_MAX_AGE_DAYS", 0))
+PDF_MAX_TOTAL_MB = int(os.environ.get("PDF_MAX_TOTAL_MB", 0))
+
+# Resident command daemon (command_handler.py --serve)
+COMMAND_SOCKET = Path(os.environ.get("COMMAND_SOCKET") or CACHE_DIR / "command.sock")
+COMMAND_TIMEOUT = 120
 
 class CommandHandler:
     def __init__(self):
         self.config = self.load_config()
+        self._config_mtime = CONFIG_FILE.stat().st_mtime if CONFIG_FILE.exists() else None
+        self._http_client = None
+        self._telegram = None
+        self.log_reader = LogReader(TRADING_LOGS_DIR, index_file=CACHE_DIR / "log_index.json")
+        self._trade_store = None
+        self._aggregator = None
+        self._analytics = None
+        self._news_index = None
+        self._pdf_catalog = None
+        # The resident daemon runs commands concurrently: `_lock` guards creating the
+        # lazy caches and the config, the others each guard one index while it is used.
+        # The store, aggregator and analytics lock themselves; Telegram sends hold none.
+        self._lock = threading.RLock()
+        self._log_lock = threading.Lock()
+        self._news_lock = threading.Lock()
+        self._pdf_lock = threading.RLock()
+    
+    def get_trade_store(self):
+        """Open the structured trade store on first use"""
+        with self._lock:
+            if self._trade_store is None:
+                self._trade_store = TradeStore(TRADE_DB)
+            return self._trade_store
+    
+    def get_aggregator(self):
+        """Load the aggregate snapshot and catch up from the trade store"""
+        with self._lock:
+            if self._aggregator is None:
+                self._aggregator = TradeAggregator(CACHE_DIR / "aggregates.json")
+        self._aggregator.load(self.get_trade_store())
+        return self._aggregator
+    
+    def get_analytics(self):
+        """Load the fill arrays and catch up from the trade store (numpy is imported lazily)"""
+        with self._lock:
+            if self._analytics is None:
+                from analytics import TradeAnalytics
+                self._analytics = TradeAnalytics(CACHE_DIR / "analytics.npz")
+        self._analytics.load(self.get_trade_store())
+        return self._analytics
+    
+    def get_http_client(self):
+        """Shared pooled HTTP client (imported lazily to keep CLI startup fast)"""
+        with self._lock:
+            if self._http_client is None:
+                from telegram_client import OutboundClient
+                self._http_client = OutboundClient()
+            return self._http_client
+    
+    def get_telegram(self):
+        """Telegram client sharing the pooled HTTP client"""
+        with self._lock:
+            token = self.config['telegram_bot_token']
+            chat_id = self.config['telegram_chat_id']
+            if self._telegram is None or (self._telegram.token, self._telegram.chat_id) != (token, chat_id):
+                from telegram_client import TelegramClient
+                self._telegram = TelegramClient(token, chat_id, client=self.get_http_client())
+            return self._telegram
+    
+    def send_document(self, path):
+        """Queue an upload on the Telegram send pool and wait up to TELEGRAM_SEND_WAIT
+        seconds for its response; None if it is still going"""
+        future = self.get_telegram().send_document_async(path)
+        try:
+            return future.result(timeout=TELEGRAM_SEND_WAIT)
+        except FutureTimeoutError:
+            return None
+    
+    def refresh_config(self):
+        """Reload the config file if it changed since it was last read"""
+        mtime = CONFIG_FILE.stat().st_mtime if CONFIG_FILE.exists() else None
+        with self._lock:
+            if mtime != self._config_mtime:
+                self.config = self.load_config()
+                self._config_mtime = mtime
+    
+    def warm(self):
+        """Build log indexes and aggregates up front (used by the resident daemon)"""
+        with self._log_lock:
+            for path in self.log_reader.log_files():
+                self.log_reader.file_index(path)
+            self.log_reader.save_index()
+        self.refresh_news_index()
+        self.refresh_pdf_catalog()
+        self.get_aggregator()
+        try:
+            self.get_analytics()
+        except ImportError:
+            pass
+    
+    def get_news_index(self):
+        """Load the news index journal and index lines written since the last refresh
+        (callers hold _news_lock while they use it)"""
+        if self._news_index is None:
+            self._news_index = NewsIndex(NEWS_LOGS_DIR, index_file=CACHE_DIR / "news_index.jsonl")
+        self._news_index.refresh()
+        return self._news_index
+    
+    def refresh_news_index(self):
+        if NEWS_LOGS_DIR.exists():
+            with self._news_lock:
+                self.get_news_index()
+    
+    def get_pdf_catalog(self):
+        """Load the PDF catalog and pick up reports added or removed since the last refresh
+        (callers hold _pdf_lock while they use it)"""
+        if self._pdf_catalog is None:
+            self._pdf_catalog = PdfCatalog(PDF_REPORTS_DIR, index_file=CACHE_DIR / "pdf_catalog.json",
+                                           max_age_days=PDF_MAX_AGE_DAYS, max_total_mb=PDF_MAX_TOTAL_MB)
+        self._pdf_catalog.refresh()
+        self._pdf_catalog.save()
+        return self._pdf_catalog
+    
+    def refresh_pdf_catalog(self):
+        """Refresh the PDF catalog and evict reports beyond the age/size limits"""
+        if PDF_REPORTS_DIR.exists():
+            with self._pdf_lock:
+                catalog = self.get_pdf_catalog()
+                catalog.evict()
+                catalog.save()
     
     def load_config(self):
         """Load command configuration"""
@@ -40,6 +190,7 @@ class CommandHandler:
         """Save configuration"""
         with open(CONFIG_FILE, "w") as f:
             json.dump(self.config, f, indent=2)
+        self._config_mtime = CONFIG_FILE.stat().st_mtime
     
     def cmd_myhelp(self, args):
         """Display custom help"""
@@ -58,25 +209,27 @@ class CommandHandler:
         minutes = self.parse_time_range(time_range)
         cutoff_time = datetime.now() - timedelta(minutes=minutes)
         
-        # Read trading logs
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_file = TRADING_LOGS_DIR / f"{today}.log"
-        
-        if not log_file.exists():
+        if not TRADING_LOGS_DIR.exists():
             return "❌ 暂无交易日志"
         
-        with open(log_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        # Read entries since the cutoff across daily files (raw JSON echo omitted)
+        with self._log_lock:
+            entries = list(self.log_reader.iter_entries(since=cutoff_time))
         
-        # Filter recent entries
-        recent_lines = []
-        for line in lines[-20:]:  # Last 20 lines
-            recent_lines.append(line.strip())
-        
-        if not recent_lines:
+        if not entries:
             return "ℹ️ 最近无交易活动"
         
-        result = f"📊 最近 {time_range} 交易活动\n\n"
+        recent_lines = []
+        for ts, text in entries[-RECENT_MAX_ENTRIES:]:
+            recent_lines.extend(
+                line for line in text.splitlines()
+                if line.strip() and not line.startswith(("# Raw:", "# Source:"))
+            )
+        
+        result = f"📊 最近 {time_range} 交易活动"
+        if len(entries) > RECENT_MAX_ENTRIES:
+            result += f"（共 {len(entries)} 条，显示最近 {RECENT_MAX_ENTRIES} 条）"
+        result += "\n\n"
         result += "\n".join(recent_lines)
         
         return result
@@ -90,8 +243,9 @@ class CommandHandler:
         seconds = self.parse_interval(interval)
         
         if seconds:
-            self.config['scan_interval'] = seconds
-            self.save_config()
+            with self._lock:
+                self.config['scan_interval'] = seconds
+                self.save_config()
             
             # Update cron job
             self.update_cron_job(seconds)
@@ -101,44 +255,74 @@ class CommandHandler:
             return "❌ 无效的时间格式 (支持：15m, 1h, 30m 等)"
     
     def cmd_news(self, args):
-        """Get news summary"""
-        time_range = args[0] if args else "24h"
-        
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_file = NEWS_LOGS_DIR / f"news-{today}.log"
+        """Search news by time range and keywords: /news 24h, /news 7d BTC ETF"""
+        time_range = "24h"
+        keywords = []
+        for arg in args:
+            if TIME_RANGE_RE.match(arg) and not keywords:
+                time_range = arg
+            else:
+                keywords.append(arg)
+        cutoff_time = datetime.now() - timedelta(minutes=self.parse_time_range(time_range))
         
-        if not log_file.exists():
+        if not NEWS_LOGS_DIR.exists():
             return "❌ 暂无新闻记录"
         
-        with open(log_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with self._news_lock:
+            total, items = self.get_news_index().search(since=cutoff_time, keywords=keywords, limit=NEWS_MAX_ITEMS)
         
-        # Get last 10 news items
-        recent_news = lines[-10:] if len(lines) > 10 else lines
+        topic = f"「{' '.join(keywords)}」" if keywords else ""
+        if not items:
+            return f"ℹ️ 最近 {time_range} 无{topic}新闻"
         
-        result = f"📰 最近 {time_range} 新闻摘要\n\n"
-        result += "".join(recent_news)
+        result = f"📰 最近 {time_range} {topic}新闻摘要"
+        if total > len(items):
+            result += f"（共 {total} 条，显示最近 {len(items)} 条）"
+        result += "\n\n"
+        result += "\n".join(text for ts, text in items)
         
         return result
     
     def cmd_pdf(self, args):
-        """Generate and send PDF report"""
+        """Generate and send PDF report, or resend the one just generated for the same window"""
         time_range = args[0] if args else "1h"
         
         # Trigger news monitor to generate PDF via webhook command
         try:
             hours = int(time_range.replace('h', '')) if 'h' in time_range else 1
+            now = datetime.now().timestamp()
+            
+            if PDF_REPORTS_DIR.exists():
+                with self._pdf_lock:
+                    cached = self.get_pdf_catalog().find(now - hours * 3600, now, slack=PDF_REUSE_SECONDS)
+                if cached:
+                    response = self.send_document(cached)
+                    if response is None:
+                        return f"⏳ {hours}h PDF 报告（{cached.name}）仍在上传，完成后会出现在 Telegram"
+                    if response.get('ok'):
+                        age = int(now - cached.stat().st_mtime) // 60
+                        return f"✅ 已发送 {age} 分钟前生成的 {hours}h PDF 报告（{cached.name}）"
+                    return f"❌ 发送失败：{response}"
             
             # Request PDF via webhook
             webhook_url = "http://localhost:9900/command"
-            response = requests.post(
+            # Not retried: a timed-out request may still be generating the report
+            response = self.get_http_client().post(
                 webhook_url,
                 json={"command": "get_recent_pdf", "hours": hours},
-                timeout=30
+                timeout=(5, 30),
+                retries=0
             )
             result = response.json()
             
             if result.get('status') == 'ok':
+                if PDF_REPORTS_DIR.exists():
+                    # Remember which window the new report covers so a repeat is served from it
+                    with self._pdf_lock:
+                        catalog = self.get_pdf_catalog()
+                        catalog.record(now - 1, now - hours * 3600, now)
+                        catalog.evict()
+                        catalog.save()
                 return f"✅ PDF 报告已生成并发送到 Telegram"
             else:
                 return f"❌ 生成失败：{result.get('message', '未知错误')}"
@@ -150,17 +334,19 @@ class CommandHandler:
         if not PDF_REPORTS_DIR.exists():
             return "❌ 暂无 PDF 报告"
         
-        pdf_files = list(PDF_REPORTS_DIR.glob("*.pdf"))
+        with self._pdf_lock:
+            reports = self.get_pdf_catalog().newest(10)  # Last 10
         
-        if not pdf_files:
+        if not reports:
             return "ℹ️ 暂无 PDF 报告"
         
         result = "📄 可用的 PDF 报告:\n\n"
-        for pdf in sorted(pdf_files, reverse=True)[:10]:  # Last 10
-            stat = pdf.stat()
-            size_kb = stat.st_size / 1024
-            mtime = datetime.fromtimestamp(stat.st_mtime)
-            result += f"- {pdf.name} ({size_kb:.1f} KB) - {mtime.strftime('%Y-%m-%d %H:%M')}\n"
+        for name, report in reports:
+            size_kb = report['size'] / 1024
+            mtime = datetime.fromtimestamp(report['mtime'])
+            window = format_window(report)
+            result += f"- {name} ({size_kb:.1f} KB) - {mtime.strftime('%Y-%m-%d %H:%M')}"
+            result += f"（{window}）\n" if window else "\n"
         
         return result
     
@@ -169,32 +355,22 @@ class CommandHandler:
         if not PDF_REPORTS_DIR.exists():
             return "❌ 暂无 PDF 报告"
         
-        pdf_files = sorted(PDF_REPORTS_DIR.glob("*.pdf"), reverse=True)
+        with self._pdf_lock:
+            latest_pdf = self.get_pdf_catalog().latest()
         
-        if not pdf_files:
+        if not latest_pdf:
             return "❌ 暂无 PDF 报告"
         
-        latest_pdf = pdf_files[0]
-        
         # Send to Telegram
         try:
-            token = self.config['telegram_bot_token']
-            chat_id = self.config['telegram_chat_id']
-            
-            url = f"https://api.telegram.org/bot{token}/sendDocument"
-            import requests
+            response = self.send_document(latest_pdf)
             
-            with open(latest_pdf, 'rb') as f:
-                response = requests.post(
-                    url,
-                    data={"chat_id": chat_id},
-                    files={"document": f}
-                )
-            
-            if response.json().get('ok'):
+            if response is None:
+                return f"⏳ 最新 PDF 报告仍在上传，完成后会出现在 Telegram"
+            if response.get('ok'):
                 return f"✅ 已发送最新 PDF 报告"
             else:
-                return f"❌ 发送失败：{response.json()}"
+                return f"❌ 发送失败：{response}"
                 
         except Exception as e:
             return f"❌ 发送失败：{e}"
@@ -203,27 +379,32 @@ class CommandHandler:
         """Show system status"""
         result = "📊 系统状态\n\n"
         
-        # Check webhook service
+        # The webhook's /status carries cached git state, so no git/systemctl fork is needed
+        webhook = None
         try:
-            status = subprocess.run(
-                ["systemctl", "is-active", "trading-webhook"],
-                capture_output=True, text=True
-            )
-            webhook_status = "🟢 运行中" if status.stdout.strip() == "active" else "🔴 已停止"
-            result += f"Webhook 服务：{webhook_status}\n"
-        except:
-            result += "Webhook 服务：❌ 未知\n"
+            response = self.get_http_client().get(WEBHOOK_STATUS_URL, timeout=(1, 3), retries=0)
+            webhook = response.json()
+        except Exception:
+            pass
         
-        # Check git status
-        try:
-            git_status = subprocess.run(
-                ["git", "-C", str(SCRIPT_DIR), "status", "--porcelain"],
-                capture_output=True, text=True
-            )
-            git_clean = "✅ 干净" if not git_status.stdout.strip() else "⚠️ 有未提交更改"
+        if webhook:
+            result += "Webhook 服务：🟢 运行中\n"
+            git_clean = "✅ 干净" if webhook.get('git_clean') else "⚠️ 有未提交更改"
             result += f"Git 状态：{git_clean}\n"
-        except:
-            result += "Git 状态：❌ 未知\n"
+            result += f"待同步条目：{webhook.get('pending_entries', 0)}\n"
+            if webhook.get('last_push'):
+                result += f"最近推送：{webhook['last_push'][:19]}\n"
+        else:
+            result += "Webhook 服务：🔴 已停止\n"
+            try:
+                git_status = subprocess.run(
+                    ["git", "-C", str(SCRIPT_DIR), "status", "--porcelain"],
+                    capture_output=True, text=True
+                )
+                git_clean = "✅ 干净" if not git_status.stdout.strip() else "⚠️ 有未提交更改"
+                result += f"Git 状态：{git_clean}\n"
+            except:
+                result += "Git 状态：❌ 未知\n"
         
         # Check news monitor
         news_monitor_active = Path("/etc/systemd/system/crypto-news-monitor.service").exists()
@@ -231,6 +412,151 @@ class CommandHandler:
         
         return result
     
+    def cmd_trades(self, args):
+        """Show trades in a time range from the structured store"""
+        time_range = args[0] if args else "24h"
+        cutoff_time = datetime.now() - timedelta(minutes=self.parse_time_range(time_range))
+        
+        trades = self.get_trade_store().query(since=cutoff_time.isoformat(), limit=RECENT_MAX_ENTRIES)
+        if not trades:
+            return f"ℹ️ 最近 {time_range} 无交易记录"
+        
+        result = f"📈 最近 {time_range} 交易记录\n\n"
+        for trade in trades:
+            line = f"[{trade['timestamp'][:19]}] {trade['action']}"
+            if trade['symbol']:
+                line += f" {trade['symbol']}"
+            if trade['side']:
+                line += f" {trade['side']}"
+            if trade['price'] is not None:
+                line += f" @ {trade['price']:g}"
+            if trade['quantity'] is not None:
+                line += f" qty: {trade['quantity']:g}"
+            if trade['pnl'] is not None:
+                line += f" pnl: {trade['pnl']:+.2f}"
+            result += line + "\n"
+        
+        return result
+    
+    def cmd_pnl(self, args):
+        """Show realized PnL for a time range"""
+        time_range = args[0] if args else "24h"
+        cutoff_time = datetime.now() - timedelta(minutes=self.parse_time_range(time_range))
+        
+        rollup = self.get_aggregator().rollup_since(cutoff_time)
+        
+        result = f"💰 最近 {time_range} 盈亏统计\n\n"
+        result += f"已实现盈亏：{rollup['realized_pnl']:+.2f}\n"
+        result += f"平仓次数：{rollup['closes']}（盈 {rollup['wins']} / 亏 {rollup['losses']}）\n"
+        
+        if rollup['symbols']:
+            result += "\n按币种：\n"
+            for symbol, pnl in sorted(rollup['symbols'].items(), key=lambda item: item[1], reverse=True):
+                result += f"- {symbol}: {pnl:+.2f}\n"
+        
+        return result
+    
+    def cmd_positions(self, args):
+        """Show currently open positions"""
+        positions = self.get_aggregator().open_positions()
+        if not positions:
+            return "ℹ️ 当前无持仓"
+        
+        result = "📊 当前持仓\n\n"
+        for position in positions:
+            avg_entry = position['avg_entry']
+            entry = f"{avg_entry:g}" if avg_entry is not None else "N/A"
+            result += f"- {position['symbol']} {position['side']} qty: {position['quantity']:g} 均价: {entry} (开仓 {position['opened_at'][:16]})\n"
+        
+        return result
+    
+    def cmd_summary(self, args):
+        """Generate a trading summary for a time range"""
+        time_range = args[0] if args else "24h"
+        cutoff_time = datetime.now() - timedelta(minutes=self.parse_time_range(time_range))
+        
+        aggregator = self.get_aggregator()
+        rollup = aggregator.rollup_since(cutoff_time)
+        positions = aggregator.open_positions()
+        
+        decided = rollup['wins'] + rollup['losses']
+        win_rate = f"{rollup['wins'] / decided * 100:.1f}%" if decided else "N/A"
+        
+        result = f"📋 最近 {time_range} 交易摘要\n\n"
+        result += f"事件总数：{rollup['events']}\n"
+        result += f"开仓：{rollup['opens']}  平仓：{rollup['closes']}\n"
+        result += f"已实现盈亏：{rollup['realized_pnl']:+.2f}\n"
+        result += f"胜率：{win_rate}\n"
+        result += f"当前持仓：{len(positions)} 个\n"
+        
+        days = aggregator.daily(cutoff_time)
+        if len(days) > 1:
+            result += "\n每日盈亏：\n"
+            for day, day_rollup in days.items():
+                result += f"- {day}: {day_rollup['realized_pnl']:+.2f} ({day_rollup['events']} 条)\n"
+        
+        return result
+    
+    def cmd_report(self, args):
+        """Performance report: equity/drawdown, win rate, holding time, per symbol and hour"""
+        time_range = args[0] if args else "7d"
+        since = None
+        if time_range != "all":
+            since = datetime.now() - timedelta(minutes=self.parse_time_range(time_range))
+        
+        try:
+            report = self.get_analytics().report(since=since)
+        except ImportError:
+            return "❌ 绩效报告需要 numpy：pip3 install numpy"
+        
+        if not report['fills']:
+            return f"ℹ️ 最近 {time_range} 无成交记录"
+        
+        def ratio(value, fmt):
+            return format(value, fmt) if value is not None else "N/A"
+        
+        result = f"📊 {'全部历史' if since is None else f'最近 {time_range}'} 绩效报告\n\n"
+        result += f"成交：{report['fills']}（开仓 {report['opens']} / 平仓 {report['closes']}）\n"
+        result += f"已实现盈亏：{report['realized_pnl']:+.2f}\n"
+        win_rate = f"{report['win_rate'] * 100:.1f}%" if report['win_rate'] is not None else "N/A"
+        result += f"胜率：{win_rate}（盈 {report['wins']} / 亏 {report['losses']}）\n"
+        result += f"盈亏比：{ratio(report['win_loss_ratio'], '.2f')}  利润因子：{ratio(report['profit_factor'], '.2f')}\n"
+        result += f"最大回撤：{report['max_drawdown']:.2f}"
+        if report['max_drawdown_trough']:
+            result += f"（{report['max_drawdown_peak'][:16]} → {report['max_drawdown_trough'][:16]}）"
+        result += "\n"
+        if report['avg_holding_seconds'] is not None:
+            result += f"平均持仓：{self.format_duration(report['avg_holding_seconds'])}（中位 {self.format_duration(report['median_holding_seconds'])}）\n"
+        result += f"成交额：{report['volume']:,.2f}  手续费：{report['fees']:.2f}\n"
+        if report['avg_leverage'] is not None:
+            result += f"平均杠杆：{report['avg_leverage']:.1f}x（最高 {report['max_leverage']:g}x）  杠杆敞口：{report['leveraged_exposure']:,.0f}\n"
+        
+        if report['symbols']:
+            result += "\n按币种：\n"
+            for row in report['symbols']:
+                decided = row['wins'] + row['losses']
+                win_rate = f"{row['wins'] / decided * 100:.0f}%" if decided else "N/A"
+                result += f"- {row['symbol'] or '未知'}: {row['realized_pnl']:+.2f}（{row['fills']} 笔，胜率 {win_rate}）\n"
+        
+        hours = [row for row in report['hours'] if row['closes']]
+        if hours:
+            result += "\n按时段（平仓盈亏）：\n"
+            for row in hours:
+                result += f"- {row['hour']:02d}:00 {row['realized_pnl']:+.2f}（{row['closes']} 笔）\n"
+        
+        return result
+    
+    def format_duration(self, seconds):
+        """Compact duration: 45s, 12m, 3h 20m, 2d 4h"""
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds}s"
+        if seconds < 3600:
+            return f"{seconds // 60}m"
+        if seconds < 86400:
+            return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+        return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+    
     def parse_time_range(self, time_str):
         """Parse time range string to minutes"""
         if time_str.endswith('m'):
@@ -276,7 +602,12 @@ class CommandHandler:
             'pdf': self.cmd_pdf,
             'pdf-list': self.cmd_pdf_list,
             'pdf-latest': self.cmd_pdf_latest,
-            'status': self.cmd_status
+            'status': self.cmd_status,
+            'trades': self.cmd_trades,
+            'pnl': self.cmd_pnl,
+            'positions': self.cmd_positions,
+            'summary': self.cmd_summary,
+            'report': self.cmd_report
         }
         
         handler = commands.get(command)
@@ -285,14 +616,50 @@ class CommandHandler:
         else:
             return f"❌ 未知命令：{command}\n使用 /myhelp 查看可用命令"
 
+def run_via_daemon(command, args):
+    """Run a command on the resident daemon; returns None if no daemon is reachable"""
+    if not COMMAND_SOCKET.exists():
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(COMMAND_TIMEOUT)
+        try:
+            sock.connect(str(COMMAND_SOCKET))
+        except OSError:
+            # Stale socket file; fall back to running in-process
+            return None
+        
+        # Once connected, never fall back: the command may already be running
+        try:
+            sock.sendall(json.dumps({"command": command, "args": args}).encode() + b"\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return json.loads(b"".join(chunks).decode("utf-8"))["result"]
+        except (OSError, ValueError, KeyError) as e:
+            return f"❌ 命令服务异常：{e}"
+    finally:
+        sock.close()
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        from command_daemon import serve
+        sys.exit(serve(COMMAND_SOCKET))
+    
     if len(sys.argv) < 2:
         print("Usage: command_handler.py <command> [args...]")
+        print("       command_handler.py --serve")
         sys.exit(1)
     
     command = sys.argv[1]
     args = sys.argv[2:]
     
-    handler = CommandHandler()
-    result = handler.handle_command(command, args)
+    result = run_via_daemon(command, args)
+    if result is None:
+        handler = CommandHandler()
+        result = handler.handle_command(command, args)
     print(result)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Idempotent Ingestion Index
+Bounded TTL index of already-journaled orders so retried webhooks are not written twice
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# format_log_entry output: "[ts] ACTION[ SYMBOL][ SIDE][ @ price][ qty: q] order_id: X ...".
+# The action may be several words ("OPEN CROSS"); the shortest one that leaves a
+# symbol, a known side and the numeric fields before order_id is the one written
+ENTRY_RE = re.compile(
+    r'^\[[^\]]+\] (.+?)(?: [^ \n]+(?: (?:LONG|SHORT|BUY|SELL))?)??'
+    r'(?: @ [^ \n]+)?(?: qty: [^ \n]+)? order_id: (\S+)')
+
+
+def order_key(action, order_id):
+    """Dedup key for an order event; the action is part of it so OPEN/CLOSE of one id both land"""
+    return f"{str(action).upper()}:{order_id}"
+
+
+class _Entry:
+    __slots__ = ('log_file', 'expires_at', 'done')
+
+    def __init__(self, expires_at):
+        self.log_file = None
+        self.expires_at = expires_at
+        self.done = threading.Event()
+
+
+class DedupIndex:
+    """Insertion-ordered map of key -> log file with a TTL and a size bound.
+
+    All operations are O(1): expired entries are only ever at the front, and the
+    oldest entry is evicted when `max_entries` is exceeded. A key is claimed
+    before its entry is written, so a duplicate that races the original waits
+    for it instead of being written a second time.
+    """
+
+    def __init__(self, max_entries=100000, ttl=72 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _purge(self, now):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            del self._entries[key]
+
+    def claim(self, key):
+        """Return (entry, True) if `key` is new and now reserved, or (existing entry, False)"""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry, False
+
+            entry = _Entry(now + self.ttl)
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry, True
+
+    def complete(self, entry, log_file):
+        """Mark a claimed key as durably written to `log_file`"""
+        entry.log_file = str(log_file)
+        entry.done.set()
+
+    def release(self, key, entry):
+        """Drop a claim whose write failed so a retry can go through"""
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+    def wait(self, entry, timeout=10):
+        """Log file of the original write, or None if it failed or is still running"""
+        entry.done.wait(timeout)
+        return entry.log_file
+
+    def rebuild(self, log_reader):
+        """Seed the index from journal entries written within the TTL"""
+        since = datetime.now() - timedelta(seconds=self.ttl)
+        found = []
+        for path in log_reader.log_files(since=since):
+            for ts, text in log_reader.read_entries(path, since=since):
+                match = ENTRY_RE.match(text)
+                if match:
+                    found.append((ts, order_key(match.group(1), match.group(2)), str(path)))
+        # Files hold hand-written and late entries out of order; insert oldest first so
+        # expiry and max_entries eviction, which work from the front, drop the oldest
+        found.sort(key=lambda item: item[0])
+
+        now = time.monotonic()
+        wall_now = datetime.now()
+        with self._lock:
+            for ts, key, log_file in found:
+                # Keep the original expiry: entries age out ttl after they were logged
+                entry = _Entry(now + self.ttl - (wall_now - ts).total_seconds())
+                entry.log_file = log_file
+                entry.done.set()
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        loaded = len(found)
+        logger.info(f"Dedup index rebuilt with {len(self._entries)} orders from {loaded} journal entries")
+        return loaded
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'max_entries': self.max_entries}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Live Trade Event Stream
+Fans journaled trade events out to Server-Sent Events subscribers, with
+per-symbol filters, bounded per-subscriber buffers and resume by sequence number
+"""
+
+import json
+import queue
+import logging
+import threading
+
+from metrics import REGISTRY
+from trade_store import stored_event
+
+logger = logging.getLogger(__name__)
+
+# Fields sent to subscribers; `id` is the trade store row id assigned in journal order
+EVENT_FIELDS = ('id', 'timestamp', 'action', 'symbol', 'side', 'price', 'quantity', 'order_id', 'pnl')
+
+SUBSCRIBERS_DROPPED = REGISTRY.counter(
+    'event_subscribers_dropped_total', 'Event stream subscribers disconnected for falling behind')
+
+
+def sse_frame(event):
+    """One `trade` SSE message for a stored event (a row of TradeStore.after() or
+    stored_event()), so live and replayed frames carry the same values; the id
+    lets clients resume with Last-Event-ID"""
+    data = json.dumps({field: event.get(field) for field in EVENT_FIELDS}, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: trade\ndata: {data}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    """Bounded queue of encoded frames for one connected client"""
+
+    def __init__(self, symbols=None, buffer_size=1000):
+        self.symbols = frozenset(symbols) if symbols else None
+        self.frames = queue.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def wants(self, event):
+        return self.symbols is None or event.get('symbol') in self.symbols
+
+    def get(self, timeout=None):
+        """Next (id, frame), or None on timeout"""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Publishes journaled events to live subscribers.
+
+    publish() is a journal listener, so it runs on the writer thread after each
+    batch is durable and must never block: every frame is encoded once and
+    offered to each subscriber with put_nowait. A subscriber whose buffer is
+    full is dropped rather than slowing ingestion down; it reconnects and
+    replays what it missed from the trade store by sequence number.
+    """
+
+    def __init__(self, buffer_size=1000, max_subscribers=100):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, symbols=None):
+        """Register a subscriber, or return None when the limit is reached"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(symbols, self.buffer_size)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, events):
+        """Journal listener: queue each event for every subscriber that wants it"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        for event in events:
+            if event.get('id') is None:
+                continue
+            frame = None
+            for subscriber in subscribers:
+                if subscriber.dropped or not subscriber.wants(event):
+                    continue
+                if frame is None:
+                    frame = sse_frame(stored_event(event))
+                try:
+                    subscriber.frames.put_nowait((event['id'], frame))
+                except queue.Full:
+                    self._drop(subscriber)
+            self.published += 1
+
+    def _drop(self, subscriber):
+        subscriber.dropped = True
+        self.unsubscribe(subscriber)
+        SUBSCRIBERS_DROPPED.inc()
+        logger.warning(f"Dropped event subscriber: {self.buffer_size} events behind")
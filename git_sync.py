@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Background Git Sync Worker
+Coalesces log writes into batched git commits and pushes, off the webhook request path
+"""
+
+import os
+import time
+import fcntl
+import logging
+import threading
+import subprocess
+from datetime import datetime
+
+from metrics import STAGE_SECONDS, GIT_SYNC_FAILURES
+
+logger = logging.getLogger(__name__)
+
+
+class GitStatusCache:
+    """Last known git state for /status without forking git per request.
+
+    The sync worker updates it after every commit and push. When nothing has
+    updated it for `ttl` seconds, the next reader refreshes it from git once;
+    concurrent readers get the previous value meanwhile.
+    """
+
+    def __init__(self, repo_dir, ttl=60.0):
+        self.repo_dir = repo_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._updated = None            # monotonic time of the last update
+        self.last_commit = None
+        self.porcelain = None
+        self.last_push_at = None
+
+    def update(self, last_commit=None, porcelain=None, pushed_at=None):
+        with self._lock:
+            if last_commit is not None:
+                self.last_commit = last_commit
+            if porcelain is not None:
+                self.porcelain = porcelain
+            if pushed_at is not None:
+                self.last_push_at = pushed_at
+            self._updated = time.monotonic()
+
+    def mark_committed(self, paths):
+        """Drop `paths` (repo-relative) from the cached porcelain status after they were committed"""
+        with self._lock:
+            if self.porcelain:
+                committed = set(paths)
+                self.porcelain = '\n'.join(
+                    line for line in self.porcelain.splitlines() if line[3:].strip('"') not in committed
+                )
+
+    def refresh(self):
+        """Read the current state from git (two subprocesses)"""
+        git = lambda *args: subprocess.run(['git', *args], cwd=self.repo_dir, capture_output=True, text=True).stdout.strip()
+        self.update(last_commit=git('log', '--oneline', '-1'), porcelain=git('status', '--porcelain'))
+
+    def get(self):
+        stale = self._updated is None or time.monotonic() - self._updated > self.ttl
+        if stale and self._refresh_lock.acquire(blocking=self._updated is None):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+        with self._lock:
+            return {
+                'last_commit': self.last_commit,
+                'git_clean': not self.porcelain,
+                'git_status': self.porcelain or 'clean',
+                'last_push': self.last_push_at.isoformat() if self.last_push_at else None,
+                'age_seconds': round(time.monotonic() - self._updated, 1) if self._updated else None,
+            }
+
+
+class GitSyncWorker(threading.Thread):
+    """Commit and push pending log writes in batches.
+
+    Request handlers call notify() after a log line has been written and return
+    immediately. The worker waits until either `window` seconds have passed since
+    the first pending write or `max_entries` writes have accumulated, then runs a
+    single commit + push for the whole batch.
+
+    notify() also records which file was written, so a sync stages and commits
+    exactly those paths (`git add` only for files git does not track yet, then
+    `git commit -- <paths>` and `git push`) instead of scanning the whole tree.
+    On start, uncommitted files under `watch_dir` are picked up once.
+
+    Commits ahead of origin are the outbox: they are on disk in the local repo,
+    and one push replays all of them in commit order. A failed push does not
+    hold up commits; it is retried with exponential backoff (`retry_interval`
+    doubling up to `max_retry_interval`), and on start any commits a previous
+    run could not push are queued for an immediate push.
+    """
+
+    def __init__(self, repo_dir, lock_file, window=2.0, max_entries=50,
+                 retry_interval=30.0, github_token='', status_cache=None, watch_dir=None,
+                 max_retry_interval=300.0, push_timeout=30.0):
+        super().__init__(name='git-sync', daemon=True)
+        self.repo_dir = repo_dir
+        self.lock_file = lock_file
+        self.window = window
+        self.max_entries = max_entries
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.push_timeout = push_timeout
+        self.github_token = github_token
+        self.status_cache = status_cache or GitStatusCache(repo_dir)
+        self.watch_dir = watch_dir
+
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._pending_since = None      # monotonic time of oldest pending write
+        self._in_flight = 0
+        self._in_flight_since = None
+        self._retry_at = None           # next commit attempt after a failed one
+        self._stopping = False
+        self._touched = set()           # repo-relative paths written since the last sync
+        self._in_flight_paths = set()
+        self._full_scan = False         # a write without a path: fall back to `git add -A`
+
+        self._tracked = set()           # paths git is known to track (no `git add` needed)
+        self._has_remote = None
+        self._warned_outside = False
+
+        # Outbox: local commits not yet on origin
+        self._unpushed_commits = 0
+        self._oldest_unpushed_at = None  # wall clock time of the oldest unpushed commit
+        self._push_failures = 0          # consecutive failed pushes
+        self._push_due_at = None         # monotonic time of the next push retry
+
+        self.last_sync_at = None        # wall clock time of last successful sync
+        self.last_push_at = None
+        self.last_error = None
+        self.sync_count = 0
+
+    def notify(self, count=1, path=None):
+        """Record `count` new log writes to `path` that need to be synced"""
+        relative = self._relative(path) if path is not None else None
+        with self._cond:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending += count
+            if relative:
+                self._touched.add(relative)
+            else:
+                self._full_scan = True
+            self._cond.notify()
+
+    def _relative(self, path):
+        relative = os.path.relpath(os.path.abspath(path), self.repo_dir)
+        if relative.startswith('..'):
+            if not self._warned_outside:
+                logger.warning(f"{path} is outside {self.repo_dir}, syncing the whole tree instead")
+                self._warned_outside = True
+            return None
+        return relative
+
+    def stop(self, timeout=None):
+        """Flush anything pending, try one last push and stop the worker"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.join(timeout)
+        if self._unpushed_commits:
+            logger.warning(f"{self._unpushed_commits} commits left unpushed; they are pushed on next start")
+
+    def stats(self):
+        """Snapshot of queue depth, sync lag and the push outbox for /status"""
+        now = time.monotonic()
+        with self._cond:
+            oldest = self._in_flight_since or self._pending_since
+            oldest_unpushed = self._oldest_unpushed_at
+            return {
+                'queue_depth': self._pending,
+                'in_flight': self._in_flight,
+                'last_sync': self.last_sync_at.isoformat() if self.last_sync_at else None,
+                'last_sync_lag_seconds': round(now - oldest, 3) if oldest else 0.0,
+                'sync_count': self.sync_count,
+                'unpushed_commits': self._unpushed_commits if self._has_remote else None,
+                'oldest_unpushed_age_seconds': (
+                    round((datetime.now() - oldest_unpushed).total_seconds(), 1) if oldest_unpushed else 0.0),
+                'last_push': self.last_push_at.isoformat() if self.last_push_at else None,
+                'push_failures': self._push_failures,
+                'next_push_in_seconds': (
+                    round(max(0.0, self._push_due_at - now), 1)
+                    if self._push_due_at is not None and self._unpushed_commits else None),
+                'last_error': self.last_error,
+            }
+
+    def run(self):
+        self._load_outbox()
+        self._catch_up()
+        while True:
+            with self._cond:
+                batch = self._wait_for_work()
+                if batch is None:
+                    return
+                self._in_flight = batch
+                self._in_flight_since = self._pending_since
+                self._pending = 0
+                self._pending_since = None
+                paths = None if self._full_scan else sorted(self._touched)
+                self._in_flight_paths = self._touched
+                self._touched = set()
+                self._full_scan = False
+
+            ok = self._sync(batch, paths)
+
+            with self._cond:
+                if ok:
+                    self._retry_at = None
+                else:
+                    # Put the batch back so it is retried instead of being dropped
+                    if self._pending:
+                        self._pending_since = min(self._pending_since, self._in_flight_since)
+                    else:
+                        self._pending_since = self._in_flight_since
+                    self._pending += batch
+                    self._touched |= self._in_flight_paths
+                    self._full_scan = self._full_scan or paths is None
+                    self._retry_at = time.monotonic() + self.retry_interval
+                self._in_flight = 0
+                self._in_flight_paths = set()
+                self._in_flight_since = None
+                if self._stopping:
+                    return
+
+    def _wait_for_work(self):
+        """Block until a batch or a push retry is due; returns the batch size
+        (0 for a push only), or None when stopping with nothing left to do"""
+        while True:
+            if self._stopping:
+                return self._pending if self._pending or self._unpushed_commits else None
+            now = time.monotonic()
+            due = None
+            if self._pending:
+                due = self._pending_since + self.window
+                if self._retry_at:
+                    due = max(due, self._retry_at)
+                elif self._pending >= self.max_entries:
+                    due = now
+            if self._unpushed_commits and self._push_due_at is not None:
+                due = self._push_due_at if due is None else min(due, self._push_due_at)
+            if due is not None and now >= due:
+                return self._pending
+            self._cond.wait(None if due is None else due - now)
+
+    def _load_outbox(self):
+        """Count commits a previous run left unpushed and queue a push for them"""
+        self._has_remote = self._git('remote', 'get-url', 'origin').returncode == 0
+        if not self._has_remote:
+            return
+        result = self._git('log', '--format=%ct', 'HEAD', '--not', '--remotes=origin', text=True)
+        times = result.stdout.split()
+        if times:
+            logger.info(f"{len(times)} unpushed commits from a previous run, pushing")
+            with self._cond:
+                self._unpushed_commits = len(times)
+                self._oldest_unpushed_at = datetime.fromtimestamp(int(times[-1]))
+                self._push_due_at = time.monotonic()
+
+    def _catch_up(self):
+        """Queue files under `watch_dir` left uncommitted by a previous run (one git status)"""
+        if not self.watch_dir:
+            return
+        scope = self._relative(self.watch_dir)
+        if not scope:
+            return
+        # Without rename detection every entry is one "XY path" field
+        result = self._git('status', '--porcelain', '-z', '--no-renames', '--untracked-files=all', '--', scope,
+                           text=True)
+        paths = [entry[3:] for entry in result.stdout.split('\0') if len(entry) > 3]
+        if paths:
+            logger.info(f"Found {len(paths)} unsynced files under {scope}")
+            with self._cond:
+                if not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending += len(paths)
+                self._touched.update(paths)
+                self._cond.notify()
+
+    def _sync(self, batch, paths=None):
+        """Commit the batch and push the outbox under the cross-process git lock.
+
+        Returns False only when the commit failed; a failed push leaves the
+        commits in the outbox and schedules its own retry.
+        """
+        os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+        with open(self.lock_file, 'w') as lock_fd:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+            try:
+                committed = True
+                if batch:
+                    logger.info(f"Syncing {batch} log entries")
+                    committed = self._attempt(self._commit, batch, paths)
+                    if committed:
+                        self.last_sync_at = datetime.now()
+                        self.sync_count += 1
+                    else:
+                        logger.error(f"{self.last_error}, retrying in {self.retry_interval:.0f}s")
+                if self._push_wanted():
+                    self._push_outbox()
+            finally:
+                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+
+        if committed and not self._push_failures:
+            self.last_error = None
+        return committed
+
+    def _attempt(self, step, *args):
+        """Run one git step, recording a failure in last_error; returns True on success"""
+        try:
+            step(*args)
+        except subprocess.TimeoutExpired as e:
+            self.last_error = f"Git {e.cmd[1]} timeout after {e.timeout:.0f}s"
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else e.stderr
+            self.last_error = f"Git error: {stderr.strip() if stderr else e}"
+        except Exception as e:
+            self.last_error = f"Unexpected error in git {step.__name__.strip('_')}: {e}"
+        else:
+            return True
+        GIT_SYNC_FAILURES.inc()
+        return False
+
+    def _git(self, *args, **kwargs):
+        return subprocess.run(['git', *args], cwd=self.repo_dir, capture_output=True, **kwargs)
+
+    def _commit(self, batch, paths=None):
+        """Commit `paths` (repo-relative; None = the whole tree) into the local outbox"""
+        timestamp = datetime.now().isoformat()
+        message = f'Auto-commit trading logs at {timestamp} ({batch} entries)'
+
+        if paths is None:
+            self._git('add', '-A', check=True)
+            commit = ['commit', '-m', message]
+        else:
+            # A removed file (e.g. a log replaced by its archive) is committed as a
+            # deletion if git tracks it, and dropped if it was never added
+            missing = [path for path in paths if not os.path.exists(os.path.join(self.repo_dir, path))]
+            if missing:
+                known = self._git('ls-files', '-z', '--', *missing, text=True).stdout.split('\0')
+                paths = [path for path in paths if path not in missing or path in known]
+            if not paths:
+                return
+            new = [path for path in paths if path not in self._tracked and path not in missing]
+            if new:
+                self._git('add', '--', *new, check=True)
+                logger.info(f"Staged {len(new)} new files")
+            # With pathspecs, commit takes exactly these files and leaves anything else staged alone
+            commit = ['commit', '-m', message, '--', *paths]
+
+        with STAGE_SECONDS.time('git_commit'):
+            result = self._git(*commit, text=True)
+        if result.returncode == 0:
+            logger.info("Changes committed")
+            if paths is not None:
+                self._tracked.update(path for path in paths if path not in missing)
+                self._tracked.difference_update(missing)
+                self.status_cache.mark_committed(paths)
+            else:
+                self.status_cache.update(porcelain='')
+            if self._has_remote:
+                with self._cond:
+                    self._unpushed_commits += 1
+                    self._oldest_unpushed_at = self._oldest_unpushed_at or datetime.now()
+
+            # "[main 1a2b3c4] message" -> "1a2b3c4 message", as git log --oneline prints it
+            header = result.stdout.split(']', 1)[0]
+            self.status_cache.update(last_commit=f"{header.split()[-1]} {message}")
+        elif 'nothing' in result.stdout or 'no changes' in result.stdout:
+            logger.info("Nothing to commit")
+        else:
+            raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+
+    def _push_wanted(self):
+        """Push now unless the outbox is empty or a failed push is backing off (ignored when stopping)"""
+        with self._cond:
+            if not self._has_remote or not self._unpushed_commits:
+                return False
+            return self._stopping or self._push_due_at is None or time.monotonic() >= self._push_due_at
+
+    def _push(self):
+        env = os.environ.copy()
+        if self.github_token:
+            env['GIT_ASKPASS'] = '/bin/echo'
+
+        with STAGE_SECONDS.time('git_push'):
+            self._git('push', 'origin', 'main', check=True, timeout=self.push_timeout, env=env)
+
+    def _push_outbox(self):
+        """Push every unpushed commit (in order, one git push); back off on failure"""
+        queued = self._unpushed_commits
+        if self._attempt(self._push):
+            self.last_push_at = datetime.now()
+            with self._cond:
+                self._unpushed_commits -= queued
+                if not self._unpushed_commits:
+                    self._oldest_unpushed_at = None
+                self._push_failures = 0
+                self._push_due_at = None
+            self.status_cache.update(pushed_at=self.last_push_at)
+            logger.info(f"Git push successful ({queued} commits)")
+            return
+
+        with self._cond:
+            self._push_failures += 1
+            delay = min(self.retry_interval * 2 ** (self._push_failures - 1), self.max_retry_interval)
+            self._push_due_at = time.monotonic() + delay
+        logger.error(f"{self.last_error}; {self._unpushed_commits} commits kept locally, "
+                     f"next push in {delay:.1f}s")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Trade Event Journal
+Append-only writer for logs/YYYY-MM-DD.log with group commit and fsync batching
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import Future
+
+from metrics import STAGE_SECONDS, JOURNAL_BATCH_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# none  - write and flush to the OS, never fsync (fastest, may lose entries on crash)
+# batch - one fsync per group of concurrently queued entries (default)
+# event - fsync after every single entry
+DURABILITY_MODES = ('none', 'batch', 'event')
+
+
+class JournalWriter(threading.Thread):
+    """Single writer thread for the daily log files.
+
+    Request handler threads call write(), which queues the entry and blocks until
+    the writer has made it durable. The writer drains everything queued while the
+    previous batch was being written and commits it with one write + fsync, so
+    concurrent requests share the cost of the fsync (group commit). Entries land in
+    the file in the order they were queued.
+
+    The current day's file is kept open and rotated when the date changes.
+
+    Entries may carry a structured `event` dict. After each batch is durable,
+    listeners are called once with the list of that batch's events (each tagged
+    with its `log_file`) before the writers are acknowledged.
+
+    detach() renames a log file aside on the writer thread itself, ordered with
+    the writes around it, so the log archiver can compact a closed day without
+    racing a late append to it.
+    """
+
+    def __init__(self, logs_dir, durability='batch', max_batch=512, listeners=None):
+        super().__init__(name='journal-writer', daemon=True)
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid durability mode: {durability} (expected one of {', '.join(DURABILITY_MODES)})")
+        self.logs_dir = Path(logs_dir)
+        self.durability = durability
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._current_path = None
+        self._current_file = None
+        self.listeners = list(listeners or [])
+
+    def add_listener(self, listener):
+        """Register `listener(events)` to be called after each durable batch"""
+        self.listeners.append(listener)
+
+    def write(self, text, date=None, event=None, timeout=None):
+        """Append `text` to the log file for `date` (default today); returns the file path
+        once the entry has been written with the configured durability"""
+        future = Future()
+        self._queue.put((text, date, [event] if event is not None else [], future))
+        return future.result(timeout)
+
+    def write_many(self, entries, date=None, timeout=None):
+        """Append several (text, event) entries as one contiguous write to the log file
+        for `date`; returns the file path once they are durable (one fsync in any mode)"""
+        future = Future()
+        self._queue.put((
+            ''.join(text for text, _ in entries), date,
+            [event for _, event in entries if event is not None], future
+        ))
+        return future.result(timeout)
+
+    def detach(self, log_file, target, timeout=None):
+        """Rename `log_file` to `target` once every write queued before this call
+        has landed; later writes for that day start a new file. Returns `target`,
+        or None if there was no such file"""
+        future = Future()
+        self._queue.put((None, (Path(log_file), Path(target)), [], future))
+        return future.result(timeout)
+
+    def queue_depth(self):
+        """Writes waiting for the writer thread"""
+        return self._queue.qsize()
+
+    def stop(self, timeout=None):
+        """Drain queued entries, close the current file and stop the writer"""
+        self._queue.put(None)
+        self.join(timeout)
+
+    def log_path(self, date=None):
+        day = (date or datetime.now()).strftime('%Y-%m-%d')
+        return self.logs_dir / f"{day}.log"
+
+    def run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                if item[0] is None:
+                    self._detach(item)
+                    continue
+
+                batch = [item]
+                stopping = False
+                detach = None
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    if item[0] is None:
+                        detach = item
+                        break
+                    batch.append(item)
+
+                self._commit(batch)
+                if detach:
+                    self._detach(detach)
+                if stopping:
+                    return
+        finally:
+            self._close_current()
+
+    def _commit(self, batch):
+        """Write one batch, grouped per file, and acknowledge every entry in it"""
+        JOURNAL_BATCH_ENTRIES.observe(len(batch))
+        fsync_seconds = STAGE_SECONDS.labels('fsync')
+        write_seconds = STAGE_SECONDS.labels('journal_write')
+
+        groups = {}
+        for text, date, events, future in batch:
+            groups.setdefault(self.log_path(date), []).append((text, events, future))
+
+        written = []
+
+        for log_file, entries in groups.items():
+            try:
+                f, temporary = self._open(log_file)
+                try:
+                    if self.durability == 'event':
+                        for text, _, _ in entries:
+                            start = time.perf_counter()
+                            f.write(text.encode('utf-8'))
+                            f.flush()
+                            synced = time.perf_counter()
+                            os.fsync(f.fileno())
+                            write_seconds.observe(synced - start)
+                            fsync_seconds.observe(time.perf_counter() - synced)
+                    else:
+                        start = time.perf_counter()
+                        f.write(''.join(text for text, _, _ in entries).encode('utf-8'))
+                        f.flush()
+                        write_seconds.observe(time.perf_counter() - start)
+                        if self.durability == 'batch':
+                            start = time.perf_counter()
+                            os.fsync(f.fileno())
+                            fsync_seconds.observe(time.perf_counter() - start)
+                finally:
+                    if temporary:
+                        f.close()
+            except Exception as e:
+                logger.error(f"Failed to write {len(entries)} journal entries to {log_file}: {e}")
+                self._close_current()
+                for _, _, future in entries:
+                    future.set_exception(e)
+            else:
+                written.extend((log_file, events, future) for _, events, future in entries)
+
+        events = []
+        for log_file, entry_events, _ in written:
+            for event in entry_events:
+                event['log_file'] = log_file
+                events.append(event)
+        if events:
+            for listener in self.listeners:
+                try:
+                    listener(events)
+                except Exception as e:
+                    logger.error(f"Journal listener {getattr(listener, '__qualname__', listener)} failed: {e}")
+
+        for log_file, _, future in written:
+            future.set_result(log_file)
+
+    def _detach(self, item):
+        _, (log_file, target), _, future = item
+        try:
+            if log_file == self._current_path:
+                self._close_current()
+            if not log_file.exists():
+                future.set_result(None)
+                return
+            os.rename(log_file, target)
+        except Exception as e:
+            logger.error(f"Failed to detach {log_file}: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(target)
+
+    def _open(self, log_file):
+        """Return (file, temporary) for `log_file`; today's file stays open between batches"""
+        if log_file == self._current_path:
+            return self._current_file, False
+
+        created = not log_file.exists()
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        f = open(log_file, 'ab')
+        if created and self.durability != 'none':
+            # Make the new directory entry durable too
+            dir_fd = os.open(log_file.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+        if log_file != self.log_path():
+            # Entry for another day (e.g. a delayed Telegram message)
+            return f, True
+
+        # Midnight rotation: today's file replaces the previous one
+        self._close_current()
+        logger.info(f"Journal opened {log_file}")
+        self._current_path = log_file
+        self._current_file = f
+        return f, False
+
+    def _close_current(self):
+        if self._current_file:
+            try:
+                self._current_file.close()
+            except OSError as e:
+                logger.error(f"Failed to close {self._current_path}: {e}")
+        self._current_path = None
+        self._current_file = None
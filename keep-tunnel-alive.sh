@@ -15,9 +15,9 @@ echo "🦞 Telegram Webhook Tunnel Manager"
 echo "=================================="
 
 # Check if webhook server is running
-if ! systemctl is-active --quiet telegram-webhook; then
+if ! systemctl is-active --quiet trading-webhook; then
     echo "Starting webhook server..."
-    systemctl start telegram-webhook
+    systemctl start trading-webhook
 fi
 
 # Kill existing tunnel if running
@@ -56,13 +56,13 @@ while true; do
     # Set Telegram webhook
     echo "Configuring Telegram webhook..."
     WEBHOOK_RESPONSE=$(curl -s -X POST "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/setWebhook" \
-      -d "url=${TUNNEL_URL}" \
+      -d "url=${TUNNEL_URL}/telegram" \
       -d "allowed_updates=[\"message\"]")
     
     WEBHOOK_OK=$(echo "$WEBHOOK_RESPONSE" | jq -r '.ok')
     
     if [ "$WEBHOOK_OK" = "true" ]; then
-        echo "✅ Webhook configured: $TUNNEL_URL"
+        echo "✅ Webhook configured: $TUNNEL_URL/telegram"
     else
         echo "❌ Webhook config failed, retrying..."
         echo "$WEBHOOK_RESPONSE"
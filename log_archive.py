@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Daily Log Archive
+Compacts closed days of logs/YYYY-MM-DD.log into gzip NDJSON archives with a
+block index, keeping a readable per-day summary next to them
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import zlib
+import heapq
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from log_reader import LOG_FILE_RE, parse_timestamp, split_entries
+from normalizer import MalformedEvent, parse_text
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIRNAME = 'archive'
+ARCHIVE_FILE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.ndjson\.gz$')
+SEALED_SUFFIX = '.sealed'
+RAW_PREFIX = '# Raw: '
+# Source schema the payload was normalized with, when not the default (kept in the text)
+SOURCE_PREFIX = '# Source: '
+READ_CHUNK_BYTES = 64 * 1024
+# The summary lists at most this many trades (largest |PnL|) and notes; the rest is in the archive
+SUMMARY_NOTABLE_ENTRIES = 20
+
+
+def entry_record(text):
+    """Archive record for one log entry: {"ts", "text", "raw"}.
+
+    The `# Raw:` payload echo is stored once as JSON instead of as a second
+    text line; record_text() rebuilds the original entry.
+    """
+    end = text.index(']')
+    body = text[end + 1:]
+    lines = body[1:].split('\n') if body.startswith(' ') else body.split('\n')
+    raw = None
+    if lines[-1].startswith(RAW_PREFIX):
+        try:
+            raw = json.loads(lines[-1][len(RAW_PREFIX):])
+        except ValueError:
+            pass
+        else:
+            lines.pop()
+    return {'ts': text[1:end], 'text': '\n'.join(lines), 'raw': raw}
+
+
+def record_text(record):
+    """The log entry text an archive record was made from"""
+    text = f"[{record['ts']}] {record['text']}"
+    if record.get('raw') is not None:
+        text += f"\n{RAW_PREFIX}{json.dumps(record['raw'], ensure_ascii=False)}"
+    return text
+
+
+def _fsync_dir(path):
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class LogArchive:
+    """Archived days under logs/archive/.
+
+    Each day is one YYYY-MM-DD.ndjson.gz made of independent gzip members of up
+    to `block_size` records, so `zcat` reads it whole while readers decompress
+    only the blocks they need. index.json holds, per day, the same sparse
+    [byte_offset, min_ts, max_ts] blocks LogReader keeps for raw logs, plus the
+    archived size and the source segments already folded in.
+    """
+
+    def __init__(self, logs_dir, block_size=256):
+        self.dir = Path(logs_dir) / ARCHIVE_DIRNAME
+        self.index_file = self.dir / 'index.json'
+        self.block_size = block_size
+        self._index = {}
+        self._index_mtime = None
+        self._lock = threading.Lock()
+
+    def path(self, day):
+        return self.dir / f"{day}.ndjson.gz"
+
+    def day_of(self, path):
+        """'YYYY-MM-DD' for an archive file path, or None for anything else"""
+        match = ARCHIVE_FILE_RE.match(Path(path).name)
+        return match.group(1) if match and Path(path).parent == self.dir else None
+
+    def index(self):
+        """The day index, re-read when another process has rotated since"""
+        try:
+            mtime = self.index_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._index_mtime:
+                try:
+                    with open(self.index_file) as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable archive index {self.index_file}: {e}")
+                    self._index = {}
+                self._index_mtime = mtime
+            return self._index
+
+    def days(self):
+        return sorted(self.index())
+
+    def blocks(self, day):
+        entry = self.index().get(day)
+        return entry['blocks'] if entry else []
+
+    def _save_index(self, index):
+        tmp = self.index_file.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.index_file)
+        _fsync_dir(self.dir)
+
+    def has_segment(self, day, segment):
+        entry = self.index().get(day)
+        return bool(entry) and list(segment) in entry.get('segments', [])
+
+    def append(self, day, entries, segment=None):
+        """Append (timestamp, text) entries to a day's archive as new gzip members.
+
+        The archive file is fsynced before the index points at the new blocks,
+        so bytes past the indexed size (a crash mid-append) are cut off here.
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        index = dict(self.index())
+        entry = dict(index.get(day) or {'blocks': [], 'size': 0, 'entries': 0, 'segments': []})
+        blocks = list(entry['blocks'])
+
+        path = self.path(day)
+        mode = 'r+b' if path.exists() else 'wb'
+        with open(path, mode) as f:
+            f.truncate(entry['size'])
+            f.seek(entry['size'])
+            offset = entry['size']
+            for i in range(0, len(entries), self.block_size):
+                chunk = entries[i:i + self.block_size]
+                epochs = [ts.timestamp() for ts, _ in chunk]
+                data = ''.join(json.dumps(entry_record(text), ensure_ascii=False) + '\n' for _, text in chunk)
+                # mtime=0 keeps archives byte-identical for identical input (stable git blobs)
+                member = gzip.compress(data.encode('utf-8'), mtime=0)
+                f.write(member)
+                blocks.append([offset, min(epochs), max(epochs)])
+                offset += len(member)
+            f.flush()
+            os.fsync(f.fileno())
+
+        entry.update(blocks=blocks, size=offset, entries=entry['entries'] + len(entries))
+        if segment:
+            entry['segments'] = entry.get('segments', []) + [list(segment)]
+        index[day] = entry
+        self._save_index(index)
+        return path
+
+    def read_records(self, day, since=None, until=None):
+        """Yield archive records of one day, decompressing only blocks that may
+        overlap [since, until); streamed in READ_CHUNK_BYTES pieces"""
+        entry = self.index().get(day)
+        if not entry:
+            return
+        blocks = entry['blocks']
+        since_epoch = since.timestamp() if since else None
+        until_epoch = until.timestamp() if until else None
+
+        with open(self.path(day), 'rb') as f:
+            for i, (offset, min_ts, max_ts) in enumerate(blocks):
+                if since_epoch is not None and max_ts < since_epoch:
+                    continue
+                if until_epoch is not None and min_ts >= until_epoch:
+                    continue
+                end = blocks[i + 1][0] if i + 1 < len(blocks) else entry['size']
+                for line in self._member_lines(f, offset, end):
+                    yield json.loads(line)
+
+    def _member_lines(self, f, start, end):
+        f.seek(start)
+        decompressor = zlib.decompressobj(wbits=31)
+        pending = b''
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(READ_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            pending += decompressor.decompress(chunk)
+            *lines, pending = pending.split(b'\n')
+            yield from lines
+        pending += decompressor.flush()
+        if pending.strip():
+            yield pending
+
+    def read_entries(self, day, since=None, until=None):
+        """Yield (timestamp, text) like LogReader.read_entries, for an archived day"""
+        for record in self.read_records(day, since, until):
+            text = record_text(record)
+            ts = parse_timestamp(text)
+            if ts is None:
+                continue
+            if since and ts < since:
+                continue
+            if until and ts >= until:
+                continue
+            yield ts, text
+
+
+def _rename(path, sealed):
+    os.rename(path, sealed)
+    return sealed
+
+
+def day_summary(day, records, archive_name, notable=SUMMARY_NOTABLE_ENTRIES):
+    """Readable markdown summary of one archived day: per-symbol and per-action
+    totals, the `notable` trades with the largest |PnL| and the first `notable`
+    notes. Its size does not grow with the day's entry count."""
+    symbols = {}
+    actions = {}
+    trades = []
+    notes = []
+    entries = notes_total = 0
+    for record in records:
+        entries += 1
+        first = record['text'].split('\n', 1)[0]
+        line = f"- `{record['ts']}` {first}"
+        try:
+            event = parse_text(first)
+        except MalformedEvent:
+            notes_total += 1
+            if len(notes) < notable:
+                notes.append(line)
+            continue
+        pnl = event['pnl'] if isinstance(event['pnl'], (int, float)) else None
+        stats = symbols.setdefault(event['symbol'], {'events': 0, 'actions': {}, 'pnl': 0.0})
+        stats['events'] += 1
+        stats['actions'][event['action']] = stats['actions'].get(event['action'], 0) + 1
+        totals = actions.setdefault(event['action'], {'events': 0, 'pnl': 0.0})
+        totals['events'] += 1
+        if pnl is not None:
+            stats['pnl'] += pnl
+            totals['pnl'] += pnl
+            # (|pnl|, -entry number, ...) keeps the earliest of equal trades
+            item = (abs(pnl), -entries, record['ts'], line)
+            if len(trades) < notable:
+                heapq.heappush(trades, item)
+            elif notable:
+                heapq.heappushpop(trades, item)
+
+    out = [
+        f"# {day}",
+        "",
+        f"{entries} entries ({entries - notes_total} trades, {notes_total} notes), "
+        f"full entries in [{archive_name}]({ARCHIVE_DIRNAME}/{archive_name})",
+        "",
+    ]
+    if symbols:
+        out += ["| Symbol | Events | Actions | PnL |", "|---|---|---|---|"]
+        for symbol, stats in sorted(symbols.items()):
+            counts = ', '.join(f"{action} {count}" for action, count in sorted(stats['actions'].items()))
+            out.append(f"| {symbol} | {stats['events']} | {counts} | {stats['pnl']:+g} |")
+        out.append("")
+        out += ["| Action | Events | PnL |", "|---|---|---|"]
+        for action, totals in sorted(actions.items()):
+            out.append(f"| {action} | {totals['events']} | {totals['pnl']:+g} |")
+        out.append("")
+    if trades:
+        out += [f"## Largest PnL ({len(trades)} trades)", ""]
+        out += [line for *_, line in sorted(trades, key=lambda item: (item[2], -item[1]))]
+        out.append("")
+    if notes:
+        more = f", {notes_total - len(notes)} more in the archive" if notes_total > len(notes) else ""
+        out += [f"## Notes (first {len(notes)}{more})", ""] + notes + [""]
+    return '\n'.join(out)
+
+
+class LogArchiver:
+    """Moves closed days from raw .log files into the archive.
+
+    A day is archived once it is `after_days` old (1 = as soon as it has
+    closed). Its log file is first renamed aside via `seal(path, sealed_path)`;
+    the webhook passes JournalWriter.detach so the rename happens on the writer
+    thread and no append can race with archiving. Entries that still arrive for
+    that day start a fresh .log, which the next rotation appends to the archive.
+    The raw .log is replaced by YYYY-MM-DD.summary.md and the archive.
+    """
+
+    def __init__(self, logs_dir, after_days=1, archive=None, seal=None):
+        self.logs_dir = Path(logs_dir)
+        self.after_days = after_days
+        self.archive = archive or LogArchive(logs_dir)
+        self.seal = seal or _rename
+
+    def due(self, today=None):
+        """Raw log files old enough to archive, oldest first"""
+        cutoff = (today or datetime.now()).date() - timedelta(days=self.after_days - 1)
+        files = []
+        for path in self.logs_dir.glob('*.log'):
+            match = LOG_FILE_RE.match(path.name)
+            if match and datetime.strptime(match.group(1), '%Y-%m-%d').date() < cutoff:
+                files.append(path)
+        return sorted(files)
+
+    def rotate(self, today=None):
+        """Archive every due day; returns the paths that changed (for git)"""
+        changed = []
+        # Left over from an interrupted rotation
+        for sealed in sorted(self.logs_dir.glob(f'*.log{SEALED_SUFFIX}')):
+            changed += self._archive(sealed)
+        for path in self.due(today):
+            sealed = self.seal(path, path.with_name(path.name + SEALED_SUFFIX))
+            if sealed:
+                changed += self._archive(Path(sealed))
+        return changed
+
+    def _archive(self, sealed):
+        log_file = sealed.with_name(sealed.name[:-len(SEALED_SUFFIX)])
+        day = LOG_FILE_RE.match(log_file.name).group(1)
+        stat = sealed.stat()
+        segment = (stat.st_ino, stat.st_size)
+
+        if self.archive.has_segment(day, segment):
+            logger.info(f"{sealed.name} was already archived")
+        else:
+            # Hand-written text above the first timestamped line is archived as an
+            # entry at the start of the day rather than dropped
+            start_of_day = datetime.strptime(day, '%Y-%m-%d')
+            with open(sealed, 'rb') as f:
+                entries = list(split_entries(f.read().decode('utf-8', errors='replace'), leading_ts=start_of_day))
+            archive_path = self.archive.append(day, entries, segment)
+            logger.info(f"Archived {len(entries)} entries of {day} to {archive_path}")
+
+        archive_path = self.archive.path(day)
+        summary = self.logs_dir / f"{day}.summary.md"
+        tmp = summary.with_suffix('.tmp')
+        tmp.write_text(day_summary(day, self.archive.read_records(day), archive_path.name), encoding='utf-8')
+        os.replace(tmp, summary)
+
+        sealed.unlink()
+        _fsync_dir(self.logs_dir)
+        return [log_file, archive_path, self.archive.index_file, summary]
+
+
+class LogRotator(threading.Thread):
+    """Runs the archiver at start and `delay` seconds after every local midnight.
+
+    The delay leaves room for late entries of the day that just closed (e.g.
+    delayed Telegram messages) to reach the raw log before it is compacted.
+    """
+
+    def __init__(self, archiver, delay=1800.0, on_rotated=None):
+        super().__init__(name='log-rotator', daemon=True)
+        self.archiver = archiver
+        self.delay = delay
+        self.on_rotated = on_rotated
+        self._stop_event = threading.Event()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                changed = self.archiver.rotate()
+            except Exception as e:
+                logger.error(f"Log rotation failed: {e}", exc_info=True)
+            else:
+                if changed and self.on_rotated:
+                    self.on_rotated(changed)
+            now = datetime.now()
+            next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            self._stop_event.wait((next_run - now).total_seconds() + self.delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Archive closed days of trading logs (run while the webhook server is stopped; '
+                    'the server rotates by itself)')
+    parser.add_argument('--logs-dir', default=str(Path(__file__).parent / 'logs'))
+    parser.add_argument('--after-days', type=int, default=1, help='archive days at least this old (default: 1)')
+    parser.add_argument('--dry-run', action='store_true', help='only list the log files that would be archived')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    archiver = LogArchiver(args.logs_dir, after_days=args.after_days)
+    if args.dry_run:
+        for path in archiver.due():
+            print(path)
+        return 0
+    for path in archiver.rotate():
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
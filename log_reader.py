@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Time-Indexed Trading Log Reader
+Reads entries from logs/YYYY-MM-DD.log, and days compacted into logs/archive/,
+by time range using a sparse per-file offset index
+"""
+
+import os
+import re
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.log$')
+
+
+def parse_timestamp(line):
+    """Parse the leading `[timestamp]` of a log line into a naive local datetime.
+
+    Handles every format found in the logs: `2026-02-23T13:52:53.133101`,
+    `2026-02-23T03:55:00+00:00`, `2026-02-23T13:35:46` and `2026-02-23 03:55:00`.
+    Returns None for lines that do not start an entry.
+    """
+    if not line.startswith('['):
+        return None
+    end = line.find(']', 1, 40)
+    if end < 0:
+        return None
+    value = line[1:end]
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone().replace(tzinfo=None)
+    return ts
+
+
+def split_entries(data, leading_ts=None):
+    """Yield (timestamp, text) for each entry in a block of log text; an entry runs
+    from a `[timestamp]` line up to the next one.
+
+    Text before the first `[timestamp]` line is skipped, unless `leading_ts` is
+    given: then it is kept as a first entry stamped `[leading_ts]`.
+    """
+    ts, lines = None, []
+    for line in data.splitlines():
+        line_ts = parse_timestamp(line)
+        if line_ts is not None:
+            if ts is not None:
+                yield ts, '\n'.join(lines).rstrip()
+            elif leading_ts is not None and ''.join(lines).strip():
+                yield leading_ts, f"[{leading_ts.isoformat()}] " + '\n'.join(lines).strip()
+            ts, lines = line_ts, [line]
+        else:
+            lines.append(line)
+    if ts is not None:
+        yield ts, '\n'.join(lines).rstrip()
+    elif leading_ts is not None and ''.join(lines).strip():
+        yield leading_ts, f"[{leading_ts.isoformat()}] " + '\n'.join(lines).strip()
+
+
+class LogReader:
+    """Reads log entries across daily files, seeking via a sparse offset index.
+
+    For each file the index holds one block per `block_size` entries:
+    [byte_offset, min_ts, max_ts] (timestamps as epoch seconds). Hand-written
+    lines are not always in time order, so a block is skipped only when its
+    max_ts is before the cutoff. The index is extended incrementally as files
+    grow and persisted to `index_file` so one-shot CLI calls reuse it.
+
+    Days already moved into the archive (log_archive.py) are listed and read
+    through the same calls, using the archive's own block index.
+    """
+
+    def __init__(self, logs_dir, index_file=None, block_size=64, archive=None):
+        from log_archive import LogArchive
+
+        self.logs_dir = Path(logs_dir)
+        self.index_file = Path(index_file) if index_file else None
+        self.block_size = block_size
+        self.archive = archive or LogArchive(logs_dir)
+        self._index = self._load_index()
+        self._dirty = False
+
+    def _load_index(self):
+        if self.index_file and self.index_file.exists():
+            try:
+                with open(self.index_file) as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable log index {self.index_file}: {e}")
+        return {}
+
+    def save_index(self):
+        """Persist the index if it changed"""
+        if not (self.index_file and self._dirty):
+            return
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_file)
+        self._dirty = False
+
+    def log_files(self, since=None, until=None):
+        """Daily log and archive files that may hold entries in [since, until), oldest
+        first; a day's archive comes before entries logged to it after archiving"""
+        candidates = [(day, 0, self.archive.path(day)) for day in self.archive.days()]
+        for path in self.logs_dir.glob('*.log'):
+            match = LOG_FILE_RE.match(path.name)
+            if match:
+                candidates.append((match.group(1), 1, path))
+
+        files = []
+        for name, order, path in candidates:
+            day = datetime.strptime(name, '%Y-%m-%d')
+            # One day of slack either side: entries logged with a UTC offset can
+            # land in the neighbouring local day's file
+            if since and day + timedelta(days=2) <= since:
+                continue
+            if until and day - timedelta(days=1) >= until:
+                continue
+            files.append((day, order, path))
+        return [path for _, _, path in sorted(files)]
+
+    def file_index(self, path):
+        """Return the up-to-date block index for `path`, scanning only new bytes"""
+        day = self.archive.day_of(path)
+        if day:
+            return self.archive.blocks(day)
+        stat = path.stat()
+        key = path.name
+        entry = self._index.get(key)
+
+        if entry and (entry['inode'] != stat.st_ino or stat.st_size < entry['size']):
+            entry = None
+        if entry and entry['size'] == stat.st_size:
+            return entry['blocks']
+
+        if entry is None:
+            entry = {'inode': stat.st_ino, 'size': 0, 'blocks': []}
+        blocks = entry['blocks']
+
+        # Rescan from the start of the last (possibly partial) block
+        if blocks:
+            start = blocks.pop()[0]
+        else:
+            start = 0
+
+        count = 0
+        block = None
+        offset = start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                ts = parse_timestamp(raw.decode('utf-8', errors='replace')) if raw.startswith(b'[') else None
+                if ts is not None:
+                    epoch = ts.timestamp()
+                    if block is None or count >= self.block_size:
+                        block = [offset, epoch, epoch]
+                        blocks.append(block)
+                        count = 0
+                    else:
+                        block[1] = min(block[1], epoch)
+                        block[2] = max(block[2], epoch)
+                    count += 1
+                offset += len(raw)
+
+        entry['size'] = offset
+        self._index[key] = entry
+        self._dirty = True
+        return blocks
+
+    def read_entries(self, path, since=None, until=None):
+        """Yield (timestamp, text) for entries of one file within [since, until)"""
+        day = self.archive.day_of(path)
+        if day:
+            yield from self.archive.read_entries(day, since, until)
+            return
+        blocks = self.file_index(path)
+        since_epoch = since.timestamp() if since else None
+        until_epoch = until.timestamp() if until else None
+
+        with open(path, 'rb') as f:
+            for i, (offset, min_ts, max_ts) in enumerate(blocks):
+                if since_epoch is not None and max_ts < since_epoch:
+                    continue
+                if until_epoch is not None and min_ts >= until_epoch:
+                    continue
+                end = blocks[i + 1][0] if i + 1 < len(blocks) else None
+                f.seek(offset)
+                data = f.read(end - offset) if end is not None else f.read()
+                for ts, text in split_entries(data.decode('utf-8', errors='replace')):
+                    if since and ts < since:
+                        continue
+                    if until and ts >= until:
+                        continue
+                    yield ts, text
+
+    def iter_entries(self, since=None, until=None):
+        """Yield (timestamp, text) for entries within [since, until) across all daily files"""
+        for path in self.log_files(since, until):
+            yield from self.read_entries(path, since, until)
+        self.save_index()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Ingestion Metrics
+Dependency-free counters, gauges and latency histograms rendered in the
+Prometheus text exposition format for GET /metrics
+"""
+
+import time
+import logging
+import threading
+from bisect import bisect_left
+
+from admission import CRITICAL_ACTIONS
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond parsing up to slow git pushes
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Label values for webhook_events_total come from payloads, so they are bounded: actions
+# outside the known set count as OTHER, symbols after the first EVENT_SYMBOLS_MAX as 'other'
+EVENT_ACTIONS = frozenset(CRITICAL_ACTIONS + ('UNKNOWN',))
+EVENT_SYMBOLS_MAX = 200
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """`with histogram.labels(...).time():` observes the block's duration"""
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _Family:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Unlabeled metrics are exported (as zero) before the first observation
+            self.labels()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Family):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Family):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self, *values):
+        return self.labels(*values).time()
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter read from a callback at scrape time (queue depths, worker stats)"""
+
+    def __init__(self, name, documentation, callback, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} callback failed: {e}")
+            return lines
+        if value is not None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add `metric`; re-registering a name replaces it (callbacks rebound in main())"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, kind='gauge'):
+        return self.register(CallbackMetric(name, documentation, callback, kind))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Shared across the webhook server, journal writer and git sync worker
+STAGE_SECONDS = REGISTRY.histogram(
+    'ingest_stage_seconds', 'Time spent in each ingestion stage', ['stage'])
+REQUESTS = REGISTRY.counter(
+    'webhook_requests_total', 'HTTP requests by route and response status', ['route', 'status'])
+REQUEST_SECONDS = REGISTRY.histogram(
+    'webhook_request_seconds', 'Time from request start to response by route', ['route'])
+REJECTED = REGISTRY.counter(
+    'webhook_rejected_total', 'Requests or events rejected before journaling', ['reason'])
+ADMISSIONS = REGISTRY.counter(
+    'webhook_admission_total', 'POST admission decisions by priority and outcome', ['priority', 'outcome'])
+EVENTS = REGISTRY.counter(
+    'webhook_events_total', 'Durably journaled trade events by symbol and action', ['symbol', 'action'])
+JOURNAL_BATCH_ENTRIES = REGISTRY.histogram(
+    'journal_batch_entries', 'Entries committed per journal write + fsync', buckets=SIZE_BUCKETS)
+GIT_SYNC_FAILURES = REGISTRY.counter(
+    'git_sync_failures_total', 'Failed git commit/push attempts')
+
+
+_event_symbols = set()
+_event_symbols_lock = threading.Lock()
+
+
+def _event_symbol(symbol):
+    if symbol in _event_symbols:
+        return symbol
+    with _event_symbols_lock:
+        if len(_event_symbols) < EVENT_SYMBOLS_MAX:
+            _event_symbols.add(symbol)
+            return symbol
+    return 'other'
+
+
+def record_events(events):
+    """Journal listener: count durable events per symbol and action"""
+    for event in events:
+        action = event.get('action') or ''
+        EVENTS.labels(_event_symbol(event.get('symbol') or ''),
+                      action if action in EVENT_ACTIONS else 'OTHER').inc()
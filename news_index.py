@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+News Log Index
+Time and keyword/symbol index over crypto-news-monitor/logs/news-YYYY-MM-DD.log,
+extended append-only as the monitor writes so /news never rereads whole files
+"""
+
+import re
+import json
+import heapq
+import bisect
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from normalizer import QUOTE_CURRENCIES
+
+logger = logging.getLogger(__name__)
+
+NEWS_FILE_RE = re.compile(r'^news-(\d{4}-\d{2}-\d{2})\.log$')
+
+# "[2026-02-23 13:31:59] ...", "2026-02-23T13:31 ..." at the start of a line
+LEADING_TS_RE = re.compile(r'^\s*\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)')
+
+# ASCII words, and runs of CJK characters (indexed as bigrams)
+WORD_RE = re.compile(r'[a-z0-9]+|[一-鿿]+')
+
+# Pair-like words: btcusdt -> btc
+PAIR_RE = re.compile(r'([a-z0-9]{2,}?)(?:%s)$' % '|'.join(quote.lower() for quote in QUOTE_CURRENCIES))
+
+
+def tokens(text):
+    """Index terms of a news line or query: lowercase words of 2+ characters, the
+    base of pair-like words (btcusdt -> btc) and bigrams of Chinese text"""
+    terms = set()
+    for word in WORD_RE.findall(text.lower()):
+        if word[0] >= '一':
+            terms.update(word[i:i + 2] for i in range(max(1, len(word) - 1)))
+            continue
+        if len(word) < 2 or word.isdigit():
+            continue
+        terms.add(word)
+        pair = PAIR_RE.fullmatch(word) if len(word) > 4 else None
+        if pair:
+            terms.add(pair.group(1))
+    return terms
+
+
+def line_time(line):
+    match = LEADING_TS_RE.match(line)
+    if match:
+        try:
+            return datetime.fromisoformat(match.group(1))
+        except ValueError:
+            pass
+    return None
+
+
+class NewsIndex:
+    """Inverted index plus sparse time index over news log lines.
+
+    Every non-empty line is one item; a line without a leading timestamp takes
+    the previous line's, or its file's date. Items get ids in the order they
+    are read, postings are ascending id lists, and `blocks` keeps the time
+    range of each `block_size` consecutive ids so a time window only visits
+    the blocks that overlap it.
+
+    The index is persisted as a JSON-lines journal of item and file-checkpoint
+    records that is only ever appended to, so a refresh costs a stat per file
+    plus the new lines. A file that shrank or was replaced triggers a rebuild.
+    """
+
+    def __init__(self, news_dir, index_file=None, block_size=64):
+        self.news_dir = Path(news_dir)
+        self.index_file = Path(index_file) if index_file else None
+        self.block_size = block_size
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.items = []         # (file name, byte offset, byte length, epoch)
+        self.postings = {}      # term -> ascending item ids
+        self.blocks = []        # [min epoch, max epoch] per block_size ids
+        self.files = {}         # file name -> {inode, size, last_ts}
+
+    def __len__(self):
+        return len(self.items)
+
+    def _load(self):
+        if not (self.index_file and self.index_file.exists()):
+            return
+        try:
+            with open(self.index_file, encoding='utf-8') as f:
+                data = f.read()
+            # Decoded as one JSON array; a torn last line is dropped
+            lines = data[:data.rfind('\n') + 1].splitlines()
+            for record in json.loads('[' + ','.join(lines) + ']'):
+                self._apply(record)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable news index {self.index_file}: {e}")
+            self._reset()
+
+    def _apply(self, record):
+        if record[0] == 'file':
+            _, name, inode, size, last_ts = record
+            self.files[name] = {'inode': inode, 'size': size, 'last_ts': last_ts}
+            return
+
+        _, name, offset, length, epoch, terms = record
+        item_id = len(self.items)
+        self.items.append((name, offset, length, epoch))
+        postings = self.postings
+        for term in terms:
+            if term in postings:
+                postings[term].append(item_id)
+            else:
+                postings[term] = [item_id]
+        if item_id % self.block_size == 0:
+            self.blocks.append([epoch, epoch])
+        else:
+            block = self.blocks[-1]
+            if epoch < block[0]:
+                block[0] = epoch
+            elif epoch > block[1]:
+                block[1] = epoch
+
+    def news_files(self):
+        return sorted(path for path in self.news_dir.glob('news-*.log') if NEWS_FILE_RE.match(path.name))
+
+    def refresh(self):
+        """Index lines appended since the last refresh; returns the number of new items"""
+        paths = self.news_files()
+        for path in paths:
+            entry = self.files.get(path.name)
+            stat = path.stat()
+            if entry and (entry['inode'] != stat.st_ino or stat.st_size < entry['size']):
+                logger.info(f"{path.name} was rewritten, rebuilding the news index")
+                self._reset()
+                if self.index_file and self.index_file.exists():
+                    self.index_file.unlink()
+                break
+
+        before = len(self.items)
+        records = []
+        for path in paths:
+            records.extend(self._scan(path))
+        if records and self.index_file:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, 'a') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        return len(self.items) - before
+
+    def _scan(self, path):
+        """Records for the complete lines added to `path`, applied as they are built"""
+        stat = path.stat()
+        entry = self.files.get(path.name) or {'inode': stat.st_ino, 'size': 0, 'last_ts': None}
+        if stat.st_size == entry['size']:
+            return []
+
+        with open(path, 'rb') as f:
+            f.seek(entry['size'])
+            data = f.read(stat.st_size - entry['size'])
+        # A line still being written is picked up by the next refresh
+        data = data[:data.rfind(b'\n') + 1]
+        if not data:
+            return []
+
+        last_ts = entry['last_ts']
+        if last_ts is None:
+            last_ts = datetime.strptime(NEWS_FILE_RE.match(path.name).group(1), '%Y-%m-%d').timestamp()
+
+        records = []
+        offset = entry['size']
+        for raw in data.splitlines(keepends=True):
+            text = raw.decode('utf-8', errors='replace').strip()
+            if text:
+                ts = line_time(text)
+                if ts is not None:
+                    last_ts = ts.timestamp()
+                record = ['item', path.name, offset, len(raw), last_ts, sorted(tokens(text))]
+                self._apply(record)
+                records.append(record)
+            offset += len(raw)
+
+        record = ['file', path.name, stat.st_ino, offset, last_ts]
+        self._apply(record)
+        records.append(record)
+        return records
+
+    def _candidates(self, since, until, keywords):
+        """Ids of the items in [since, until) holding every keyword term"""
+        since_epoch = since.timestamp() if since else None
+        until_epoch = until.timestamp() if until else None
+
+        # Only ids inside blocks that overlap the window can match
+        blocks = [
+            block for block, (min_ts, max_ts) in enumerate(self.blocks)
+            if not (since_epoch is not None and max_ts < since_epoch)
+            and not (until_epoch is not None and min_ts >= until_epoch)
+        ]
+        if not blocks:
+            return
+        first, last = blocks[0] * self.block_size, min(len(self.items), (blocks[-1] + 1) * self.block_size)
+
+        lists = []
+        for keyword in keywords:
+            for term in tokens(keyword):
+                lists.append(self.postings.get(term, []))
+        if lists:
+            # Walk the rarest term's postings within the range, probe the others
+            lists.sort(key=len)
+            ids = lists[0][bisect.bisect_left(lists[0], first):bisect.bisect_left(lists[0], last)]
+        else:
+            ids = [item_id for block in blocks
+                   for item_id in range(block * self.block_size, min(last, (block + 1) * self.block_size))]
+
+        for item_id in ids:
+            epoch = self.items[item_id][3]
+            if since_epoch is not None and epoch < since_epoch:
+                continue
+            if until_epoch is not None and epoch >= until_epoch:
+                continue
+            if all(self._contains(postings, item_id) for postings in lists[1:]):
+                yield item_id
+
+    @staticmethod
+    def _contains(postings, item_id):
+        i = bisect.bisect_left(postings, item_id)
+        return i < len(postings) and postings[i] == item_id
+
+    def search(self, since=None, until=None, keywords=(), limit=10):
+        """(total matches, newest `limit` matches as (datetime, text) oldest first).
+
+        A line matches when it has every index term of every keyword, so `BTC`
+        also finds BTCUSDT. Chinese keywords are indexed as bigrams and are
+        confirmed against the line text, as are keywords without index terms
+        (`$`, `5`, `x`), which are matched as substrings like /news did before.
+        """
+        needles = [keyword.lower() for keyword in keywords
+                   if re.search('[一-鿿]', keyword) or not tokens(keyword)]
+        handles = {}
+
+        def read(item_id):
+            name, offset, length, _ = self.items[item_id]
+            f = handles.get(name)
+            if f is None:
+                f = handles[name] = open(self.news_dir / name, 'rb')
+            f.seek(offset)
+            return f.read(length).decode('utf-8', errors='replace').rstrip()
+
+        try:
+            matches = []
+            for item_id in self._candidates(since, until, keywords):
+                if needles:
+                    lowered = read(item_id).lower()
+                    if not all(needle in lowered for needle in needles):
+                        continue
+                matches.append(item_id)
+            newest = heapq.nlargest(limit, matches, key=lambda item_id: (self.items[item_id][3], item_id))
+            found = [(datetime.fromtimestamp(self.items[item_id][3]), read(item_id)) for item_id in reversed(newest)]
+        finally:
+            for f in handles.values():
+                f.close()
+        return len(matches), found
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Trading Payload Normalizer
+Per-source field-alias tables compiled once into extractor functions that turn
+heterogeneous webhook payloads into one normalized event shape
+"""
+
+import re
+import json
+import logging
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('action', 'symbol', 'side', 'price', 'quantity', 'order_id', 'pnl', 'fee', 'leverage')
+
+# Field -> aliases tried in order; "a.b" looks up a nested object
+SOURCES = {
+    'default': {
+        'action': ('action', 'type'),
+        'symbol': ('symbol', 'pair', 'instrument', 'ticker'),
+        'side': ('side', 'direction', 'type'),
+        'price': ('price', 'entry_price', 'fill_price', 'exit_price'),
+        'quantity': ('quantity', 'qty', 'size'),
+        'order_id': ('order_id', 'id', 'trade_id'),
+        'pnl': ('pnl', 'profit_loss'),
+        'fee': ('fee', 'fees', 'commission'),
+        'leverage': ('leverage', 'lever'),
+    },
+    # Alert message templates built from {{ticker}}, {{strategy.order.*}} placeholders
+    'tradingview': {
+        'action': ('action', 'strategy.order.action', 'order_action'),
+        'symbol': ('ticker', 'symbol'),
+        'side': ('market_position', 'strategy.market_position', 'side'),
+        'price': ('price', 'strategy.order.price', 'close'),
+        'quantity': ('contracts', 'strategy.order.contracts', 'quantity', 'qty'),
+        'order_id': ('order_id', 'strategy.order.id', 'id'),
+        'pnl': ('pnl', 'profit', 'strategy.order.profit'),
+        'fee': ('fee', 'commission'),
+        'leverage': ('leverage',),
+    },
+}
+
+QUOTE_CURRENCIES = ('FDUSD', 'USDT', 'USDC', 'BUSD', 'TUSD', 'USD', 'EUR', 'BTC', 'ETH', 'BNB')
+
+# Plain-text notifications: "OPEN CROSS BTCUSDT LONG Entry: 52340.5 qty: 0.1 ..."
+TEXT_HEAD_RE = re.compile(
+    r'^\s*(?P<action>OPEN|CLOSE|ADD|REDUCE|BUY|SELL|TP|SL)\s+'
+    r'(?:(?:CROSS|ISOLATED)\s+)?(?P<symbol>[A-Za-z0-9/:._-]+)'
+    r'(?:\s+(?P<side>LONG|SHORT|BUY|SELL)\b)?', re.IGNORECASE)
+TEXT_FIELD_RE = re.compile(r'(@|[A-Za-z_]+):?\s*([+-]?\d[\d,]*(?:\.\d+)?(?:[eE][+-]?\d+)?)')
+NUMBER_RE = re.compile(r'\s*([+-]?\d[\d,]*(?:\.\d+)?(?:[eE][+-]?\d+)?)')
+TEXT_KEYS = {
+    '@': 'price', 'price': 'price', 'entry': 'price', 'exit': 'price',
+    'qty': 'quantity', 'quantity': 'quantity', 'size': 'quantity',
+    'pnl': 'pnl', 'order_id': 'order_id', 'id': 'order_id',
+    'fee': 'fee', 'commission': 'fee', 'leverage': 'leverage',
+}
+
+
+_CONTAINERS = frozenset((dict, list))
+_NUMBERS = frozenset((int, float))
+
+
+class MalformedEvent(ValueError):
+    """Payload cannot be turned into a trading event; rejected before it is journaled"""
+
+
+@lru_cache(maxsize=4096)
+def normalize_symbol(symbol):
+    """Canonical BASE/QUOTE form: 'BINANCE:btcusdt.P', 'BTC-USDT', 'BTCUSDT' -> 'BTC/USDT'"""
+    symbol = str(symbol).strip().upper()
+    symbol = symbol.rsplit(':', 1)[-1]
+    if symbol.endswith('.P'):
+        symbol = symbol[:-2]
+    for sep in ('-', '_'):
+        symbol = symbol.replace(sep, '/')
+    if '/' in symbol:
+        return symbol
+    for quote in QUOTE_CURRENCIES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return f"{symbol[:-len(quote)]}/{quote}"
+    return symbol
+
+
+def compact_symbol(symbol):
+    """Exchange form of a symbol: 'BTC/USDT' -> 'BTCUSDT'"""
+    return normalize_symbol(symbol).replace('/', '')
+
+
+def coerce_number(value):
+    """int/float for numeric values and numeric strings ('1,200', '+23.95 USDT', '10x', '1e-5')"""
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return value
+    match = NUMBER_RE.match(value) if isinstance(value, str) else None
+    if not match:
+        raise ValueError(value)
+    number = match.group(1).replace(',', '')
+    return int(number) if number.lstrip('+-').isdigit() else float(number)
+
+
+def _path(payload, keys):
+    for key in keys:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+def compile_source(table, finish=None):
+    """Compile an alias table into a single payload -> normalized event function.
+
+    The alias chain for each field is generated as straight-line code
+    (`x = get('a')` / `if x is None: x = get('b')`), so only the aliases that
+    are actually needed get looked up and nothing is re-parsed per request.
+    The resolved fields are passed positionally to `finish` (_normalize).
+    """
+    lines = ['def extract(payload):', '    get = payload.get']
+    for field in FIELDS:
+        for i, alias in enumerate(table.get(field, (field,))):
+            if '.' in alias:
+                lookup = f"_path(payload, {tuple(alias.split('.'))!r})"
+            else:
+                lookup = f"get({alias!r})"
+            lines.append(f"    {field} = {lookup}" if i == 0 else f"    if {field} is None: {field} = {lookup}")
+    lines.append(f"    return _finish({', '.join(FIELDS)})")
+
+    namespace = {'_path': _path, '_finish': finish or _normalize}
+    exec('\n'.join(lines), namespace)
+    return namespace['extract']
+
+
+def _number(value):
+    """An unparseable value ('N/A', '') is dropped, not rejected: the event is still journaled"""
+    if value is None or type(value) in _NUMBERS:
+        return value
+    try:
+        return coerce_number(value)
+    except ValueError:
+        return None
+
+
+def _normalize(action, symbol, side, price, quantity, order_id, pnl, fee=None, leverage=None):
+    # A payload with neither an action nor a symbol is kept as an informational UNKNOWN event
+    if (type(action) in _CONTAINERS or type(symbol) in _CONTAINERS
+            or type(side) in _CONTAINERS or type(order_id) in _CONTAINERS):
+        raise MalformedEvent("action, symbol, side and order_id must be scalars")
+
+    # Numbers already decoded as int/float by json skip coercion entirely
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'action': 'UNKNOWN' if action is None else str(action).strip().upper(),
+        'symbol': None if symbol is None else normalize_symbol(symbol),
+        'side': None if side is None else str(side).strip().upper(),
+        'price': price if price is None or type(price) in _NUMBERS else _number(price),
+        'quantity': quantity if quantity is None or type(quantity) in _NUMBERS else _number(quantity),
+        'order_id': None if order_id is None else str(order_id),
+        'pnl': pnl if pnl is None or type(pnl) in _NUMBERS else _number(pnl),
+        'fee': _number(fee),
+        'leverage': _number(leverage)
+    }
+
+
+def parse_text(text):
+    """Normalize a plain-text notification line"""
+    head = TEXT_HEAD_RE.match(text)
+    if not head:
+        raise MalformedEvent("unrecognized text notification")
+    raw = dict.fromkeys(FIELDS)
+    raw.update(action=head.group('action'), symbol=head.group('symbol'), side=head.group('side'))
+    for key, value in TEXT_FIELD_RE.findall(text[head.end():]):
+        field = TEXT_KEYS.get(key.lower())
+        if field and raw[field] is None:
+            raw[field] = value
+    return _normalize(**raw)
+
+
+class PayloadNormalizer:
+    """Selects a compiled source extractor and normalizes a decoded payload.
+
+    Built-in SOURCES can be extended or overridden with a JSON file of the same
+    shape ({"source": {"field": ["alias", ...]}}); tables are compiled once here,
+    so per-request work is a handful of dict lookups.
+    """
+
+    def __init__(self, sources_file=None, default_source='default'):
+        tables = {name: dict(table) for name, table in SOURCES.items()}
+        if sources_file and Path(sources_file).exists():
+            with open(sources_file) as f:
+                for name, table in json.load(f).items():
+                    tables.setdefault(name, dict(SOURCES['default'])).update(
+                        {field: tuple(aliases) for field, aliases in table.items()})
+            logger.info(f"Loaded payload sources from {sources_file}")
+
+        self.default_source = default_source
+        self.extractors = {name: compile_source(table) for name, table in tables.items()}
+
+    def source_for(self, name=None):
+        if name and name in self.extractors:
+            return name
+        return self.default_source
+
+    def normalize(self, payload, source=None):
+        """Return the normalized event, or raise MalformedEvent"""
+        if isinstance(payload, dict):
+            if len(payload) == 1 and isinstance(payload.get('raw'), str):
+                try:
+                    return parse_text(payload['raw'])
+                except MalformedEvent:
+                    # Free-form text is still journaled, as an UNKNOWN event
+                    return _normalize(*(None,) * len(FIELDS))
+            return self.extractors[self.source_for(source)](payload)
+        raise MalformedEvent(f"expected a JSON object, got {type(payload).__name__}")
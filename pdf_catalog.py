@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+PDF Report Catalog
+Index of crypto-news-monitor/pdf_reports by covered time window and mtime,
+rescanned only when the directory changes, so /pdf-list and /pdf-latest skip
+the glob and stat of every report and /pdf can reuse a report that already
+covers the requested window
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# "news_report_20260223_1331.pdf", "report-2026-02-23T13-31-59-24h.pdf", ...
+REPORT_TS_RE = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})[_T -]?(\d{2})[-:]?(\d{2})(?:[-:]?(\d{2}))?')
+REPORT_HOURS_RE = re.compile(r'(?<![0-9a-z])(\d+)h(?![a-z])', re.IGNORECASE)
+
+# Reports modified this recently may still be being written, and are re-stat'ed
+# even when the directory itself is unchanged
+SETTLE_SECONDS = 60
+
+
+def report_window(name, mtime):
+    """(start, end) epoch seconds covered by a report, from its file name when it
+    carries a timestamp and/or an `Nh` span; the end defaults to the mtime and an
+    unknown start is None"""
+    end = mtime
+    match = REPORT_TS_RE.search(name)
+    if match:
+        try:
+            end = datetime(*(int(part or 0) for part in match.groups())).timestamp()
+        except ValueError:
+            pass
+    hours = REPORT_HOURS_RE.search(name)
+    start = end - int(hours.group(1)) * 3600 if hours else None
+    return start, end
+
+
+class PdfCatalog:
+    """Catalog of generated PDF reports.
+
+    Each report is kept as {size, mtime, start, end}: `start`/`end` is the time
+    window the report covers, recorded when /pdf generated it or parsed from
+    the file name. The catalog is persisted to `index_file`; `refresh()` only
+    lists the directory when its mtime changed (a report was added, renamed or
+    removed), and only stats new reports and those still settling.
+
+    `evict()` enforces the age and total-size limits, oldest reports first, on
+    the reports /pdf generated (`recorded`) only; the directory belongs to the
+    news monitor, so nothing else in it is deleted. The newest recorded report
+    is always kept. A limit of 0 disables it, and both are off by default.
+    """
+
+    def __init__(self, reports_dir, index_file=None, max_age_days=0, max_total_mb=0):
+        self.reports_dir = Path(reports_dir)
+        self.index_file = Path(index_file) if index_file else None
+        self.max_age_days = max_age_days
+        self.max_total_mb = max_total_mb
+        self.reports = {}       # file name -> {size, mtime, start, end}
+        self.dir_mtime = None
+        self.scanned_at = 0
+        self._dirty = False
+        self._order = None      # names, most recently written first
+        self._load()
+
+    def _load(self):
+        if not (self.index_file and self.index_file.exists()):
+            return
+        try:
+            with open(self.index_file) as f:
+                state = json.load(f)
+            self.reports = state['reports']
+            self.dir_mtime = state['dir_mtime']
+            self.scanned_at = state['scanned_at']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable PDF catalog {self.index_file}: {e}")
+            self.reports, self.dir_mtime, self.scanned_at = {}, None, 0
+
+    def save(self):
+        """Persist the catalog if it changed"""
+        if not (self.index_file and self._dirty):
+            return
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'dir_mtime': self.dir_mtime, 'scanned_at': self.scanned_at, 'reports': self.reports}, f)
+        os.replace(tmp, self.index_file)
+        self._dirty = False
+
+    def refresh(self):
+        """Bring the catalog up to date with the directory; returns the number of
+        reports added, changed or removed"""
+        try:
+            dir_mtime = self.reports_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        now = time.time()
+
+        settling = [name for name, report in self.reports.items()
+                    if report['mtime'] >= self.scanned_at - SETTLE_SECONDS]
+        if dir_mtime is None:
+            changed, names = len(self.reports), []
+            self.reports = {}
+        elif dir_mtime == self.dir_mtime:
+            changed, names = 0, settling
+        else:
+            listed = {entry.name for entry in os.scandir(self.reports_dir)
+                      if entry.name.endswith('.pdf') and entry.is_file()}
+            gone = set(self.reports) - listed
+            for name in gone:
+                del self.reports[name]
+            changed = len(gone)
+            names = [name for name in listed if name not in self.reports] + [
+                name for name in settling if name in listed]
+
+        for name in names:
+            try:
+                stat = (self.reports_dir / name).stat()
+            except FileNotFoundError:
+                self.reports.pop(name, None)
+                changed += 1
+                continue
+            report = self.reports.get(name)
+            if report and (report['size'], report['mtime']) == (stat.st_size, stat.st_mtime):
+                continue
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime}
+            if report and report.get('recorded'):
+                # Keep the window /pdf asked for; the file was still being written
+                entry.update(start=report['start'], end=report['end'], recorded=True)
+            else:
+                entry['start'], entry['end'] = report_window(name, stat.st_mtime)
+            self.reports[name] = entry
+            changed += 1
+
+        if changed or dir_mtime != self.dir_mtime:
+            self._dirty = True
+            self._order = None
+        self.dir_mtime = dir_mtime
+        self.scanned_at = now
+        return changed
+
+    def _names(self):
+        """Report names, most recently written first"""
+        if self._order is None:
+            self._order = sorted(self.reports, key=lambda name: (self.reports[name]['mtime'], name), reverse=True)
+        return self._order
+
+    def newest(self, limit=None):
+        """(name, report) pairs, most recently written first"""
+        names = self._names()[:limit] if limit else self._names()
+        return [(name, self.reports[name]) for name in names]
+
+    def latest(self):
+        reports = self.newest(1)
+        return self.reports_dir / reports[0][0] if reports else None
+
+    def find(self, start, end, slack=900):
+        """Newest report of the same window as [start, end], to within `slack` seconds
+        at either edge (a 24h report does not answer a 1h request)"""
+        for name in self._names():
+            report = self.reports[name]
+            if report['start'] is None:
+                continue
+            if abs(report['start'] - start) <= slack and end - slack <= report['end'] <= end + slack:
+                return self.reports_dir / name
+        return None
+
+    def record(self, since, start, end):
+        """Tag the newest report written at or after `since` with the window /pdf
+        asked for; returns its path, or None if no new report appeared"""
+        for name in self._names():
+            report = self.reports[name]
+            if report['mtime'] < since:
+                break
+            report.update(start=start, end=end, recorded=True)
+            self._dirty = True
+            return self.reports_dir / name
+        return None
+
+    def evict(self, now=None):
+        """Delete recorded reports beyond the age and total-size limits; returns their names"""
+        if not (self.max_age_days or self.max_total_mb):
+            return []
+        now = now or time.time()
+        reports = [(name, report) for name, report in self.newest() if report.get('recorded')]
+        total = sum(report['size'] for _, report in reports[:1])
+        removed = []
+        for name, report in reports[1:]:
+            too_old = self.max_age_days and report['mtime'] < now - self.max_age_days * 86400
+            too_big = self.max_total_mb and total + report['size'] > self.max_total_mb * 1024 * 1024
+            if too_old or too_big:
+                removed.append(name)
+            else:
+                total += report['size']
+
+        for name in removed:
+            try:
+                (self.reports_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not evict PDF report {name}: {e}")
+                continue
+            del self.reports[name]
+            self._dirty = True
+            self._order = None
+            logger.info(f"Evicted PDF report {name}")
+        return removed
+
+
+def format_window(report):
+    """'02-22 13:00 → 02-23 13:00' for a catalog entry, or '' when the start is unknown"""
+    if report['start'] is None:
+        return ''
+    start = datetime.fromtimestamp(report['start'])
+    end = datetime.fromtimestamp(report['end'])
+    return f"{start:%m-%d %H:%M} → {end:%m-%d %H:%M}"
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Trade Store Reindex
+Parses every daily log (raw and archived) across a process pool and bulk-loads
+the normalized events into the trade store, skipping days unchanged since the
+last run
+
+    python3 reindex.py                  # load new and changed days
+    python3 reindex.py --force          # reparse everything (e.g. after a parser fix)
+    python3 reindex.py --workers 8 --include-today
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from log_reader import LogReader, LOG_FILE_RE, parse_timestamp, split_entries
+from log_archive import LogArchive, RAW_PREFIX, SOURCE_PREFIX
+from normalizer import PayloadNormalizer, MalformedEvent, parse_text
+from trade_store import TradeStore, event_row
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).parent
+
+# Bump when entry_event() changes so every day is parsed again
+PARSER_VERSION = 3
+
+_normalizer = None
+
+
+def entry_event(ts, head, payload, normalizer, source=None):
+    """Normalized event for one log entry, or None for non-trade entries.
+
+    The decoded `# Raw:` payload is preferred when there is one, normalized with
+    the entry's `# Source:` schema (the default when it has none); otherwise the
+    entry's first line after the timestamp (`head`) is parsed as text:
+    format_log_entry output, hand-written "OPEN CROSS ... Entry:" lines and
+    `TELEGRAM` messages. The timestamp is the entry's own.
+    """
+    event = None
+    if payload is not None:
+        try:
+            event = normalizer.normalize(payload, source)
+        except MalformedEvent:
+            event = None
+    if event is None:
+        if head.startswith('TELEGRAM '):
+            head = head[len('TELEGRAM '):]
+        try:
+            event = parse_text(head)
+        except MalformedEvent:
+            return None
+    event['timestamp'] = ts.isoformat()
+    return event
+
+
+def entry_source(lines):
+    """Source schema recorded by format_log_entry, or None"""
+    for line in lines[1:]:
+        if line.startswith(SOURCE_PREFIX):
+            return line[len(SOURCE_PREFIX):].strip()
+    return None
+
+
+def log_entries(data):
+    """(timestamp, head, payload, source) for the entries of a raw log file"""
+    for ts, text in split_entries(data.decode('utf-8', errors='replace')):
+        lines = text.split('\n')
+        payload = None
+        if len(lines) > 1 and lines[-1].startswith(RAW_PREFIX):
+            try:
+                payload = json.loads(lines[-1][len(RAW_PREFIX):])
+            except ValueError:
+                pass
+        yield ts, lines[0][lines[0].find(']') + 1:].strip(), payload, entry_source(lines)
+
+
+def archive_entries(archive, day):
+    """(timestamp, head, payload, source) for an archived day; the payload is already decoded"""
+    for record in archive.read_records(day):
+        ts = parse_timestamp(f"[{record['ts']}]")
+        if ts is not None:
+            lines = record['text'].split('\n')
+            yield ts, lines[0].strip(), record['raw'], entry_source(lines)
+
+
+def parse_day(logs_dir, day, paths, sources_file=None):
+    """Worker: parse one day's files into event_row tuples.
+
+    Returns (day, sha256 of the files, rows, entries that are not trades).
+    """
+    global _normalizer
+    if _normalizer is None:
+        _normalizer = PayloadNormalizer(sources_file)
+
+    archive = LogArchive(logs_dir)
+    log_file = str(Path(logs_dir) / f"{day}.log")
+    digest = hashlib.sha256()
+    rows = []
+    skipped = 0
+    for path in map(Path, paths):
+        data = path.read_bytes()
+        digest.update(data)
+        entries = archive_entries(archive, day) if archive.day_of(path) else log_entries(data)
+        for ts, head, payload, source in entries:
+            event = entry_event(ts, head, payload, _normalizer, source)
+            if event is None:
+                skipped += 1
+                continue
+            event['log_file'] = log_file
+            rows.append(event_row(event))
+    return day, digest.hexdigest(), rows, skipped
+
+
+def fingerprint(paths):
+    """Cheap change check: name, size and mtime of every file of a day"""
+    stats = []
+    for path in paths:
+        stat = path.stat()
+        stats.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return json.dumps(stats)
+
+
+def day_files(logs_dir):
+    """{day: [archive and/or raw log path]} for every day with entries"""
+    reader = LogReader(logs_dir)
+    days = {}
+    for path in reader.log_files():
+        day = reader.archive.day_of(path)
+        if not day:
+            day = LOG_FILE_RE.match(path.name).group(1)
+        days.setdefault(day, []).append(path)
+    return days
+
+
+def reindex(logs_dir, store, workers=None, force=False, include_today=False, sources_file=None):
+    """Load every new or changed day into `store`; returns counters for the run"""
+    start = time.perf_counter()
+    logs_dir = Path(logs_dir)
+    days = day_files(logs_dir)
+    if not include_today:
+        # The journal is still appending to today's file
+        days.pop(datetime.now().strftime('%Y-%m-%d'), None)
+
+    checkpoints = store.reindex_checkpoints()
+    fingerprints = {day: fingerprint(paths) for day, paths in days.items()}
+    todo = [
+        day for day in sorted(days)
+        if force or day not in checkpoints
+        or checkpoints[day]['fingerprint'] != fingerprints[day]
+        or checkpoints[day]['parser_version'] != PARSER_VERSION
+    ]
+    stats = {'days': len(days), 'parsed': 0, 'loaded': 0, 'unchanged': 0, 'events': 0, 'skipped_entries': 0}
+
+    def load(day, sha256, rows, skipped):
+        stats['parsed'] += 1
+        stats['skipped_entries'] += skipped
+        previous = checkpoints.get(day)
+        checkpoint = {
+            'day': day, 'fingerprint': fingerprints[day], 'sha256': sha256,
+            'parser_version': PARSER_VERSION, 'events': len(rows),
+            'first_ts': min((row[0] for row in rows), default=None),
+            'last_ts': max((row[0] for row in rows), default=None),
+            'indexed_at': datetime.now().isoformat(),
+        }
+        if (not force and previous and previous['sha256'] == sha256
+                and previous['parser_version'] == PARSER_VERSION):
+            # Touched (e.g. by a checkout) but identical: just refresh the fingerprint
+            checkpoint.update(events=previous['events'], first_ts=previous['first_ts'], last_ts=previous['last_ts'])
+            store.save_reindex_checkpoint(checkpoint)
+            stats['unchanged'] += 1
+            return
+
+        # Replace what this day's file produced before, wherever its timestamps fell
+        date = datetime.strptime(day, '%Y-%m-%d')
+        bounds = [(date - timedelta(days=1)).isoformat(), (date + timedelta(days=2)).isoformat()]
+        for item in (checkpoint, previous or {}):
+            if item.get('first_ts'):
+                bounds[0] = min(bounds[0], item['first_ts'])
+                bounds[1] = max(bounds[1], item['last_ts'] + '~')
+        store.replace_log_rows(logs_dir / f"{day}.log", rows, *bounds)
+        store.save_reindex_checkpoint(checkpoint)
+        stats['loaded'] += 1
+        stats['events'] += len(rows)
+
+    jobs = [(str(logs_dir), day, [str(path) for path in days[day]], sources_file) for day in todo]
+    if len(jobs) <= 1 or workers == 1:
+        for job in jobs:
+            load(*parse_day(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            for future in as_completed([pool.submit(parse_day, *job) for job in jobs]):
+                load(*future.result())
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs-dir', default=os.environ.get('LOGS_DIR') or str(SCRIPT_DIR / 'logs'))
+    parser.add_argument('--db', default=os.environ.get('TRADE_DB') or str(SCRIPT_DIR / 'trades.db'))
+    parser.add_argument('--workers', type=int, help='parser processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='reparse and reload every day')
+    parser.add_argument('--include-today', action='store_true',
+                        help="also load today's log (only while the webhook server is stopped)")
+    parser.add_argument('--sources-file', default=os.environ.get('PAYLOAD_SOURCES_FILE')
+                        or str(SCRIPT_DIR / 'payload_sources.json'))
+    parser.add_argument('--aggregates', default=str(SCRIPT_DIR / '.cache' / 'aggregates.json'),
+                        help='aggregate snapshot to invalidate when rows change')
+    parser.add_argument('--analytics', default=str(SCRIPT_DIR / '.cache' / 'analytics.npz'),
+                        help='analytics snapshot to invalidate when rows change')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = TradeStore(args.db)
+    stats = reindex(args.logs_dir, store, workers=args.workers, force=args.force,
+                    include_today=args.include_today, sources_file=args.sources_file)
+
+    for snapshot in (args.aggregates, args.analytics):
+        if stats['loaded'] and os.path.exists(snapshot):
+            # Replaced rows get new ids and bump the store generation, which running
+            # servers pick up by themselves; the stale file is just dropped
+            os.remove(snapshot)
+            logger.info(f"Removed {snapshot}; it is rebuilt from the store on next load")
+
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,10 +15,10 @@ echo "========================="
 echo ""
 
 # Check if webhook server is running
-if ! systemctl is-active --quiet telegram-webhook; then
+if ! systemctl is-active --quiet trading-webhook; then
     echo "❌ Webhook server is not running"
     echo "Starting webhook server..."
-    systemctl start telegram-webhook
+    systemctl start trading-webhook
 fi
 
 echo "✅ Webhook server is running on port $WEBHOOK_PORT"
@@ -49,7 +49,7 @@ echo "$TUNNEL_PID" > "$SCRIPT_DIR/.tunnel_pid"
 # Set Telegram webhook
 echo "📡 Configuring Telegram webhook..."
 WEBHOOK_RESPONSE=$(curl -s -X POST "https://api.telegram.org/bot${TELEGRAM_BOT_TOKEN}/setWebhook" \
-  -d "url=${TUNNEL_URL}" \
+  -d "url=${TUNNEL_URL}/telegram" \
   -d "allowed_updates=[\"message\"]")
 
 WEBHOOK_OK=$(echo "$WEBHOOK_RESPONSE" | jq -r '.ok')
@@ -57,7 +57,7 @@ WEBHOOK_OK=$(echo "$WEBHOOK_RESPONSE" | jq -r '.ok')
 if [ "$WEBHOOK_OK" = "true" ]; then
     echo "✅ Webhook configured successfully!"
     echo ""
-    echo "Webhook URL: $TUNNEL_URL"
+    echo "Webhook URL: $TUNNEL_URL/telegram"
     echo "Chat ID: $TELEGRAM_CHAT_ID"
     echo ""
     echo "📝 Test by sending a message to the Telegram group"
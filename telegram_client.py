@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Outbound HTTP / Telegram Client
+Pooled keep-alive sessions, per-call timeouts, 429/5xx backoff and a bounded async send queue
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
+
+# (connect, read) seconds; uploads get a longer read timeout
+DEFAULT_TIMEOUT = (5, 30)
+UPLOAD_TIMEOUT = (5, 120)
+
+
+# Methods that can be resent after a read timeout without repeating their effect
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class OutboundClient:
+    """Shared keep-alive session with timeouts and retry/backoff.
+
+    Retries connection errors, 429 and 5xx responses with exponential backoff,
+    and read timeouts for idempotent methods only: a POST that timed out
+    waiting for the answer (sendMessage, sendDocument) may have been accepted,
+    and resending it would post it twice. On 429 the server's retry hint
+    (Telegram's `parameters.retry_after` or the Retry-After header) takes
+    precedence over the backoff schedule; no wait is longer than
+    `max_backoff`, and a hint beyond it returns the 429 instead of sleeping.
+    """
+
+    def __init__(self, pool_size=8, timeout=DEFAULT_TIMEOUT, max_retries=3, backoff=1.0, max_backoff=30.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        max_retries = self.max_retries if retries is None else retries
+        files = kwargs.get('files') or {}
+        for attempt in range(max_retries + 1):
+            # Rewind uploads so a retry resends the whole file
+            for f in files.values():
+                if hasattr(f, 'seek'):
+                    f.seek(0)
+
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # ConnectTimeout is a ConnectionError: the request never went out
+                read_timeout = not isinstance(e, requests.ConnectionError)
+                if attempt == max_retries or (read_timeout and method.upper() not in IDEMPOTENT_METHODS):
+                    raise
+                logger.warning(f"{method} {url.split('/bot')[0]} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code == 429:
+                    delay = self._retry_after(response, delay)
+                    if delay > self.max_backoff:
+                        logger.warning(f"{method} {url.split('/bot')[0]} rate limited for {delay:.0f}s, giving up")
+                        return response
+                elif response.status_code < 500:
+                    return response
+                if attempt == max_retries:
+                    return response
+                logger.warning(f"{method} {url.split('/bot')[0]} returned {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def _retry_after(self, response, default):
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            pass
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return default
+
+    def close(self):
+        self.session.close()
+
+
+class TelegramClient:
+    """Bot API client with an async send queue.
+
+    send_* calls block and return the decoded API response; send_*_async queue
+    the call on a small worker pool (bounded concurrency) and return a Future, so
+    several reports and alerts can go out without serializing behind one slow
+    upload. Sends to the same chat are spaced at least `min_interval` seconds
+    apart to stay under Telegram's per-chat limits.
+    """
+
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, client=None,
+                 max_concurrency=4, min_interval=1.0):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_url = api_url.rstrip('/')
+        self.client = client or OutboundClient(pool_size=max_concurrency)
+        self.min_interval = min_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='telegram-send')
+        self._throttle_lock = threading.Lock()
+        self._next_send_at = {}
+
+    def _throttle(self, chat_id):
+        with self._throttle_lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_send_at.get(chat_id, now))
+            self._next_send_at[chat_id] = send_at + self.min_interval
+        if send_at > now:
+            time.sleep(send_at - now)
+
+    def call(self, method, timeout=None, **kwargs):
+        """Call a Bot API method and return the decoded JSON response"""
+        self._throttle(kwargs.get('data', {}).get('chat_id', self.chat_id))
+        response = self.client.post(f"{self.api_url}/bot{self.token}/{method}", timeout=timeout, **kwargs)
+        try:
+            return response.json()
+        except ValueError:
+            return {'ok': False, 'error_code': response.status_code, 'description': response.text[:200]}
+
+    def send_message(self, text, chat_id=None):
+        return self.call('sendMessage', data={'chat_id': chat_id or self.chat_id, 'text': text})
+
+    def send_document(self, path, caption=None, chat_id=None):
+        data = {'chat_id': chat_id or self.chat_id}
+        if caption:
+            data['caption'] = caption
+        with open(path, 'rb') as f:
+            return self.call('sendDocument', timeout=UPLOAD_TIMEOUT, data=data, files={'document': f})
+
+    def send_message_async(self, text, chat_id=None):
+        return self._executor.submit(self.send_message, text, chat_id)
+
+    def send_document_async(self, path, caption=None, chat_id=None):
+        return self._executor.submit(self.send_document, path, caption, chat_id)
+
+    def close(self, wait=True):
+        """Finish queued sends and release pooled connections"""
+        self._executor.shutdown(wait=wait)
+        self.client.close()
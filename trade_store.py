@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Structured Trade Store
+SQLite (WAL mode) table of normalized trade events, written alongside the daily text logs
+"""
+
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    day       TEXT NOT NULL,
+    action    TEXT,
+    symbol    TEXT,
+    side      TEXT,
+    price     REAL,
+    quantity  REAL,
+    order_id  TEXT,
+    pnl       REAL,
+    log_file  TEXT,
+    fee       REAL,
+    leverage  REAL
+);
+CREATE INDEX IF NOT EXISTS trades_timestamp ON trades (timestamp);
+CREATE INDEX IF NOT EXISTS trades_symbol_timestamp ON trades (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS trades_order_id ON trades (order_id);
+
+-- One row per day loaded by reindex.py: what was parsed, so unchanged days are skipped
+CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+    day            TEXT PRIMARY KEY,
+    fingerprint    TEXT NOT NULL,
+    sha256         TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    events         INTEGER NOT NULL,
+    first_ts       TEXT,
+    last_ts        TEXT,
+    indexed_at     TEXT NOT NULL
+);
+
+-- Store-wide counters; `generation` is bumped whenever existing rows are replaced
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# event_row() order, as in INSERT_SQL
+ROW_COLUMNS = ('timestamp', 'day', 'action', 'symbol', 'side', 'price', 'quantity',
+               'order_id', 'pnl', 'log_file', 'fee', 'leverage')
+
+INSERT_SQL = (
+    'INSERT INTO trades (timestamp, day, action, symbol, side, price, quantity, order_id, pnl, log_file, fee, leverage) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+# Columns added after the first release: (name, type), appended to existing databases on open
+ADDED_COLUMNS = (('fee', 'REAL'), ('leverage', 'REAL'))
+
+# Only OPEN/CLOSE rows are fills, as in the aggregator. Timestamps are cut to the
+# second and compared as wall-clock time like everywhere else in the store; codes
+# are computed by SQLite so each row crosses into Python as plain ints and floats
+FILL_SQL = """
+SELECT id, CAST(strftime('%s', substr(timestamp, 1, 19)) AS INTEGER), action = 'OPEN', coalesce(symbol, ''),
+       CASE upper(side) WHEN 'LONG' THEN 1 WHEN 'BUY' THEN 1 WHEN 'SHORT' THEN -1 WHEN 'SELL' THEN -1 ELSE 0 END,
+       price, quantity, pnl, fee, leverage
+FROM trades WHERE id > ? AND action IN ('OPEN', 'CLOSE') ORDER BY id
+"""
+
+
+def to_number(value):
+    """Coerce a payload value to float, or None if it is not numeric"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').split()[0])
+    except (ValueError, IndexError):
+        return None
+
+
+def event_row(event):
+    """INSERT parameters for one normalized event dict"""
+    return (
+        event['timestamp'],
+        event['timestamp'][:10],
+        event.get('action'),
+        event.get('symbol'),
+        event.get('side'),
+        to_number(event.get('price')),
+        to_number(event.get('quantity')),
+        None if event.get('order_id') is None else str(event['order_id']),
+        to_number(event.get('pnl')),
+        None if event.get('log_file') is None else str(event['log_file']),
+        to_number(event.get('fee')),
+        to_number(event.get('leverage')),
+    )
+
+
+def stored_event(event):
+    """An appended event dict as the store holds it, shaped like a row of after()"""
+    return dict(zip(ROW_COLUMNS, event_row(event)), id=event.get('id'))
+
+
+class TradeStore:
+    """Append-only store of normalized trade events.
+
+    Each thread gets its own connection; WAL mode lets the webhook server keep
+    appending while bot commands and analytics read from other processes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(trades)')}
+        for name, kind in ADDED_COLUMNS:
+            if name not in columns:
+                conn.execute(f'ALTER TABLE trades ADD COLUMN {name} {kind}')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # The text log is the durable record; the store can be rebuilt from it
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def append_many(self, events):
+        """Insert a batch of event dicts in one transaction, tagging each with its row `id`"""
+        conn = self._conn()
+        with conn:
+            for event in events:
+                cursor = conn.execute(INSERT_SQL, event_row(event))
+                event['id'] = cursor.lastrowid
+
+    def query(self, since=None, until=None, symbol=None, action=None, limit=None):
+        """Return events as dicts, oldest first, filtered by ISO timestamp range / symbol / action"""
+        clauses, params = [], []
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        if symbol:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if action:
+            clauses.append('action = ?')
+            params.append(action)
+
+        sql = 'SELECT * FROM trades'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if limit:
+            # Most recent `limit` rows, still returned oldest first
+            sql = f'SELECT * FROM ({sql} ORDER BY id DESC LIMIT ?) ORDER BY id'
+            params.append(limit)
+        else:
+            sql += ' ORDER BY id'
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def after(self, last_id, limit=10000):
+        """Events with id > last_id, for replaying derived state from an offset"""
+        rows = self._conn().execute(
+            'SELECT * FROM trades WHERE id > ? ORDER BY id LIMIT ?', (last_id, limit)
+        )
+        return [dict(row) for row in rows]
+
+    def fills_after(self, last_id):
+        """OPEN/CLOSE rows with id > last_id as plain tuples (id, epoch seconds,
+        is_open, symbol, side 1/-1/0, price, quantity, pnl, fee, leverage)"""
+        cursor = self._conn().cursor()
+        cursor.row_factory = None
+        return cursor.execute(FILL_SQL, (last_id,)).fetchall()
+
+    def replace_log_rows(self, log_file, rows, since, until):
+        """Swap the rows loaded from `log_file` (matched by file name, in any
+        directory) with timestamps in [since, until) for `rows` (event_row
+        tuples), in one transaction. Bumps the store generation: the new rows get
+        ids above state derived from the old ones, which must be rebuilt"""
+        name = Path(log_file).name
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'DELETE FROM trades WHERE timestamp >= ? AND timestamp < ? AND (log_file = ? OR log_file LIKE ?)',
+                (since, until, name, '%/' + name)
+            )
+            conn.executemany(INSERT_SQL, rows)
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('generation', 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+            )
+
+    def reindex_checkpoints(self):
+        rows = self._conn().execute('SELECT * FROM reindex_checkpoints')
+        return {row['day']: dict(row) for row in rows}
+
+    def save_reindex_checkpoint(self, checkpoint):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO reindex_checkpoints '
+                '(day, fingerprint, sha256, parser_version, events, first_ts, last_ts, indexed_at) '
+                'VALUES (:day, :fingerprint, :sha256, :parser_version, :events, :first_ts, :last_ts, :indexed_at)',
+                checkpoint
+            )
+
+    def generation(self):
+        """Counter of row replacements; derived state tagged with another value is stale"""
+        row = self._conn().execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def last_id(self):
+        row = self._conn().execute('SELECT MAX(id) FROM trades').fetchone()
+        return row[0] or 0
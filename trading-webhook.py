@@ -1,31 +1,108 @@
 #!/usr/bin/env python3
 """
 Trading Webhook Endpoint Server
-Receives trading notifications directly from trading system and syncs to GitHub
+Receives trading notifications directly from the trading system (/, /trade, /batch)
+and from the Telegram bot (/telegram), journals them and syncs to GitHub
 """
 
 import os
 import json
+import math
 import hmac
 import hashlib
+import time
 import logging
+import itertools
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import subprocess
-import fcntl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
+from urllib.parse import unquote
+
+from git_sync import GitSyncWorker, GitStatusCache
+from journal import JournalWriter
+from trade_store import TradeStore
+from aggregator import TradeAggregator
+from dedup import DedupIndex, order_key
+from log_reader import LogReader
+from log_archive import LogArchiver, LogRotator
+from normalizer import PayloadNormalizer, MalformedEvent, normalize_symbol
+from event_stream import EventBroker, sse_frame
+from admission import RateLimiter, AdmissionQueue, classify
+import metrics
+from metrics import REGISTRY, STAGE_SECONDS, REQUESTS, REQUEST_SECONDS, REJECTED, ADMISSIONS
 
 # Configuration
 PORT = int(os.environ.get('WEBHOOK_PORT', 8080))
 SECRET_TOKEN = os.environ.get('WEBHOOK_SECRET', '')
+TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
 LOGS_DIR = os.environ.get('LOGS_DIR', 'logs')
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-LOCK_FILE = os.path.join(SCRIPT_DIR, '.git_push.lock')
+# Kept out of the work tree so it never shows up in git status or gets committed
+LOCK_FILE = os.path.join(SCRIPT_DIR, '.cache', 'git_push.lock')
+SYNC_WINDOW_SECONDS = float(os.environ.get('SYNC_WINDOW_SECONDS', 2))
+SYNC_MAX_ENTRIES = int(os.environ.get('SYNC_MAX_ENTRIES', 50))
+GIT_STATUS_TTL = float(os.environ.get('GIT_STATUS_TTL', 60))
+GIT_PUSH_TIMEOUT = float(os.environ.get('GIT_PUSH_TIMEOUT', 30))
+GIT_RETRY_SECONDS = float(os.environ.get('GIT_RETRY_SECONDS', 30))
+GIT_RETRY_MAX_SECONDS = float(os.environ.get('GIT_RETRY_MAX_SECONDS', 300))
+TRADE_DB = os.environ.get('TRADE_DB', os.path.join(SCRIPT_DIR, 'trades.db'))
+AGGREGATE_SNAPSHOT = os.path.join(SCRIPT_DIR, '.cache', 'aggregates.json')
+DEDUP_TTL_HOURS = float(os.environ.get('DEDUP_TTL_HOURS', 72))
+DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', 100000))
+BATCH_MAX_EVENTS = int(os.environ.get('BATCH_MAX_EVENTS', 1000))
+
+# Closed days are compacted into logs/archive/ this many days after they end (0 = never)
+LOG_ARCHIVE_AFTER_DAYS = int(os.environ.get('LOG_ARCHIVE_AFTER_DAYS', 1))
+LOG_ARCHIVE_DELAY_MINUTES = float(os.environ.get('LOG_ARCHIVE_DELAY_MINUTES', 30))
+
+# Request bodies are read in chunks and refused (413) beyond these sizes
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 1024 * 1024))
+BATCH_MAX_BODY_BYTES = int(os.environ.get('BATCH_MAX_BODY_BYTES', 16 * 1024 * 1024))
+READ_CHUNK_BYTES = 64 * 1024
+
+# Log every Nth payload at INFO (0 = only at DEBUG level)
+PAYLOAD_LOG_EVERY = int(os.environ.get('PAYLOAD_LOG_EVERY', 0))
+
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = int(os.environ.get('KEEPALIVE_TIMEOUT', 30))
+
+# GET /events: live trade stream (Server-Sent Events)
+EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 1000))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 100))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+EVENTS_REPLAY_PAGE = 1000
+JOURNAL_DURABILITY = os.environ.get('JOURNAL_DURABILITY', 'batch')
+
+# Admission control: informational events/second and burst per peer, the separate (larger)
+# rate and burst for order actions (0 = unlimited), POST requests processed at once
+# (0 = unbounded), the share of them kept for order actions, and the Retry-After sent
+# when the server is full
+RATE_LIMIT_PER_SOURCE = float(os.environ.get('RATE_LIMIT_PER_SOURCE', 10))
+RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', 100))
+RATE_LIMIT_CRITICAL_PER_SOURCE = float(os.environ.get('RATE_LIMIT_CRITICAL_PER_SOURCE', 50))
+RATE_LIMIT_CRITICAL_BURST = float(os.environ.get('RATE_LIMIT_CRITICAL_BURST', 1000))
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 32))
+ADMISSION_CRITICAL_RESERVE = float(os.environ.get('ADMISSION_CRITICAL_RESERVE', 0.25))
+ADMISSION_RETRY_AFTER = float(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+
+# Optional JSON file of extra/overridden per-source field aliases (see normalizer.SOURCES)
+PAYLOAD_SOURCES_FILE = os.environ.get('PAYLOAD_SOURCES_FILE', os.path.join(SCRIPT_DIR, 'payload_sources.json'))
+
+# Background workers (started in main)
+sync_worker = None
+journal_writer = None
+trade_store = None
+aggregator = None
+dedup_index = None
+event_broker = None
+rate_limiter = None
+admission_queue = None
+normalizer = PayloadNormalizer()
 
 # Setup logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper(), logging.INFO),
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler(os.path.join(SCRIPT_DIR, 'webhook.log')),
@@ -34,268 +111,689 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_payload_counter = itertools.count(1)
+
+def log_payload(payload):
+    """Log a payload at DEBUG, or at INFO for every PAYLOAD_LOG_EVERY-th one; formatting
+    only happens when the record will actually be emitted"""
+    if PAYLOAD_LOG_EVERY and next(_payload_counter) % PAYLOAD_LOG_EVERY == 0:
+        logger.info(f"Payload (sampled): {json.dumps(payload, ensure_ascii=False)}")
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Payload: {json.dumps(payload, ensure_ascii=False)}")
+
+class RequestBodyError(Exception):
+    """Request body could not be read (too large, truncated or badly chunked)"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Route label for metrics; anything else (e.g. /<source>) is counted as 'other'
+METRIC_ROUTES = ('/', '/trade', '/batch', '/telegram', '/health', '/status', '/metrics', '/events')
+
 class TradingWebhookHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the trading system can reuse connections
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    
+    # time.monotonic() when the current request started, for webhook_request_seconds
+    request_start = None
+    
+    # Set when admission control refused the request; shed requests are counted, not access-logged
+    shedding = False
+    
+    def send_response(self, code, message=None):
+        """Count every response by route and status"""
+        super().send_response(code, message)
+        route = self.route() if hasattr(self, 'path') else 'other'
+        if route not in METRIC_ROUTES:
+            route = '/trade' if route.startswith('/trade/') else 'other'
+        REQUESTS.labels(route, str(code)).inc()
+        if self.request_start is not None:
+            REQUEST_SECONDS.labels(route).observe(time.monotonic() - self.request_start)
+            self.request_start = None
+    
+    def send_body(self, status, body, content_type='application/json'):
+        """Send a complete response; Content-Length is required for keep-alive"""
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def route(self):
+        """Request path without the query string or a trailing slash"""
+        return self.path.split('?')[0].rstrip('/') or '/'
+    
+    def body_limit(self):
+        return BATCH_MAX_BODY_BYTES if self.route() == '/batch' else MAX_BODY_BYTES
+    
+    def handle_expect_100(self):
+        """Refuse an oversized body before the client sends it"""
+        try:
+            too_large = int(self.headers.get('Content-Length', 0)) > self.body_limit()
+        except ValueError:
+            too_large = False
+        if too_large:
+            self.close_connection = True
+            self.send_body(413, {'ok': False, 'error': f"Body exceeds {self.body_limit()} bytes"})
+            return False
+        return super().handle_expect_100()
+    
+    def read_body(self, limit):
+        """Read the body (Content-Length or chunked) into one buffer, at most `limit` bytes.
+        
+        The HMAC is updated as the data arrives, so the signature never needs a
+        second pass over the body. Returns (body, hex digest or None).
+        """
+        mac = hmac.new(SECRET_TOKEN.encode(), digestmod=hashlib.sha256) if SECRET_TOKEN else None
+        hmac_seconds = 0.0
+        
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            body = bytearray()
+            while True:
+                try:
+                    size = int(self.rfile.readline(1024).split(b';')[0], 16)
+                except ValueError:
+                    raise RequestBodyError(400, "Malformed chunk size")
+                if size == 0:
+                    break
+                if len(body) + size > limit:
+                    raise RequestBodyError(413, f"Body exceeds {limit} bytes")
+                chunk = self.rfile.read(size)
+                if len(chunk) != size or self.rfile.read(2) != b'\r\n':
+                    raise RequestBodyError(400, "Truncated chunk")
+                body += chunk
+                if mac:
+                    start = time.perf_counter()
+                    mac.update(chunk)
+                    hmac_seconds += time.perf_counter() - start
+            # Skip trailers up to the blank line that ends the message
+            while self.rfile.readline(1024) not in (b'\r\n', b'\n', b''):
+                pass
+        else:
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                raise RequestBodyError(400, "Invalid Content-Length")
+            if length > limit:
+                raise RequestBodyError(413, f"Body exceeds {limit} bytes")
+            
+            # Read straight into a preallocated buffer
+            body = bytearray(length)
+            view = memoryview(body)
+            received = 0
+            while received < length:
+                n = self.rfile.readinto(view[received:received + READ_CHUNK_BYTES])
+                if not n:
+                    raise RequestBodyError(400, "Truncated request body")
+                if mac:
+                    start = time.perf_counter()
+                    mac.update(view[received:received + n])
+                    hmac_seconds += time.perf_counter() - start
+                received += n
+            view.release()
+        
+        if mac:
+            STAGE_SECONDS.labels('signature').observe(hmac_seconds)
+        return body, (mac.hexdigest() if mac else None)
+    
     def do_POST(self):
         """Handle incoming trading webhook"""
-        start_time = datetime.now()
+        start_time = self.request_start = time.monotonic()
+        self.shedding = False
         
         # Read request body
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length)
-        
-        # Get headers for logging
-        headers = {k: v for k, v in self.headers.items()}
+        try:
+            with STAGE_SECONDS.time('read'):
+                post_data, digest = self.read_body(self.body_limit())
+        except RequestBodyError as e:
+            REJECTED.labels('body_too_large' if e.status == 413 else 'bad_body').inc()
+            logger.warning(f"Rejected request body from {self.address_string()}: {e}")
+            # Whatever is left of the body is unread, so the connection cannot be reused
+            self.close_connection = True
+            self.send_body(e.status, {'ok': False, 'error': str(e)})
+            return
         
-        logger.info(f"Received webhook from {self.address_string()}")
-        logger.info(f"Headers: {json.dumps(headers, ensure_ascii=False)}")
+        # Admission is decided on the raw bytes: nothing is parsed for a request that is shed.
+        # Order actions are limited by their own, larger per-source bucket.
+        route = self.route()
+        critical, events = classify(post_data) if route != '/telegram' else (False, 1)
+        priority = 'critical' if critical else 'info'
+        wait = rate_limiter.acquire(self.source_key(), events if route == '/batch' else 1, critical)
+        if wait:
+            self.send_shed(429, 'rate_limited', priority, wait)
+            return
+        if not admission_queue.enter(critical):
+            self.send_shed(503, 'overloaded', priority, ADMISSION_RETRY_AFTER)
+            return
+        ADMISSIONS.labels(priority, 'admitted').inc()
         
         try:
-            # Parse payload
-            try:
-                payload = json.loads(post_data.decode('utf-8'))
-            except json.JSONDecodeError:
-                payload = {'raw': post_data.decode('utf-8')}
-            
-            logger.info(f"Payload: {json.dumps(payload, ensure_ascii=False, indent=2)}")
+            logger.info(f"Received webhook from {self.address_string()} ({len(post_data)} bytes)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Headers: {json.dumps(dict(self.headers.items()), ensure_ascii=False)}")
             
+            # Routed sources; everything else is a single trade event (/, /trade, /<source>)
+            if route == '/batch':
+                self.handle_batch(post_data, digest, start_time)
+            elif route == '/telegram':
+                self.handle_telegram(post_data, start_time)
+            else:
+                self.handle_trade(post_data, digest, start_time)
+        finally:
+            admission_queue.leave()
+    
+    def handle_trade(self, post_data, digest, start_time):
+        """POST /, /trade, /<source>: a single trade event"""
+        try:
             # Verify signature if secret is configured
-            if SECRET_TOKEN:
-                signature = self.headers.get('X-Webhook-Signature', '')
-                expected_signature = hmac.new(
-                    SECRET_TOKEN.encode(),
-                    post_data,
-                    hashlib.sha256
-                ).hexdigest()
-                
-                if signature and not hmac.compare_digest(signature, expected_signature):
-                    logger.warning("Signature verification failed")
-                    self.send_response(401)
-                    self.end_headers()
-                    self.wfile.write(b'Invalid signature')
-                    return
+            if not self.verify_signature(digest):
+                self.send_body(401, b'Invalid signature', 'text/plain')
+                return
+            
+            # Parse payload straight from the buffer; json detects the UTF encoding itself
+            with STAGE_SECONDS.time('parse'):
+                try:
+                    payload = json.loads(post_data)
+                except ValueError:
+                    payload = {'raw': post_data.decode('utf-8', errors='replace')}
             
-            # Extract trading information
-            log_entry = self.format_log_entry(payload, headers)
+            log_payload(payload)
             
-            # Write to log file
-            log_file = self.write_log(log_entry)
+            # Extract trading information; malformed events are rejected before any disk I/O
+            try:
+                with STAGE_SECONDS.time('normalize'):
+                    event = self.extract_event(payload)
+            except MalformedEvent as e:
+                REJECTED.labels('malformed').inc()
+                logger.warning(f"Rejected malformed event: {e}")
+                self.send_body(400, {'ok': False, 'error': str(e)})
+                return
+            log_entry = self.format_log_entry(event, payload, self.payload_source())
+            
+            # Retried deliveries of an already journaled order are acknowledged, not re-written
+            dedup_key = self.dedup_key(event)
+            if dedup_key:
+                dedup_entry, is_new = dedup_index.claim(dedup_key)
+                if not is_new:
+                    self.send_duplicate(dedup_key, dedup_entry, start_time)
+                    return
+            
+            # Write to log file (the trade store is updated by the journal)
+            try:
+                with STAGE_SECONDS.time('journal'):
+                    log_file = self.write_log(log_entry, event)
+            except Exception:
+                if dedup_key:
+                    dedup_index.release(dedup_key, dedup_entry)
+                raise
+            if dedup_key:
+                dedup_index.complete(dedup_entry, log_file)
             logger.info(f"Logged to {log_file}")
             
-            # Trigger git commit and push (with lock to prevent concurrent pushes)
-            self.trigger_git_push_with_lock()
+            # Hand off to the background sync worker; commit/push happens in batches
+            sync_worker.notify(path=log_file)
             
             # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
             response = {
                 'ok': True,
                 'timestamp': datetime.now().isoformat(),
                 'log_file': str(log_file),
-                'processing_time_ms': (datetime.now() - start_time).total_seconds() * 1000
+                'processing_time_ms': (time.monotonic() - start_time) * 1000
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_body(200, response)
             
         except Exception as e:
             logger.error(f"Error processing webhook: {e}", exc_info=True)
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(json.dumps({'ok': False, 'error': str(e)}).encode())
+            self.send_body(500, {'ok': False, 'error': str(e)})
     
-    def format_log_entry(self, payload, headers):
-        """Format log entry from payload"""
-        timestamp = datetime.now().isoformat()
+    def verify_signature(self, expected_signature):
+        """Check X-Webhook-Signature against the body's HMAC-SHA256 (computed by read_body)"""
+        if not SECRET_TOKEN:
+            return True
+        signature = self.headers.get('X-Webhook-Signature', '')
         
-        # Try to extract common trading fields
-        action = payload.get('action', payload.get('type', 'UNKNOWN'))
-        symbol = payload.get('symbol', payload.get('pair', payload.get('instrument', 'N/A')))
-        side = payload.get('side', payload.get('direction', payload.get('type', 'N/A')))
-        price = payload.get('price', payload.get('entry_price', payload.get('fill_price', 'N/A')))
-        quantity = payload.get('quantity', payload.get('qty', payload.get('size', 'N/A')))
-        order_id = payload.get('order_id', payload.get('id', payload.get('trade_id', 'N/A')))
-        pnl = payload.get('pnl', payload.get('profit_loss', ''))
+        if signature and not hmac.compare_digest(signature, expected_signature):
+            REJECTED.labels('signature').inc()
+            logger.warning("Signature verification failed")
+            return False
+        return True
+    
+    def handle_telegram(self, post_data, start_time):
+        """POST /telegram: bot updates, kept only for messages from TELEGRAM_CHAT_ID"""
+        try:
+            update = json.loads(post_data)
+        except ValueError:
+            self.send_body(400, {'ok': False, 'error': 'Invalid JSON'})
+            return
+        log_payload(update)
         
-        # Build log entry
-        log_parts = [f"[{timestamp}] {action.upper()}"]
+        # Telegram redelivers anything that is not answered with 200, so filtered updates are acknowledged too
+        message = update.get('message') if isinstance(update, dict) else None
+        if not isinstance(message, dict):
+            logger.warning("No message in update")
+            self.send_body(200, {'ok': True, 'ignored': 'no message'})
+            return
         
-        if symbol != 'N/A':
-            log_parts.append(symbol)
-        if side != 'N/A':
-            log_parts.append(str(side).upper())
-        if price != 'N/A':
-            log_parts.append(f"@ {price}")
-        if quantity != 'N/A':
-            log_parts.append(f"qty: {quantity}")
-        if order_id != 'N/A':
-            log_parts.append(f"order_id: {order_id}")
-        if pnl:
-            log_parts.append(f"pnl: {pnl}")
+        chat_id = (message.get('chat') or {}).get('id')
+        if not TELEGRAM_CHAT_ID or str(chat_id) != str(TELEGRAM_CHAT_ID):
+            logger.warning(f"Chat ID mismatch: {chat_id} != {TELEGRAM_CHAT_ID}")
+            self.send_body(200, {'ok': True, 'ignored': 'chat id'})
+            return
         
-        # Add full payload as JSON for completeness
-        log_entry = ' '.join(log_parts)
-        log_entry += f"\n# Raw: {json.dumps(payload, ensure_ascii=False)}"
+        text = message.get('text', '')
+        if not text:
+            logger.warning("Empty message text")
+            self.send_body(200, {'ok': True, 'ignored': 'empty text'})
+            return
         
-        return log_entry
+        # Telegram retries by update_id; a redelivered update is acknowledged, not re-written
+        dedup_key = f"telegram:{update['update_id']}" if update.get('update_id') is not None else None
+        if dedup_key:
+            dedup_entry, is_new = dedup_index.claim(dedup_key)
+            if not is_new:
+                self.send_duplicate(dedup_key, dedup_entry, start_time)
+                return
+        
+        try:
+            # Logged under the day the message was sent; without a usable date, when it arrived
+            date = message.get('date')
+            if isinstance(date, (int, float)) and not isinstance(date, bool) and date > 0:
+                message_time = datetime.fromtimestamp(date)
+            else:
+                message_time = datetime.now()
+            log_entry = f"[{message_time.isoformat()}] TELEGRAM {text}\n"
+            with STAGE_SECONDS.time('journal'):
+                log_file = journal_writer.write(log_entry, date=message_time)
+        except Exception as e:
+            if dedup_key:
+                dedup_index.release(dedup_key, dedup_entry)
+            logger.error(f"Error processing update: {e}", exc_info=True)
+            self.send_body(500, {'ok': False, 'error': str(e)})
+            return
+        if dedup_key:
+            dedup_index.complete(dedup_entry, log_file)
+        logger.info(f"Logged Telegram message to {log_file}")
+        
+        sync_worker.notify(path=log_file)
+        self.send_body(200, {'ok': True, 'log_file': str(log_file)})
     
-    def write_log(self, log_entry):
-        """Write log entry to daily log file"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        log_file = Path(LOGS_DIR) / f"{today}.log"
+    def handle_batch(self, post_data, digest, start_time):
+        """POST /batch: many fills in one request (JSON array or NDJSON).
         
-        # Ensure logs directory exists
-        log_file.parent.mkdir(parents=True, exist_ok=True)
+        One signature check over the whole body, one journal write for every
+        accepted event and one sync notification; the response reports the
+        outcome of each event by its index in the batch.
+        """
+        if not self.verify_signature(digest):
+            self.send_body(401, b'Invalid signature', 'text/plain')
+            return
         
-        # Append to log file
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry + '\n\n')
+        with STAGE_SECONDS.time('parse'):
+            payloads = self.parse_batch(post_data)
+        if len(payloads) > BATCH_MAX_EVENTS:
+            REJECTED.labels('batch_too_large').inc()
+            self.send_body(413, {'ok': False, 'error': f"Batch has {len(payloads)} events, limit is {BATCH_MAX_EVENTS}"})
+            return
+        
+        source = self.payload_source()
+        results = []
+        entries = []
+        accepted = []
+        claims = []
+        duplicates = []
         
-        return log_file
-    
-    def trigger_git_push_with_lock(self):
-        """Trigger git commit and push with file lock to prevent concurrent execution"""
-        lock_fd = None
         try:
-            # Create lock file
-            lock_fd = open(LOCK_FILE, 'w')
-            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            
-            logger.info("Acquired git push lock")
-            self._do_git_push()
-            
-        except BlockingIOError:
-            logger.info("Git push already in progress, skipping")
-        finally:
-            if lock_fd:
-                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
-                lock_fd.close()
+            for index, payload in enumerate(payloads):
+                log_payload(payload)
                 try:
-                    os.remove(LOCK_FILE)
-                except:
-                    pass
-    
-    def _do_git_push(self):
-        """Execute git commit and push"""
-        try:
-            os.chdir(SCRIPT_DIR)
-            
-            # Check for changes
-            result = subprocess.run(
-                ['git', 'diff', '--cached', '--quiet'],
-                capture_output=True
-            )
-            
-            has_unstaged = subprocess.run(
-                ['git', 'diff', '--quiet'],
-                capture_output=True
-            ).returncode != 0
-            
-            if has_unstaged:
-                subprocess.run(
-                    ['git', 'add', '-A'],
-                    capture_output=True,
-                    check=True
-                )
-                logger.info("Staged changes")
-            
-            has_staged = subprocess.run(
-                ['git', 'diff', '--cached', '--quiet'],
-                capture_output=True
-            ).returncode != 0
-            
-            if has_staged:
-                timestamp = datetime.now().isoformat()
-                subprocess.run(
-                    ['git', 'commit', '-m', f'Auto-commit trading logs at {timestamp}'],
-                    capture_output=True,
-                    check=True
-                )
-                logger.info("Changes committed")
-            
-            # Check if we have remote
-            result = subprocess.run(
-                ['git', 'remote', 'get-url', 'origin'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                # Push changes
-                env = os.environ.copy()
-                if GITHUB_TOKEN:
-                    # Inject token into push URL
-                    env['GIT_ASKPASS'] = '/bin/echo'
+                    with STAGE_SECONDS.time('normalize'):
+                        event = normalizer.normalize(payload, source)
+                except MalformedEvent as e:
+                    REJECTED.labels('malformed').inc()
+                    results.append({'index': index, 'status': 'rejected', 'error': str(e)})
+                    continue
                 
-                subprocess.run(
-                    ['git', 'push', 'origin', 'main'],
-                    capture_output=True,
-                    check=True,
-                    timeout=30,
-                    env=env
-                )
-                logger.info("Git push successful")
-            else:
-                logger.info("No remote configured, skipping push")
+                result = {'index': index, 'status': 'ok'}
+                results.append(result)
+                
+                # Per-event order keys; a header idempotency key would cover the whole batch
+                dedup_key = order_key(event['action'], event['order_id']) if event['order_id'] is not None else None
+                if dedup_key:
+                    dedup_entry, is_new = dedup_index.claim(dedup_key)
+                    if not is_new:
+                        result['status'] = 'duplicate'
+                        duplicates.append((result, dedup_entry))
+                        continue
+                    claims.append((dedup_key, dedup_entry))
+                
+                entries.append((self.format_log_entry(event, payload, source) + '\n\n', event))
+                accepted.append(result)
             
-        except subprocess.TimeoutExpired:
-            logger.error("Git push timeout")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Git error: {e.stderr.decode() if e.stderr else e}")
+            if entries:
+                with STAGE_SECONDS.time('journal'):
+                    log_file = journal_writer.write_many(entries)
+                for _, dedup_entry in claims:
+                    dedup_index.complete(dedup_entry, log_file)
+                for result in accepted:
+                    result['log_file'] = str(log_file)
+                logger.info(f"Logged batch of {len(entries)} events to {log_file}")
+                sync_worker.notify(len(entries), path=log_file)
         except Exception as e:
-            logger.error(f"Unexpected error in git push: {e}")
+            for dedup_key, dedup_entry in claims:
+                dedup_index.release(dedup_key, dedup_entry)
+            logger.error(f"Error processing batch: {e}", exc_info=True)
+            self.send_body(500, {'ok': False, 'error': str(e)})
+            return
+        
+        # Duplicates of this batch's own events are complete by now; others may still be in flight
+        for result, dedup_entry in duplicates:
+            log_file = dedup_index.wait(dedup_entry)
+            if log_file is None:
+                result['status'] = 'retry'
+            else:
+                result['log_file'] = log_file
+        
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        self.send_body(200, {
+            'ok': True,
+            'timestamp': datetime.now().isoformat(),
+            'events': len(results),
+            'accepted': counts.get('ok', 0),
+            'duplicates': counts.get('duplicate', 0),
+            'rejected': counts.get('rejected', 0),
+            'retry': counts.get('retry', 0),
+            'results': results,
+            'processing_time_ms': (time.monotonic() - start_time) * 1000
+        })
+    
+    def parse_batch(self, post_data):
+        """Split a batch body into payloads: a JSON array, else one event per line (NDJSON or text)"""
+        try:
+            payloads = json.loads(post_data)
+            return payloads if isinstance(payloads, list) else [payloads]
+        except ValueError:
+            pass
+        
+        payloads = []
+        for line in post_data.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payloads.append(json.loads(line))
+            except ValueError:
+                payloads.append({'raw': line.decode('utf-8', errors='replace')})
+        return payloads
+    
+    def dedup_key(self, event):
+        """Idempotency key: X-Idempotency-Key header, else action + order_id"""
+        idempotency_key = self.headers.get('X-Idempotency-Key')
+        if idempotency_key:
+            return f"key:{idempotency_key}"
+        if event['order_id'] is not None:
+            return order_key(event['action'], event['order_id'])
+        return None
+    
+    def send_duplicate(self, dedup_key, dedup_entry, start_time):
+        """Acknowledge a duplicate with the log file of the original delivery"""
+        log_file = dedup_index.wait(dedup_entry)
+        if log_file is None:
+            # The original is still being written (or failed); let the sender retry
+            self.send_response(503)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        logger.info(f"Duplicate {dedup_key}, already logged to {log_file}")
+        self.send_body(200, {
+            'ok': True,
+            'duplicate': True,
+            'timestamp': datetime.now().isoformat(),
+            'log_file': log_file,
+            'processing_time_ms': (time.monotonic() - start_time) * 1000
+        })
+    
+    def extract_event(self, payload):
+        """Extract the normalized trading fields from payload"""
+        return normalizer.normalize(payload, self.payload_source())
+    
+    def source_key(self):
+        """Rate limit bucket: the peer address. Headers the client chooses (API keys,
+        strategy names) are never used, so rotating them does not buy a fresh bucket."""
+        client = self.client_address[0]
+        forwarded = self.headers.get('X-Forwarded-For')
+        if forwarded and client in ('127.0.0.1', '::1'):
+            # Behind the local tunnel every request comes from loopback; the tunnel appends
+            # the peer it saw as the last entry (earlier entries are the client's own)
+            client = forwarded.rsplit(',', 1)[-1].strip()
+        return client
+    
+    def send_shed(self, status, reason, priority, retry_after):
+        """429 (source over its rate) or 503 (server full) with Retry-After"""
+        ADMISSIONS.labels(priority, reason).inc()
+        REJECTED.labels(reason).inc()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Shed {priority} request from {self.source_key()}: {reason}")
+        self.shedding = True
+        body = json.dumps({'ok': False, 'error': reason, 'retry_after': math.ceil(retry_after)}).encode()
+        self.send_response(status)
+        self.send_header('Retry-After', str(math.ceil(retry_after)))
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def payload_source(self):
+        """Source schema: X-Trading-Source header, else ?source=, else the path (POST /tradingview)"""
+        source = self.headers.get('X-Trading-Source')
+        if source:
+            return source
+        path, _, query = self.path.partition('?')
+        for param in query.split('&'):
+            if param.startswith('source='):
+                return param[len('source='):]
+        return path.rstrip('/').rsplit('/', 1)[-1]
+    
+    def format_log_entry(self, event, payload, source=None):
+        """Format log entry from the extracted event and raw payload; a non-default
+        source schema is recorded so reindex.py normalizes the payload the same way"""
+        # Build log entry
+        log_parts = [f"[{event['timestamp']}] {event['action']}"]
+        
+        if event['symbol'] is not None:
+            log_parts.append(str(event['symbol']))
+        if event['side'] is not None:
+            log_parts.append(event['side'])
+        if event['price'] is not None:
+            log_parts.append(f"@ {event['price']}")
+        if event['quantity'] is not None:
+            log_parts.append(f"qty: {event['quantity']}")
+        if event['order_id'] is not None:
+            log_parts.append(f"order_id: {event['order_id']}")
+        if event['pnl']:
+            log_parts.append(f"pnl: {event['pnl']}")
+        
+        # Add full payload as JSON for completeness
+        log_entry = ' '.join(log_parts)
+        source = normalizer.source_for(source)
+        if source != normalizer.default_source:
+            log_entry += f"\n# Source: {source}"
+        log_entry += f"\n# Raw: {json.dumps(payload, ensure_ascii=False)}"
+        
+        return log_entry
+    
+    def write_log(self, log_entry, event=None):
+        """Write log entry to daily log file via the shared writer thread"""
+        return journal_writer.write(log_entry + '\n\n', event=event)
     
     def do_GET(self):
         """Handle GET requests for health check and status"""
+        self.request_start = time.monotonic()
+        self.shedding = False
         if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self.send_body(200, {
                 'status': 'ok',
                 'timestamp': datetime.now().isoformat(),
                 'logs_dir': LOGS_DIR,
-                'script_dir': SCRIPT_DIR
-            }).encode())
+                'script_dir': SCRIPT_DIR,
+                'telegram_chat_id': TELEGRAM_CHAT_ID or None
+            })
+        
+        elif self.path == '/metrics':
+            self.send_metrics()
+        
+        elif self.route() == '/events':
+            self.stream_events()
         
         elif self.path == '/status':
-            os.chdir(SCRIPT_DIR)
             try:
-                # Get git status
-                git_status = subprocess.run(
-                    ['git', 'status', '--porcelain'],
-                    capture_output=True,
-                    text=True
-                ).stdout.strip()
-                
-                # Get last commit
-                git_log = subprocess.run(
-                    ['git', 'log', '--oneline', '-1'],
-                    capture_output=True,
-                    text=True
-                ).stdout.strip()
+                # Git state comes from the cache the sync worker keeps current
+                git_state = sync_worker.status_cache.get()
+                sync_stats = sync_worker.stats()
                 
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({
+                self.send_body(200, {
                     'status': 'ok',
-                    'git_clean': not bool(git_status),
-                    'git_status': git_status or 'clean',
-                    'last_commit': git_log,
-                    'logs_dir': LOGS_DIR
-                }).encode())
+                    'git_clean': git_state['git_clean'] and not sync_stats['queue_depth'],
+                    'git_status': git_state['git_status'],
+                    'last_commit': git_state['last_commit'],
+                    'last_push': git_state['last_push'],
+                    'pending_entries': sync_stats['queue_depth'] + sync_stats['in_flight'],
+                    'unpushed_commits': sync_stats['unpushed_commits'],
+                    'oldest_unpushed_age_seconds': sync_stats['oldest_unpushed_age_seconds'],
+                    'logs_dir': LOGS_DIR,
+                    'sync': sync_stats,
+                    'dedup': dedup_index.stats()
+                })
             except Exception as e:
-                self.send_response(500)
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
+                self.send_body(500, {'error': str(e)})
         
         else:
-            self.send_response(404)
+            self.send_body(404, b'', 'text/plain')
+    
+    def query_param(self, name):
+        _, _, query = self.path.partition('?')
+        for param in query.split('&'):
+            if param.startswith(name + '='):
+                return unquote(param[len(name) + 1:])
+        return None
+    
+    def stream_events(self):
+        """Server-Sent Events of journaled trades.
+        
+        ?symbols=BTC/USDT,ETHUSDT limits the stream to those symbols. A client
+        that reconnects with Last-Event-ID (or ?since=<id>) first gets every
+        event after that id from the trade store, then the live stream.
+        """
+        symbols = [normalize_symbol(s) for s in (self.query_param('symbols') or '').split(',') if s.strip()]
+        last_id = self.headers.get('Last-Event-ID') or self.query_param('since')
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            self.send_body(400, {'error': f'Invalid event id: {last_id}'})
+            return
+        
+        # Subscribe before replaying so nothing falls between the replay and the live stream
+        subscriber = event_broker.subscribe(symbols)
+        if subscriber is None:
+            self.send_body(503, {'error': 'Too many event subscribers'})
+            return
+        
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.send_header('X-Accel-Buffering', 'no')
             self.end_headers()
+            self.wfile.write(b'retry: 2000\n\n')
+            
+            if last_id is not None:
+                last_id = self.replay_events(last_id, subscriber)
+            
+            while not subscriber.dropped:
+                item = subscriber.get(timeout=EVENTS_HEARTBEAT_SECONDS)
+                if item is None:
+                    # Comment line: keeps proxies from timing out and detects gone clients
+                    self.wfile.write(b': ping\n\n')
+                    continue
+                event_id, frame = item
+                if last_id is not None and event_id <= last_id:
+                    continue
+                self.wfile.write(frame)
+                last_id = event_id
+            
+            # Too slow: tell the client where to resume, then hang up
+            self.wfile.write(f"event: overflow\ndata: {json.dumps({'resume_from': last_id})}\n\n".encode())
+        except (OSError, ValueError):
+            pass
+        finally:
+            event_broker.unsubscribe(subscriber)
+    
+    def replay_events(self, last_id, subscriber):
+        """Send stored events after `last_id` in pages; returns the last id seen"""
+        while True:
+            rows = trade_store.after(last_id, limit=EVENTS_REPLAY_PAGE)
+            for row in rows:
+                last_id = row['id']
+                if subscriber.wants(row):
+                    self.wfile.write(sse_frame(row))
+            if len(rows) < EVENTS_REPLAY_PAGE:
+                return last_id
+    
+    def send_metrics(self):
+        """Prometheus text exposition of the ingestion metrics"""
+        self.send_body(200, REGISTRY.render().encode(), 'text/plain; version=0.0.4')
+    
+    def log_request(self, code='-', size='-'):
+        """Access log line; shed requests are only counted, so a flood cannot fill the log"""
+        if not self.shedding:
+            super().log_request(code, size)
     
     def log_message(self, format, *args):
         """Override to use our logger"""
         logger.info("%s - %s" % (self.address_string(), format % args))
 
+class WebhookServer(ThreadingHTTPServer):
+    """One thread per connection; a deeper backlog absorbs bursts of new connections"""
+    request_queue_size = 128
+
+def sync_rotated(paths):
+    """Commit what a log rotation changed (archive, index, summary and the removed log)"""
+    for path in paths:
+        sync_worker.notify(path=path)
+
+def register_metrics():
+    """Expose worker state read at scrape time"""
+    REGISTRY.callback('journal_queue_depth', 'Writes waiting for the journal writer thread',
+                      journal_writer.queue_depth)
+    REGISTRY.callback('git_sync_pending_entries', 'Journaled entries not yet committed',
+                      lambda: sync_worker.stats()['queue_depth'])
+    REGISTRY.callback('git_sync_in_flight_entries', 'Entries in the commit/push currently running',
+                      lambda: sync_worker.stats()['in_flight'])
+    REGISTRY.callback('git_sync_lag_seconds', 'Age of the oldest entry not yet committed',
+                      lambda: sync_worker.stats()['last_sync_lag_seconds'])
+    REGISTRY.callback('git_unpushed_commits', 'Local commits waiting to be pushed to origin',
+                      lambda: sync_worker.stats()['unpushed_commits'])
+    REGISTRY.callback('git_oldest_unpushed_age_seconds', 'Age of the oldest commit not yet on origin',
+                      lambda: sync_worker.stats()['oldest_unpushed_age_seconds'])
+    REGISTRY.callback('git_syncs_total', 'Successful git commit/push rounds',
+                      lambda: sync_worker.sync_count, kind='counter')
+    REGISTRY.callback('webhook_in_flight', 'POST requests being processed (ADMISSION_MAX_IN_FLIGHT bounds it)',
+                      lambda: admission_queue.in_flight)
+    REGISTRY.callback('rate_limit_sources', 'Sources holding a rate limit token bucket', lambda: len(rate_limiter))
+    REGISTRY.callback('event_subscribers', 'Connected GET /events clients', lambda: len(event_broker))
+    REGISTRY.callback('dedup_entries', 'Orders held in the dedup index', lambda: len(dedup_index))
+    REGISTRY.callback('dedup_hits_total', 'Deliveries acknowledged as duplicates',
+                      lambda: dedup_index.hits, kind='counter')
+
 def main():
     # Load environment from .env file
     env_file = os.path.join(SCRIPT_DIR, '.env')
@@ -309,30 +807,130 @@ def main():
                     logger.info(f"Loaded {key} from .env")
     
     # Update globals from environment
-    global PORT, SECRET_TOKEN, GITHUB_TOKEN, LOGS_DIR
+    global PORT, SECRET_TOKEN, GITHUB_TOKEN, LOGS_DIR, SYNC_WINDOW_SECONDS, SYNC_MAX_ENTRIES
+    global KEEPALIVE_TIMEOUT, JOURNAL_DURABILITY
+    global TRADE_DB, DEDUP_TTL_HOURS, DEDUP_MAX_ENTRIES, GIT_STATUS_TTL, BATCH_MAX_EVENTS
+    global MAX_BODY_BYTES, BATCH_MAX_BODY_BYTES, PAYLOAD_LOG_EVERY, TELEGRAM_CHAT_ID
+    global PAYLOAD_SOURCES_FILE, GIT_PUSH_TIMEOUT, GIT_RETRY_SECONDS, GIT_RETRY_MAX_SECONDS
+    global LOG_ARCHIVE_AFTER_DAYS, LOG_ARCHIVE_DELAY_MINUTES
+    global EVENTS_BUFFER_SIZE, EVENTS_MAX_SUBSCRIBERS, EVENTS_HEARTBEAT_SECONDS, event_broker
+    global RATE_LIMIT_PER_SOURCE, RATE_LIMIT_BURST, ADMISSION_MAX_IN_FLIGHT, ADMISSION_CRITICAL_RESERVE
+    global RATE_LIMIT_CRITICAL_PER_SOURCE, RATE_LIMIT_CRITICAL_BURST
+    global ADMISSION_RETRY_AFTER, rate_limiter, admission_queue
+    global sync_worker, journal_writer, trade_store, aggregator, dedup_index, normalizer
     PORT = int(os.environ.get('WEBHOOK_PORT', 8080))
     SECRET_TOKEN = os.environ.get('WEBHOOK_SECRET', '')
+    TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
     GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
     LOGS_DIR = os.environ.get('LOGS_DIR', 'logs')
+    SYNC_WINDOW_SECONDS = float(os.environ.get('SYNC_WINDOW_SECONDS', 2))
+    SYNC_MAX_ENTRIES = int(os.environ.get('SYNC_MAX_ENTRIES', 50))
+    GIT_STATUS_TTL = float(os.environ.get('GIT_STATUS_TTL', 60))
+    GIT_PUSH_TIMEOUT = float(os.environ.get('GIT_PUSH_TIMEOUT', 30))
+    GIT_RETRY_SECONDS = float(os.environ.get('GIT_RETRY_SECONDS', 30))
+    GIT_RETRY_MAX_SECONDS = float(os.environ.get('GIT_RETRY_MAX_SECONDS', 300))
+    KEEPALIVE_TIMEOUT = int(os.environ.get('KEEPALIVE_TIMEOUT', 30))
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 1000))
+    EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 100))
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+    JOURNAL_DURABILITY = os.environ.get('JOURNAL_DURABILITY', 'batch')
+    RATE_LIMIT_PER_SOURCE = float(os.environ.get('RATE_LIMIT_PER_SOURCE', 10))
+    RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', 100))
+    RATE_LIMIT_CRITICAL_PER_SOURCE = float(os.environ.get('RATE_LIMIT_CRITICAL_PER_SOURCE', 50))
+    RATE_LIMIT_CRITICAL_BURST = float(os.environ.get('RATE_LIMIT_CRITICAL_BURST', 1000))
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 32))
+    ADMISSION_CRITICAL_RESERVE = float(os.environ.get('ADMISSION_CRITICAL_RESERVE', 0.25))
+    ADMISSION_RETRY_AFTER = float(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+    TRADE_DB = os.environ.get('TRADE_DB', os.path.join(SCRIPT_DIR, 'trades.db'))
+    DEDUP_TTL_HOURS = float(os.environ.get('DEDUP_TTL_HOURS', 72))
+    DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', 100000))
+    BATCH_MAX_EVENTS = int(os.environ.get('BATCH_MAX_EVENTS', 1000))
+    LOG_ARCHIVE_AFTER_DAYS = int(os.environ.get('LOG_ARCHIVE_AFTER_DAYS', 1))
+    LOG_ARCHIVE_DELAY_MINUTES = float(os.environ.get('LOG_ARCHIVE_DELAY_MINUTES', 30))
+    MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 1024 * 1024))
+    BATCH_MAX_BODY_BYTES = int(os.environ.get('BATCH_MAX_BODY_BYTES', 16 * 1024 * 1024))
+    PAYLOAD_LOG_EVERY = int(os.environ.get('PAYLOAD_LOG_EVERY', 0))
+    PAYLOAD_SOURCES_FILE = os.environ.get('PAYLOAD_SOURCES_FILE', os.path.join(SCRIPT_DIR, 'payload_sources.json'))
+    TradingWebhookHandler.timeout = KEEPALIVE_TIMEOUT
     
     # Ensure logs directory exists
     Path(LOGS_DIR).mkdir(parents=True, exist_ok=True)
     
+    # Shed floods per source and overall before any parsing, keeping room for order actions
+    rate_limiter = RateLimiter(RATE_LIMIT_PER_SOURCE, RATE_LIMIT_BURST,
+                               RATE_LIMIT_CRITICAL_PER_SOURCE, RATE_LIMIT_CRITICAL_BURST)
+    admission_queue = AdmissionQueue(ADMISSION_MAX_IN_FLIGHT, reserve=ADMISSION_CRITICAL_RESERVE)
+    
+    # Compile the per-source payload extractors once
+    normalizer = PayloadNormalizer(PAYLOAD_SOURCES_FILE)
+    
+    # Rebuild the order dedup index from recent journal files
+    dedup_index = DedupIndex(max_entries=DEDUP_MAX_ENTRIES, ttl=DEDUP_TTL_HOURS * 3600)
+    dedup_index.rebuild(LogReader(LOGS_DIR))
+    
+    # Start the journal writer (feeding the trade store and aggregates) and background git sync
+    trade_store = TradeStore(TRADE_DB)
+    aggregator = TradeAggregator(AGGREGATE_SNAPSHOT)
+    aggregator.load(trade_store)
+    event_broker = EventBroker(buffer_size=EVENTS_BUFFER_SIZE, max_subscribers=EVENTS_MAX_SUBSCRIBERS)
+    journal_writer = JournalWriter(
+        LOGS_DIR,
+        durability=JOURNAL_DURABILITY,
+        listeners=[trade_store.append_many, aggregator.apply_many, metrics.record_events, event_broker.publish]
+    )
+    journal_writer.start()
+    
+    sync_worker = GitSyncWorker(
+        SCRIPT_DIR,
+        LOCK_FILE,
+        window=SYNC_WINDOW_SECONDS,
+        max_entries=SYNC_MAX_ENTRIES,
+        retry_interval=GIT_RETRY_SECONDS,
+        max_retry_interval=GIT_RETRY_MAX_SECONDS,
+        push_timeout=GIT_PUSH_TIMEOUT,
+        github_token=GITHUB_TOKEN,
+        status_cache=GitStatusCache(SCRIPT_DIR, ttl=GIT_STATUS_TTL),
+        watch_dir=LOGS_DIR
+    )
+    sync_worker.start()
+    register_metrics()
+    
+    # Compact closed days into the archive; the journal detaches each file before it is read
+    log_rotator = None
+    if LOG_ARCHIVE_AFTER_DAYS > 0:
+        archiver = LogArchiver(LOGS_DIR, after_days=LOG_ARCHIVE_AFTER_DAYS, seal=journal_writer.detach)
+        log_rotator = LogRotator(
+            archiver,
+            delay=LOG_ARCHIVE_DELAY_MINUTES * 60,
+            on_rotated=sync_rotated
+        )
+        log_rotator.start()
+    
     # Start server
-    server = HTTPServer(('0.0.0.0', PORT), TradingWebhookHandler)
+    server = WebhookServer(('0.0.0.0', PORT), TradingWebhookHandler)
     logger.info("=" * 60)
     logger.info("Trading Webhook Endpoint Server")
     logger.info("=" * 60)
     logger.info(f"Listening on: http://0.0.0.0:{PORT}")
     logger.info(f"Logs directory: {LOGS_DIR}")
     logger.info(f"Script directory: {SCRIPT_DIR}")
+    logger.info(f"Trade store: {TRADE_DB}")
     logger.info(f"Secret token: {'configured' if SECRET_TOKEN else 'not configured'}")
     logger.info(f"GitHub token: {'configured' if GITHUB_TOKEN else 'not configured'}")
+    logger.info(f"Git sync window: {SYNC_WINDOW_SECONDS}s / {SYNC_MAX_ENTRIES} entries")
+    limit = lambda rate, burst: f"{rate:g}/s, burst {burst:g}" if rate else 'unlimited'
+    logger.info(f"Rate limit per source: alerts {limit(RATE_LIMIT_PER_SOURCE, RATE_LIMIT_BURST)}, "
+                f"order actions {limit(RATE_LIMIT_CRITICAL_PER_SOURCE, RATE_LIMIT_CRITICAL_BURST)}")
+    logger.info(f"Log archive: {f'after {LOG_ARCHIVE_AFTER_DAYS} day(s)' if LOG_ARCHIVE_AFTER_DAYS > 0 else 'disabled'}")
     logger.info("=" * 60)
     logger.info("Endpoints:")
-    logger.info(f"  POST /         - Webhook endpoint")
+    logger.info(f"  POST /         - Webhook endpoint (also /trade, /<source>)")
+    logger.info(f"  POST /batch    - Batch of fills (JSON array or NDJSON)")
+    logger.info(f"  POST /telegram - Telegram bot updates (chat {TELEGRAM_CHAT_ID or 'not configured'})")
     logger.info(f"  GET  /health   - Health check")
     logger.info(f"  GET  /status   - Status check")
+    logger.info(f"  GET  /metrics  - Prometheus metrics")
+    logger.info(f"  GET  /events   - Live trade stream (Server-Sent Events)")
     logger.info("=" * 60)
     
     try:
@@ -340,6 +938,12 @@ def main():
     except KeyboardInterrupt:
         logger.info("Shutting down...")
         server.shutdown()
+    finally:
+        if log_rotator:
+            log_rotator.stop(timeout=10)
+        journal_writer.stop(timeout=10)
+        aggregator.save_snapshot()
+        sync_worker.stop(timeout=60)
     
     return 0
 